@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class AlbumsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.albums'
-    verbose_name = 'Albums' 
\ No newline at end of file
+    verbose_name = 'Albums'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.albums import manifests
+from apps.albums.models import Album
+
+
+class Command(BaseCommand):
+    help = 'Publish static JSON manifests of completed public albums and remove stale ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--album', help='Only sync the album with this id')
+
+    def handle(self, *args, **options):
+        albums = Album.all_objects.filter(
+            Q(status__in=manifests.PUBLISHED_STATUSES) | ~Q(manifest_version='')
+        )
+        if options['album']:
+            albums = Album.all_objects.filter(id=options['album'])
+
+        published = removed = 0
+        for album_id in albums.values_list('id', flat=True).iterator():
+            if manifests.sync(album_id):
+                published += 1
+            else:
+                removed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Published {published} album manifests, {removed} unpublished or skipped.')
+        )
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.albums.models import Album
+from apps.albums.purge import purge_album
+
+
+class Command(BaseCommand):
+    help = 'Remove soft-deleted albums, their rows in chunks and then their media files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--older-than-hours', type=int, default=settings.ALBUM_PURGE_DELAY_HOURS,
+            help='Only purge albums deleted at least this long ago'
+        )
+
+    def handle(self, *args, **options):
+        deleted_before = timezone.now() - timedelta(hours=options['older_than_hours'])
+        albums = Album.all_objects.filter(deleted_at__lte=deleted_before).order_by('deleted_at')
+        
+        count = uploads = 0
+        for album in albums.iterator():
+            album_id = album.pk
+            uploads += purge_album(album, chunk_size=options['chunk_size'])
+            count += 1
+            self.stdout.write(f'Purged album {album_id}.')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {count} albums with {uploads} uploads.')
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from apps.albums.models import Album, AlbumStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized album statistics from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--album', help='Only rebuild the album with this id')
+
+    def handle(self, *args, **options):
+        albums = Album.objects.all()
+        if options['album']:
+            albums = albums.filter(id=options['album'])
+        
+        # Drop rows of albums that no longer exist before recomputing
+        if not options['album']:
+            AlbumStats.objects.exclude(album__in=Album.objects.all()).delete()
+        
+        count = 0
+        for album_id in albums.values_list('id', flat=True).iterator():
+            AlbumStats.rebuild(album_id)
+            count += 1
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt stats for {count} albums.')
+        )
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.albums import manifests
+from apps.albums.models import Album
+from apps.albums.snapshots import invalidate_album_snapshots
+from eventvault.cache import invalidate_tags
+
+
+class Command(BaseCommand):
+    help = 'Complete active albums past their expiry date and archive long expired ones'
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        
+        expired = Album.objects.filter(status='active', expires_at__lt=now)
+        changed = list(expired.values_list('pk', 'access_code', 'owner_id'))
+        completed = expired.update(status='completed', updated_at=now)
+        
+        stale = Album.objects.filter(
+            status='completed',
+            expires_at__lt=now - timedelta(days=settings.ALBUM_ARCHIVE_AFTER_DAYS)
+        )
+        changed += list(stale.values_list('pk', 'access_code', 'owner_id'))
+        archived = stale.update(status='archived', updated_at=now)
+        
+        # update() skips the post_save signal
+        invalidate_album_snapshots([access_code for _, access_code, _ in changed])
+        invalidate_tags(*{
+            tag for pk, _, owner_id in changed for tag in (f'album:{pk}', f'user_albums:{owner_id}')
+        })
+        # Completed public albums are served from static manifests from now on
+        for pk, _, _ in changed:
+            manifests.sync(pk)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Completed {completed} expired albums, archived {archived}.')
+        )
@@ -0,0 +1,243 @@
+"""
+Static JSON manifests for finished public albums.
+
+Once an album is completed its content barely changes, so it is published as
+plain JSON files in media storage and guests read them straight from the web
+server or CDN:
+
+    manifests/<access_code>/current.json            -> {"version", "album"}
+    manifests/<access_code>/<version>/album.json     album metadata and shard list
+    manifests/<access_code>/<version>/uploads-<n>.json
+
+The version is a hash of the content, so files under a version never change
+and can be served with a far-future Cache-Control; only current.json needs a
+short one. A rebuild that changes nothing writes nothing. The previous
+version is kept so clients in the middle of reading it can finish.
+"""
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from eventvault.cache import invalidate_tags
+
+MANIFEST_ROOT = 'manifests'
+PUBLISHED_STATUSES = ('completed', 'archived')
+
+
+def manifest_dir(access_code):
+    return f'{MANIFEST_ROOT}/{access_code}'
+
+
+def current_name(access_code):
+    return f'{manifest_dir(access_code)}/current.json'
+
+
+def is_publishable(album):
+    """Only finished, active, public albums are world readable as static files"""
+    return (
+        album.status in PUBLISHED_STATUSES
+        and album.is_active
+        and album.privacy == 'public'
+        and album.deleted_at is None
+    )
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _url(storage, name):
+    return storage.url(name) if name else None
+
+
+def upload_item(upload):
+    """Public representation of an upload with its rendition URLs"""
+    return {
+        'id': str(upload.pk),
+        'file_type': upload.file_type,
+        'width': upload.width,
+        'height': upload.height,
+        'duration': upload.duration,
+        'placeholder': upload.placeholder,
+        'dominant_color': upload.dominant_color,
+        'caption': upload.caption,
+        'uploader_display_name': upload.uploader_display_name,
+        'taken_at': upload.taken_at,
+        'created_at': upload.created_at,
+        'renditions': {
+            'thumbnail': _url(default_storage, upload.thumbnail.name),
+            # Cold originals are restored on request only, not linked publicly
+            'original': _url(default_storage, upload.file.name) if upload.storage_tier == 'hot' else None,
+        },
+    }
+
+
+def album_uploads(album):
+    """Uploads guests may see, in gallery order"""
+    from apps.uploads.models import Upload
+    from .models import AlbumSettings
+
+    auto_organize = AlbumSettings.objects.filter(album=album).values_list(
+        'auto_organize_by_date', flat=True
+    ).first()
+    return (
+        Upload.objects.filter(album=album, status='approved')
+        .select_related('uploader_user')
+        .order_by('taken_at' if auto_organize else '-created_at', 'pk')
+    )
+
+
+def build(album):
+    """Get (version, {name: bytes}) for an album, names relative to the version directory"""
+    page_size = settings.MANIFEST_PAGE_SIZE
+    pages = [[]]
+    for upload in album_uploads(album).iterator(chunk_size=page_size):
+        if len(pages[-1]) == page_size:
+            pages.append([])
+        pages[-1].append(upload_item(upload))
+    shards = [_dumps({'uploads': page}) for page in pages]
+
+    metadata = {
+        'id': str(album.pk),
+        'title': album.title,
+        'description': album.description,
+        'event_type': str(album.event_type),
+        'event_date': album.event_date,
+        'event_location': album.event_location,
+        'status': album.status,
+        'upload_count': sum(len(page) for page in pages),
+        'page_size': page_size,
+    }
+    digest = hashlib.sha1(_dumps(metadata))
+    for shard in shards:
+        digest.update(shard)
+    version = digest.hexdigest()[:16]
+
+    base = f'{manifest_dir(album.access_code)}/{version}'
+    files = {f'uploads-{number}.json': shard for number, shard in enumerate(shards, 1)}
+    files['album.json'] = _dumps(dict(
+        metadata, version=version,
+        shards=[default_storage.url(f'{base}/{name}') for name in files],
+    ))
+    return version, files
+
+
+def _write(name, content, overwrite=False):
+    if default_storage.exists(name):
+        if not overwrite:
+            return  # Versioned files never change
+        try:
+            path = default_storage.path(name)
+        except NotImplementedError:
+            default_storage.delete(name)
+        else:
+            # Swap the file in place so readers never see it missing
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            return
+    default_storage.save(name, ContentFile(content))
+
+
+def _delete_versions(access_code, keep):
+    root = manifest_dir(access_code)
+    try:
+        versions, _ = default_storage.listdir(root)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for version in versions:
+        if version in keep:
+            continue
+        _, names = default_storage.listdir(f'{root}/{version}')
+        for name in names:
+            default_storage.delete(f'{root}/{version}/{name}')
+        _remove_directory(f'{root}/{version}')
+
+
+def _remove_directory(name):
+    """Drop an emptied directory, object storages have none to drop"""
+    try:
+        os.rmdir(default_storage.path(name))
+    except (NotImplementedError, OSError):
+        pass
+
+
+def publish(album):
+    """Write the album's manifest, returns the version now current"""
+    from .models import Album
+
+    version, files = build(album)
+    if version == album.manifest_version and default_storage.exists(current_name(album.access_code)):
+        return version
+
+    base = f'{manifest_dir(album.access_code)}/{version}'
+    for name, content in files.items():
+        _write(f'{base}/{name}', content)
+    # Switch readers over only once every shard exists
+    _write(current_name(album.access_code), _dumps({
+        'version': version,
+        'album': _url(default_storage, f'{base}/album.json'),
+        'published_at': timezone.now(),
+    }), overwrite=True)
+
+    _delete_versions(album.access_code, keep={version, album.manifest_version})
+    Album.all_objects.filter(pk=album.pk).update(manifest_version=version)
+    album.manifest_version = version
+    invalidate_tags(f'album:{album.pk}')  # Album responses include manifest_url
+    return version
+
+
+def unpublish(album):
+    """Remove every manifest file of the album"""
+    from .models import Album
+
+    default_storage.delete(current_name(album.access_code))
+    _delete_versions(album.access_code, keep=set())
+    _remove_directory(manifest_dir(album.access_code))
+    if album.manifest_version:
+        Album.all_objects.filter(pk=album.pk).update(manifest_version='')
+        album.manifest_version = ''
+        invalidate_tags(f'album:{album.pk}')
+
+
+def sync(album_id):
+    """Publish, rebuild or remove an album's manifest to match its current state"""
+    from .models import Album
+
+    album = Album.all_objects.select_related('event_type').filter(pk=album_id).first()
+    if album is None:
+        return None
+    if is_publishable(album):
+        return publish(album)
+    if album.manifest_version:
+        unpublish(album)
+    return None
+
+
+def sync_on_commit(album_id):
+    """Sync the manifest once the triggering transaction has committed, once per album"""
+    connection = transaction.get_connection()
+    queued = None
+    if connection.in_atomic_block:
+        # Bulk changes would otherwise rebuild the manifest once per row. Commit and
+        # rollback replace run_on_commit, which starts a fresh set
+        queued = getattr(connection, 'manifest_syncs', None)
+        if queued is None or queued[0] is not connection.run_on_commit:
+            queued = connection.manifest_syncs = (connection.run_on_commit, set())
+        if album_id in queued[1]:
+            return
+        queued[1].add(album_id)
+
+    def run():
+        if queued is not None:
+            queued[1].discard(album_id)
+        sync(album_id)
+    transaction.on_commit(run)
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('albums', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlbumStats',
+            fields=[
+                ('album', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='albums.album')),
+                ('total_uploads', models.PositiveIntegerField(default=0, verbose_name='total uploads')),
+                ('total_bytes', models.PositiveBigIntegerField(default=0, verbose_name='total size (bytes)')),
+                ('image_count', models.PositiveIntegerField(default=0, verbose_name='image count')),
+                ('video_count', models.PositiveIntegerField(default=0, verbose_name='video count')),
+                ('audio_count', models.PositiveIntegerField(default=0, verbose_name='audio count')),
+                ('document_count', models.PositiveIntegerField(default=0, verbose_name='document count')),
+                ('other_count', models.PositiveIntegerField(default=0, verbose_name='other count')),
+                ('pending_count', models.PositiveIntegerField(default=0, verbose_name='pending count')),
+                ('approved_count', models.PositiveIntegerField(default=0, verbose_name='approved count')),
+                ('rejected_count', models.PositiveIntegerField(default=0, verbose_name='rejected count')),
+                ('processing_count', models.PositiveIntegerField(default=0, verbose_name='processing count')),
+                ('total_views', models.PositiveBigIntegerField(default=0, verbose_name='total views')),
+                ('total_likes', models.PositiveBigIntegerField(default=0, verbose_name='total likes')),
+                ('total_downloads', models.PositiveBigIntegerField(default=0, verbose_name='total downloads')),
+                ('last_upload_at', models.DateTimeField(blank=True, null=True, verbose_name='last upload at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'Album Stats',
+                'verbose_name_plural': 'Album Stats',
+                'db_table': 'album_stats',
+            },
+        ),
+        migrations.AddField(
+            model_name='album',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='is active'),
+        ),
+    ]
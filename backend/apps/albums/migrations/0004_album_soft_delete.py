@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('albums', '0003_album_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='deleted at'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('albums', '0004_album_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='manifest_version',
+            field=models.CharField(blank=True, max_length=40, verbose_name='manifest version'),
+        ),
+    ]
@@ -3,9 +3,14 @@ import qrcode
 from io import BytesIO
 from django.core.files import File
 from django.db import models
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
 from django.utils.text import slugify
+from eventvault.cache import invalidate_tags
+from .snapshots import invalidate_album_snapshots
 User = get_user_model()
 
 
@@ -40,6 +45,13 @@ class EventType(models.Model):
         super().save(*args, **kwargs)
 
 
+class AlbumManager(models.Manager):
+    """Hides soft-deleted albums"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Album(models.Model):
     """
     Main album model for events
@@ -96,6 +108,7 @@ class Album(models.Model):
     # QR Code and Access
     qr_code = models.ImageField(_('QR code'), upload_to='qr_codes/', blank=True, null=True)
     access_code = models.CharField(_('access code'), max_length=20, unique=True, blank=True)
+    is_active = models.BooleanField(_('is active'), default=True)
     
     # Stats
     view_count = models.PositiveIntegerField(_('view count'), default=0)
@@ -105,6 +118,11 @@ class Album(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     expires_at = models.DateTimeField(_('expires at'), null=True, blank=True)
+    deleted_at = models.DateTimeField(_('deleted at'), null=True, blank=True, db_index=True)
+    manifest_version = models.CharField(_('manifest version'), max_length=40, blank=True)
+
+    objects = AlbumManager()
+    all_objects = models.Manager()
 
     class Meta:
         db_table = 'albums'
@@ -139,7 +157,7 @@ class Album(models.Model):
         
         while True:
             code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            if not Album.objects.filter(access_code=code).exists():
+            if not Album.all_objects.filter(access_code=code).exists():
                 return code
 
     def generate_qr_code(self):
@@ -170,21 +188,48 @@ class Album(models.Model):
         # Save without triggering save() again
         Album.objects.filter(pk=self.pk).update(qr_code=self.qr_code)
 
+    def soft_delete(self):
+        """Hide the album now, purge_deleted_albums removes its data in the background"""
+        self.deleted_at = timezone.now()
+        self.is_active = False
+        Album.all_objects.filter(pk=self.pk).update(deleted_at=self.deleted_at, is_active=False)
+        invalidate_album_snapshots([self.access_code])
+        invalidate_tags(f'album:{self.pk}', f'user_albums:{self.owner_id}')
+        if self.manifest_version:
+            from .manifests import unpublish
+            unpublish(self)
+
     @property
     def upload_url(self):
         """Get the upload URL for this album"""
         return f"/upload/{self.access_code}/"
 
+    @property
+    def manifest_url(self):
+        """Get the URL of the published static manifest, if any"""
+        if not self.manifest_version:
+            return None
+        from django.core.files.storage import default_storage
+        from .manifests import current_name
+        return default_storage.url(current_name(self.access_code))
+
+    def get_stats(self):
+        """Get the materialized stats row, building it if missing"""
+        try:
+            return self.stats
+        except AlbumStats.DoesNotExist:
+            self.stats = AlbumStats.rebuild(self.pk)
+            return self.stats
+
     @property
     def total_uploads(self):
         """Get total number of uploads in this album"""
-        return self.uploads.count()
+        return self.get_stats().total_uploads
 
     @property
     def total_size_mb(self):
         """Get total size of all uploads in MB"""
-        total_bytes = sum(upload.file.size for upload in self.uploads.all() if upload.file)
-        return round(total_bytes / (1024 * 1024), 2)
+        return self.get_stats().total_size_mb
 
     def can_upload(self, user=None):
         """Check if upload is allowed"""
@@ -274,4 +319,118 @@ class AlbumSettings(models.Model):
         verbose_name_plural = _('Album Settings')
 
     def __str__(self):
-        return f"Settings for {self.album.title}" 
\ No newline at end of file
+        return f"Settings for {self.album.title}" 
+
+
+class AlbumStats(models.Model):
+    """
+    Materialized upload statistics for albums, maintained incrementally
+    """
+    album = models.OneToOneField(
+        Album,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+
+    # Totals
+    total_uploads = models.PositiveIntegerField(_('total uploads'), default=0)
+    total_bytes = models.PositiveBigIntegerField(_('total size (bytes)'), default=0)
+
+    # File type breakdown
+    image_count = models.PositiveIntegerField(_('image count'), default=0)
+    video_count = models.PositiveIntegerField(_('video count'), default=0)
+    audio_count = models.PositiveIntegerField(_('audio count'), default=0)
+    document_count = models.PositiveIntegerField(_('document count'), default=0)
+    other_count = models.PositiveIntegerField(_('other count'), default=0)
+
+    # Moderation breakdown
+    pending_count = models.PositiveIntegerField(_('pending count'), default=0)
+    approved_count = models.PositiveIntegerField(_('approved count'), default=0)
+    rejected_count = models.PositiveIntegerField(_('rejected count'), default=0)
+    processing_count = models.PositiveIntegerField(_('processing count'), default=0)
+
+    # Engagement
+    total_views = models.PositiveBigIntegerField(_('total views'), default=0)
+    total_likes = models.PositiveBigIntegerField(_('total likes'), default=0)
+    total_downloads = models.PositiveBigIntegerField(_('total downloads'), default=0)
+
+    last_upload_at = models.DateTimeField(_('last upload at'), null=True, blank=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    FILE_TYPE_FIELDS = {
+        'image': 'image_count',
+        'video': 'video_count',
+        'audio': 'audio_count',
+        'document': 'document_count',
+        'other': 'other_count',
+    }
+    STATUS_FIELDS = {
+        'pending': 'pending_count',
+        'approved': 'approved_count',
+        'rejected': 'rejected_count',
+        'processing': 'processing_count',
+    }
+
+    class Meta:
+        db_table = 'album_stats'
+        verbose_name = _('Album Stats')
+        verbose_name_plural = _('Album Stats')
+
+    def __str__(self):
+        return f"Stats for {self.album_id}"
+
+    @property
+    def total_size_mb(self):
+        """Get total size of all uploads in MB"""
+        return round(self.total_bytes / (1024 * 1024), 2)
+
+    @property
+    def file_type_breakdown(self):
+        """Get upload counts per file type, skipping empty types"""
+        return [
+            {'file_type': file_type, 'count': getattr(self, field)}
+            for file_type, field in self.FILE_TYPE_FIELDS.items()
+            if getattr(self, field)
+        ]
+
+    @classmethod
+    def apply_delta(cls, album_id, last_upload_at=None, **deltas):
+        """Apply counter deltas to an album's stats row with F() expressions"""
+        updates = {}
+        for field, amount in deltas.items():
+            if amount > 0:
+                updates[field] = F(field) + amount
+            elif amount < 0:
+                updates[field] = Greatest(F(field) + amount, Value(0))
+        if last_upload_at:
+            updates['last_upload_at'] = Greatest(
+                Coalesce(F('last_upload_at'), Value(last_upload_at)), Value(last_upload_at)
+            )
+        if not updates:
+            return
+        if not cls.objects.filter(album_id=album_id).update(**updates):
+            # No row yet, recompute it from the uploads (includes this change)
+            cls.rebuild(album_id)
+
+    @classmethod
+    def rebuild(cls, album_id):
+        """Recompute an album's stats from scratch in one aggregate query"""
+        from apps.uploads.models import Upload
+
+        aggregates = {
+            'total_uploads': Count('id'),
+            'total_bytes': Coalesce(Sum('file_size'), 0),
+            'total_views': Coalesce(Sum('view_count'), 0),
+            'total_likes': Coalesce(Sum('like_count'), 0),
+            'total_downloads': Coalesce(Sum('download_count'), 0),
+            'last_upload_at': Max('created_at'),
+        }
+        for file_type, field in cls.FILE_TYPE_FIELDS.items():
+            aggregates[field] = Count('id', filter=Q(file_type=file_type))
+        for status, field in cls.STATUS_FIELDS.items():
+            aggregates[field] = Count('id', filter=Q(status=status))
+
+        values = Upload.objects.filter(album_id=album_id).aggregate(**aggregates)
+        stats, created = cls.objects.update_or_create(album_id=album_id, defaults=values)
+        return stats
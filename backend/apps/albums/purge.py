@@ -0,0 +1,66 @@
+"""
+Background removal of soft-deleted albums.
+
+Children are deleted in bounded chunks, each in its own short transaction,
+so a big album never locks the upload tables for long. Media files are
+deleted only after the rows referencing them are committed away.
+"""
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+
+from .models import Album
+
+
+def delete_in_chunks(queryset, chunk_size):
+    """Delete the queryset's rows ``chunk_size`` at a time, returns rows deleted"""
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            deleted += model._base_manager.filter(pk__in=pks).delete()[1].get(model._meta.label, 0)
+
+
+def delete_upload_files(rows):
+    from apps.uploads.tiers import STORAGES
+
+    for name, thumbnail, tier in rows:
+        if name:
+            STORAGES.get(tier, default_storage).delete(name)
+        if thumbnail:
+            default_storage.delete(thumbnail)
+
+
+def purge_album(album, chunk_size=500):
+    """Remove a soft-deleted album with all its rows and files, returns uploads deleted"""
+    from apps.uploads.models import Upload
+
+    # Uploads first, their comments, likes, reports and faces go with each chunk
+    uploads = Upload.objects.filter(album_id=album.pk).order_by()
+    deleted = 0
+    while True:
+        chunk = list(uploads.values_list('pk', 'file', 'thumbnail', 'storage_tier')[:chunk_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            Upload.objects.filter(pk__in=[row[0] for row in chunk]).delete()
+        delete_upload_files([row[1:] for row in chunk])
+        deleted += len(chunk)
+
+    # Then every other table hanging off the album (notifications, analytics, moments...)
+    for relation in Album._meta.related_objects:
+        if relation.one_to_many and relation.on_delete is models.CASCADE:
+            related = relation.related_model._base_manager.filter(**{relation.field.name: album.pk}).order_by()
+            delete_in_chunks(related, chunk_size)
+
+    # Only one-to-one rows are left for the final cascade
+    files = [album.qr_code.name] if album.qr_code else []
+    album_settings = getattr(album, 'advanced_settings', None)
+    if album_settings and album_settings.cover_image:
+        files.append(album_settings.cover_image.name)
+    album.delete()
+    for name in files:
+        default_storage.delete(name)
+    return deleted
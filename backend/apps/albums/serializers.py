@@ -36,6 +36,12 @@ class AlbumListSerializer(serializers.ModelSerializer):
     total_uploads = serializers.ReadOnlyField()
     total_size_mb = serializers.ReadOnlyField()
     
+    # Columns read by fields that are not model fields, for ?fields= (see eventvault.fieldsets)
+    sparse_columns = {
+        'total_uploads': (),
+        'total_size_mb': (),
+    }
+    
     class Meta:
         model = Album
         fields = (
@@ -55,6 +61,15 @@ class AlbumDetailSerializer(serializers.ModelSerializer):
     total_uploads = serializers.ReadOnlyField()
     total_size_mb = serializers.ReadOnlyField()
     upload_url = serializers.ReadOnlyField()
+    manifest_url = serializers.ReadOnlyField()
+    
+    # Columns read by fields that are not model fields, for ?fields= (see eventvault.fieldsets)
+    sparse_columns = {
+        'total_uploads': (),
+        'total_size_mb': (),
+        'upload_url': ('access_code',),
+        'manifest_url': ('access_code', 'manifest_version'),
+    }
     
     class Meta:
         model = Album
@@ -63,13 +78,13 @@ class AlbumDetailSerializer(serializers.ModelSerializer):
             'event_location', 'owner', 'status', 'privacy', 'max_files_per_user',
             'allowed_file_types', 'max_file_size_mb', 'require_approval',
             'enable_comments', 'qr_code', 'access_code', 'collaborators',
-            'settings', 'total_uploads', 'total_size_mb', 'upload_url',
+            'settings', 'total_uploads', 'total_size_mb', 'upload_url', 'manifest_url',
             'view_count', 'download_count', 'created_at', 'updated_at',
             'expires_at'
         )
         read_only_fields = (
             'id', 'slug', 'access_code', 'qr_code', 'total_uploads',
-            'total_size_mb', 'upload_url', 'view_count', 'download_count',
+            'total_size_mb', 'upload_url', 'manifest_url', 'view_count', 'download_count',
             'created_at', 'updated_at'
         )
 
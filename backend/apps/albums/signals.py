@@ -0,0 +1,40 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from eventvault.cache import invalidate_tags
+from .manifests import sync_on_commit, unpublish
+from .models import Album, AlbumCollaborator, AlbumSettings, EventType
+from .snapshots import invalidate_album_snapshots
+
+
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+def invalidate_album_caches(sender, instance, **kwargs):
+    """Guests must see status and limit changes on their next request"""
+    invalidate_album_snapshots([instance.access_code])
+    invalidate_tags(f'album:{instance.pk}', f'user_albums:{instance.owner_id}')
+
+
+@receiver(post_save, sender=Album)
+def sync_album_manifest(sender, instance, **kwargs):
+    """Publish the static manifest on completion, remove it when the album goes private"""
+    sync_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=Album)
+def remove_album_manifest(sender, instance, **kwargs):
+    if instance.manifest_version:
+        unpublish(instance)
+
+
+@receiver(post_save, sender=AlbumSettings)
+@receiver(post_save, sender=AlbumCollaborator)
+@receiver(post_delete, sender=AlbumCollaborator)
+def invalidate_album_detail_caches(sender, instance, **kwargs):
+    invalidate_tags(f'album:{instance.album_id}')
+
+
+@receiver(post_save, sender=EventType)
+@receiver(post_delete, sender=EventType)
+def invalidate_event_type_caches(sender, instance, **kwargs):
+    invalidate_tags('event_types')
@@ -0,0 +1,61 @@
+"""
+Access code resolution for guest requests.
+
+Guest pages and uploads look an album up by access code on every request.
+The few fields they need are kept as an AlbumSnapshot in the two-tier cache,
+tagged with the code, so Album saves and deletes invalidate it. Codes without
+an active album are cached too, so guessed codes do not reach the database
+either.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+
+from eventvault.cache import TieredCache, invalidate_tags
+
+SNAPSHOT_FIELDS = (
+    'id', 'access_code', 'owner_id', 'status', 'max_files_per_user', 'max_file_size_mb',
+    'allowed_file_types', 'expires_at', 'require_approval',
+)
+MISSING = 'missing'
+
+snapshot_cache = TieredCache('album_snapshot', local_size=settings.ALBUM_SNAPSHOT_CACHE_SIZE)
+
+
+class AlbumSnapshot(namedtuple('AlbumSnapshot', SNAPSHOT_FIELDS)):
+    """Read-only subset of an active album, enough to validate guest uploads"""
+    __slots__ = ()
+
+    def can_upload(self, user=None):
+        """Check if upload is allowed, same rules as Album.can_upload"""
+        from .models import Album
+        return Album.can_upload(self, user)
+
+
+def _tag(access_code):
+    return f'access_code:{access_code}'
+
+
+def load_snapshot(access_code):
+    """Read an album snapshot from the database, MISSING when there is no active album"""
+    from .models import Album
+
+    row = Album.objects.filter(access_code=access_code, is_active=True).values(*SNAPSHOT_FIELDS).first()
+    if not row:
+        return MISSING
+    row['allowed_file_types'] = tuple(row['allowed_file_types'] or ())
+    return AlbumSnapshot(**row)
+
+
+def get_album_snapshot(access_code):
+    """Get the snapshot of the active album with this access code, or None"""
+    snapshot = snapshot_cache.get_or_set(
+        access_code, lambda: load_snapshot(access_code),
+        timeout=settings.ALBUM_SNAPSHOT_TIMEOUT, tags=[_tag(access_code)]
+    )
+    return None if snapshot == MISSING else snapshot
+
+
+def invalidate_album_snapshots(access_codes):
+    """Drop cached snapshots after albums changed outside of Album.save()"""
+    invalidate_tags(*[_tag(code) for code in access_codes if code])
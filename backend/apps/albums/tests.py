@@ -0,0 +1,223 @@
+import io
+import json
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.uploads import tiers
+from apps.uploads.models import Upload, UploadLike
+from . import manifests, purge
+from .models import Album, AlbumStats, EventType
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+STATS_FIELDS = [
+    field.name for field in AlbumStats._meta.fields if field.name not in ('album', 'updated_at')
+]
+
+
+def make_user(email):
+    return User.objects.create(email=email, username=email, first_name='Test', last_name='User')
+
+
+def make_album(owner, **kwargs):
+    event_type, _ = EventType.objects.get_or_create(name='wedding', defaults={'name_tr': 'Düğün'})
+    return Album.objects.create(
+        title='Album', event_type=event_type, event_date=date.today(), owner=owner, status='active', **kwargs
+    )
+
+
+def make_upload(album, name='photo.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), (200, 10, 10)).save(buffer, 'JPEG')
+    return Upload.objects.create(
+        album=album, original_filename=name, file=SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+    )
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+class AlbumStatsTests(MediaTestCase):
+    """Incremental stats must always match a rebuild from the uploads"""
+
+    def setUp(self):
+        self.owner = make_user('owner@example.com')
+        self.guests = [make_user(f'guest{i}@example.com') for i in range(2)]
+        self.album = make_album(self.owner)
+        self.uploads = [make_upload(self.album, f'{i}.jpg') for i in range(3)]
+
+    def assertMatchesRebuild(self):
+        incremental = AlbumStats.objects.values(*STATS_FIELDS).get(album=self.album)
+        AlbumStats.rebuild(self.album.pk)
+        rebuilt = AlbumStats.objects.values(*STATS_FIELDS).get(album=self.album)
+        self.assertEqual(incremental, rebuilt)
+        return incremental
+
+    def test_like(self):
+        UploadLike.toggle(self.uploads[0], self.guests[0])
+        UploadLike.toggle(self.uploads[1], self.guests[0])
+        self.assertEqual(self.assertMatchesRebuild()['total_likes'], 2)
+
+    def test_unlike(self):
+        UploadLike.toggle(self.uploads[0], self.guests[0])
+        UploadLike.toggle(self.uploads[0], self.guests[0])
+        self.assertEqual(self.assertMatchesRebuild()['total_likes'], 0)
+
+    def test_delete_liked_upload(self):
+        for guest in self.guests:
+            UploadLike.toggle(self.uploads[0], guest)
+        UploadLike.toggle(self.uploads[1], self.guests[0])
+
+        Upload.objects.get(pk=self.uploads[0].pk).delete()
+
+        stats = self.assertMatchesRebuild()
+        self.assertEqual(stats['total_likes'], 1)
+        self.assertEqual(stats['total_uploads'], 2)
+
+    def test_status_change(self):
+        upload = Upload.objects.get(pk=self.uploads[0].pk)
+        upload.status = 'rejected'
+        upload.save()
+        self.assertEqual(self.assertMatchesRebuild()['rejected_count'], 1)
+
+
+class ManifestTests(MediaTestCase):
+    """Published manifests must follow the files they link to"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.album = make_album(make_user('owner@example.com'))
+            self.upload = make_upload(self.album)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.album.status = 'archived'
+            self.album.save()
+        self.album.refresh_from_db()
+
+    def read_uploads(self):
+        with default_storage.open(manifests.current_name(self.album.access_code)) as f:
+            version = json.load(f)['version']
+        name = f'{manifests.manifest_dir(self.album.access_code)}/{version}/uploads-1.json'
+        with default_storage.open(name) as f:
+            return json.load(f)['uploads']
+
+    def test_published(self):
+        self.assertTrue(self.album.manifest_version)
+        original = self.read_uploads()[0]['renditions']['original']
+        self.assertEqual(original, default_storage.url(self.upload.file.name))
+
+    def test_resynced_after_cold_move(self):
+        cold_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cold_root, ignore_errors=True)
+        with mock.patch.dict(tiers.STORAGES, cold=FileSystemStorage(location=cold_root)):
+            call_command('apply_storage_policy', stdout=io.StringIO())
+
+        self.assertEqual(Upload.objects.get(pk=self.upload.pk).storage_tier, 'cold')
+        self.assertFalse(default_storage.exists(self.upload.file.name))
+        self.assertIsNone(self.read_uploads()[0]['renditions']['original'])
+
+    def test_resynced_after_layout_migration(self):
+        with override_settings(MEDIA_LAYOUT='flat'), self.captureOnCommitCallbacks(execute=True):
+            flat = make_upload(self.album, 'flat.jpg')
+        old_name = flat.file.name
+        self.assertIn(default_storage.url(old_name), [
+            item['renditions']['original'] for item in self.read_uploads()
+        ])
+
+        call_command('migrate_media_layout', stdout=io.StringIO())
+
+        new_name = Upload.objects.get(pk=flat.pk).file.name
+        self.assertNotEqual(new_name, old_name)
+        originals = [item['renditions']['original'] for item in self.read_uploads()]
+        self.assertIn(default_storage.url(new_name), originals)
+        self.assertNotIn(default_storage.url(old_name), originals)
+
+    def test_one_rebuild_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            uploads = [make_upload(self.album, f'{i}.jpg') for i in range(3)]
+        with mock.patch.object(manifests, 'build', wraps=manifests.build) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                Upload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(len(self.read_uploads()), 1)
+
+
+@override_settings(CACHE_SHARED=True)
+class UserAlbumStatsTests(MediaTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = make_user('owner@example.com')
+        self.album = make_album(self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = '/api/v1/albums/user/stats/'
+
+    def test_uploads_refresh_cached_stats(self):
+        self.assertEqual(self.client.get(self.url).json()['total_uploads'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            upload = make_upload(self.album)
+        self.assertEqual(self.client.get(self.url).json()['total_uploads'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Upload.objects.get(pk=upload.pk).delete()
+        self.assertEqual(self.client.get(self.url).json()['total_uploads'], 0)
+
+
+class PurgeDeletedAlbumsTests(MediaTestCase):
+
+    def setUp(self):
+        owner = make_user('owner@example.com')
+        self.old = self.deleted_album(owner, 'old', hours_ago=72, uploads=3)
+        self.recent = self.deleted_album(owner, 'recent', hours_ago=1, uploads=1)
+        self.active = make_album(owner, slug='active')
+        make_upload(self.active)
+
+    def deleted_album(self, owner, slug, hours_ago, uploads):
+        album = make_album(owner, slug=slug)
+        for index in range(uploads):
+            make_upload(album, f'{slug}-{index}.jpg')
+        album.soft_delete()
+        Album.all_objects.filter(pk=album.pk).update(deleted_at=timezone.now() - timedelta(hours=hours_ago))
+        return album
+
+    def purge(self, **options):
+        call_command('purge_deleted_albums', older_than_hours=48, stdout=io.StringIO(), **options)
+
+    def test_only_albums_past_retention_are_purged(self):
+        files = [upload.file.name for upload in Upload.objects.filter(album=self.old)]
+        qr_code = self.old.qr_code.name
+        self.purge()
+
+        self.assertFalse(Album.all_objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(Upload.objects.filter(album_id=self.old.pk).exists())
+        for name in files + [qr_code]:
+            self.assertFalse(default_storage.exists(name))
+        self.assertTrue(Album.all_objects.filter(pk=self.recent.pk).exists())
+        self.assertEqual(Upload.objects.filter(album=self.recent).count(), 1)
+        self.assertTrue(Album.objects.filter(pk=self.active.pk).exists())
+        self.assertEqual(Upload.objects.filter(album=self.active).count(), 1)
+
+    def test_uploads_are_deleted_in_chunks(self):
+        with mock.patch.object(purge, 'delete_upload_files', wraps=purge.delete_upload_files) as delete_files:
+            self.purge(chunk_size=2)
+
+        self.assertEqual([len(call.args[0]) for call in delete_files.call_args_list], [2, 1])
+        self.assertFalse(Upload.objects.filter(album_id=self.old.pk).exists())
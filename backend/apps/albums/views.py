@@ -2,10 +2,17 @@ from rest_framework import status, generics, permissions, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Count, Q, Sum
 
+from apps.search.filters import FullTextSearchFilter
+from eventvault.cache import TieredCache, request_key
+from eventvault.conditional import ConditionalGetMixin
+from eventvault.fieldsets import SparseFieldsetMixin
 from .models import Album, EventType, AlbumCollaborator
+from .snapshots import get_album_snapshot
 from .serializers import (
     EventTypeSerializer, AlbumListSerializer, AlbumDetailSerializer,
     AlbumCreateSerializer, AlbumUpdateSerializer, AlbumQRCodeSerializer,
@@ -13,22 +20,38 @@ from .serializers import (
 )
 
 
+event_type_cache = TieredCache('event_types')
+public_album_cache = TieredCache('album_public')
+album_stats_cache = TieredCache('album_stats')
+user_albums_stats_cache = TieredCache('user_albums_stats')
+
+
 class EventTypeListView(generics.ListAPIView):
     queryset = EventType.objects.filter(is_active=True)
     serializer_class = EventTypeSerializer
     permission_classes = [permissions.AllowAny]
 
+    def list(self, request, *args, **kwargs):
+        data = event_type_cache.get_or_set(
+            request_key(request),
+            lambda: super(EventTypeListView, self).list(request, *args, **kwargs).data,
+            tags=['event_types']
+        )
+        return Response(data)
+
 
-class AlbumListCreateView(generics.ListCreateAPIView):
+class AlbumListCreateView(SparseFieldsetMixin, generics.ListCreateAPIView):
     serializer_class = AlbumListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description', 'event_location']
+    filter_backends = [filters.OrderingFilter, FullTextSearchFilter]
     ordering_fields = ['created_at', 'event_date', 'title']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Album.objects.filter(owner=self.request.user)
+        return Album.objects.filter(owner=self.request.user).select_related('event_type', 'owner', 'stats')
+
+    def get_search_scope(self):
+        return self.request.user.pk
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -39,7 +62,7 @@ class AlbumListCreateView(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class AlbumDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AlbumDetailView(ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = AlbumDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'id'
@@ -47,11 +70,18 @@ class AlbumDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Album.objects.filter(owner=self.request.user)
 
+    def get_etag_tags(self):
+        return [f'album:{self.kwargs.get("id")}', 'event_types']
+
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
             return AlbumUpdateSerializer
         return AlbumDetailSerializer
 
+    def perform_destroy(self, instance):
+        # Deleting a big album in one cascade locks tables, purge_deleted_albums removes it in chunks
+        instance.soft_delete()
+
 
 class AlbumQRCodeView(generics.RetrieveAPIView):
     serializer_class = AlbumQRCodeSerializer
@@ -68,20 +98,54 @@ class AlbumStatsView(generics.RetrieveAPIView):
     lookup_field = 'id'
 
     def get_queryset(self):
-        return Album.objects.filter(owner=self.request.user)
+        return Album.objects.filter(owner=self.request.user).select_related('stats')
+
+    def retrieve(self, request, *args, **kwargs):
+        # Per user, only owners ever get an entry
+        album_id = self.kwargs.get('id')
+        data = album_stats_cache.get_or_set(
+            f'{request.user.pk}:{album_id}',
+            lambda: super(AlbumStatsView, self).retrieve(request, *args, **kwargs).data,
+            timeout=settings.CACHE_STATS_TIMEOUT,
+            tags=[f'album:{album_id}']
+        )
+        return Response(data)
 
 
-class AlbumPublicView(generics.RetrieveAPIView):
+class AlbumPublicView(ConditionalGetMixin, SparseFieldsetMixin, generics.RetrieveAPIView):
     serializer_class = AlbumDetailSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'access_code'
     lookup_url_kwarg = 'access_code'
 
     def get_queryset(self):
-        return Album.objects.filter(
-            access_code=self.kwargs.get('access_code'),
-            is_active=True
+        return Album.objects.filter(is_active=True)
+
+    def get_object(self):
+        # Unknown and inactive codes are answered from the snapshot cache
+        snapshot = get_album_snapshot(self.kwargs.get('access_code'))
+        if snapshot is None:
+            raise Http404
+        return get_object_or_404(self.filter_queryset(self.get_queryset()), pk=snapshot.id)
+
+    def get_etag_tags(self):
+        snapshot = get_album_snapshot(self.kwargs.get('access_code'))
+        if snapshot is None:
+            return None
+        return [f'album:{snapshot.id}', 'event_types']
+
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = get_album_snapshot(self.kwargs.get('access_code'))
+        if snapshot is None:
+            raise Http404
+        data = public_album_cache.get_or_set(
+            request_key(request),
+            lambda: super(AlbumPublicView, self).retrieve(request, *args, **kwargs).data,
+            # Short, the payload includes upload counts
+            timeout=settings.CACHE_STATS_TIMEOUT,
+            tags=[f'album:{snapshot.id}', 'event_types']
         )
+        return Response(data)
 
 
 class AlbumCollaboratorView(generics.ListCreateAPIView):
@@ -129,16 +193,17 @@ def album_deactivate(request, id):
 @permission_classes([permissions.IsAuthenticated])
 def user_albums_stats(request):
     user = request.user
-    total_albums = Album.objects.filter(owner=user).count()
-    active_albums = Album.objects.filter(owner=user, is_active=True).count()
-    
-    from apps.uploads.models import Upload
-    total_uploads = Upload.objects.filter(album__owner=user).count()
     
-    stats = {
-        'total_albums': total_albums,
-        'active_albums': active_albums,
-        'total_uploads': total_uploads,
-    }
+    def compute():
+        stats = Album.objects.filter(owner=user).aggregate(
+            total_albums=Count('id'),
+            active_albums=Count('id', filter=Q(is_active=True)),
+            total_uploads=Sum('stats__total_uploads'),
+        )
+        stats['total_uploads'] = stats['total_uploads'] or 0
+        return stats
     
+    stats = user_albums_stats_cache.get_or_set(
+        user.pk, compute, timeout=settings.CACHE_STATS_TIMEOUT, tags=[f'user_albums:{user.pk}']
+    )
     return Response(stats, status=status.HTTP_200_OK) 
\ No newline at end of file
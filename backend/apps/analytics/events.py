@@ -0,0 +1,189 @@
+"""
+Activity event ingestion and rollups.
+
+Events are counted per album, kind and minute in a process-local buffer and
+appended to ``ActivityEvent`` once the minute is over, by the next event or a
+background timer at the latest. ``roll_up_events``
+folds raw events into hourly and daily ``ActivityRollup`` buckets, after which
+``purge_rolled_up_events`` can drop them.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from apps.albums.models import Album
+from .models import ActivityEvent, ActivityRollup
+
+ROLLUP_TRUNCATORS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+}
+
+
+def current_minute():
+    return timezone.now().replace(second=0, microsecond=0)
+
+
+class ActivityBuffer:
+    """Per-minute event counts waiting to be appended to the log"""
+
+    def __init__(self, max_keys=1000, flush_interval=60):
+        self.max_keys = max_keys
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._minute = None
+        self._timer = None
+
+    def add(self, album_id, kind, count=1):
+        minute = current_minute()
+        with self._lock:
+            self._counts[(album_id, kind, minute)] += count
+            should_flush = (
+                (self._minute is not None and minute > self._minute)
+                or len(self._counts) >= self.max_keys
+            )
+            self._minute = minute
+        if self._timer is None and self.flush_interval:
+            self._start_timer()
+        if should_flush:
+            # Outside the caller's transaction, so a failed append cannot break it
+            transaction.on_commit(lambda: self.flush_quietly(before=minute))
+
+    def _start_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(target=self._flush_periodically, name='activity-flush', daemon=True)
+        self._timer.start()
+
+    def _flush_periodically(self):
+        """Append finished minutes of a process that gets no further events"""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush_quietly(before=current_minute())
+            finally:
+                connection.close()
+
+    def flush(self, before=None):
+        """Append buffered counts to the log, keeping the current minute unless ``before`` is None"""
+        with self._lock:
+            if before is None:
+                ready, self._counts = self._counts, defaultdict(int)
+            else:
+                ready = {key: value for key, value in self._counts.items() if key[2] < before}
+                for key in ready:
+                    del self._counts[key]
+        if not ready:
+            return 0
+        try:
+            return self._write(ready)
+        except DatabaseError:
+            # Put the counts back so they are retried on the next flush
+            with self._lock:
+                for key, count in ready.items():
+                    self._counts[key] += count
+            raise
+
+    def flush_quietly(self, before=None):
+        """flush() for timers and shutdown, where nobody can handle the error"""
+        try:
+            return self.flush(before=before)
+        except DatabaseError as e:
+            print(f"Error flushing activity events: {e}")
+            return 0
+
+    def _write(self, ready):
+        # Events of albums deleted since they were counted are dropped
+        existing = set(Album.all_objects.filter(
+            pk__in={album_id for album_id, _, _ in ready}
+        ).values_list('pk', flat=True))
+        events = [
+            ActivityEvent(album_id=album_id, kind=kind, minute=minute, count=count)
+            for (album_id, kind, minute), count in ready.items() if album_id in existing
+        ]
+        try:
+            with transaction.atomic():
+                ActivityEvent.objects.bulk_create(events)
+        except IntegrityError as e:
+            # An album was deleted right after the check
+            print(f"Dropped activity events: {e}")
+            return 0
+        return len(events)
+
+
+_buffer = ActivityBuffer(flush_interval=getattr(settings, 'ACTIVITY_FLUSH_INTERVAL', 60))
+# The database may already be gone at shutdown, e.g. the test database
+atexit.register(_buffer.flush_quietly)
+
+
+def record_activity(album_id, kind, count=1):
+    """Count an activity event for an album"""
+    if getattr(settings, 'ACTIVITY_BUFFERING', True):
+        _buffer.add(album_id, kind, count)
+    else:
+        minute = current_minute()
+        ActivityEvent.objects.create(album_id=album_id, kind=kind, minute=minute, count=count)
+
+
+def flush_activity():
+    """Append everything buffered in this process, including the current minute"""
+    return _buffer.flush()
+
+
+def roll_up_events(batch_size=10000):
+    """Fold raw events into hourly and daily rollups, returns events processed"""
+    processed = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                ActivityEvent.objects.filter(rolled_up=False)
+                .order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            events = ActivityEvent.objects.filter(id__in=ids)
+            for granularity, truncate in ROLLUP_TRUNCATORS.items():
+                buckets = (
+                    events.annotate(bucket_start=truncate('minute'))
+                    .values('album_id', 'kind', 'bucket_start')
+                    .annotate(total=Sum('count'))
+                    .order_by()
+                )
+                for bucket in buckets:
+                    _add_to_rollup(granularity, bucket)
+            events.update(rolled_up=True)
+        processed += len(ids)
+    return processed
+
+
+def _add_to_rollup(granularity, bucket):
+    lookup = {
+        'album_id': bucket['album_id'],
+        'kind': bucket['kind'],
+        'granularity': granularity,
+        'bucket_start': bucket['bucket_start'],
+    }
+    updated = ActivityRollup.objects.filter(**lookup).update(count=F('count') + bucket['total'])
+    if not updated:
+        ActivityRollup.objects.create(count=bucket['total'], **lookup)
+
+
+def purge_rolled_up_events(retention=None):
+    """Delete raw events that are rolled up and older than the retention window"""
+    if retention is None:
+        retention = timedelta(hours=getattr(settings, 'ACTIVITY_RAW_RETENTION_HOURS', 48))
+    deleted, _ = ActivityEvent.objects.filter(
+        rolled_up=True,
+        minute__lt=timezone.now() - retention,
+    ).delete()
+    return deleted
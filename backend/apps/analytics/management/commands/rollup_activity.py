@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.analytics.events import roll_up_events, purge_rolled_up_events
+
+
+class Command(BaseCommand):
+    help = 'Roll raw activity events up into hourly/daily buckets and purge old raw events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--no-purge', action='store_true', help='Keep rolled up raw events')
+
+    def handle(self, *args, **options):
+        processed = roll_up_events(batch_size=options['batch_size'])
+        self.stdout.write(f'Rolled up {processed} events.')
+        
+        if not options['no_purge']:
+            deleted = purge_rolled_up_events()
+            self.stdout.write(f'Purged {deleted} raw events.')
+        
+        self.stdout.write(self.style.SUCCESS('Activity rollup complete!'))
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('albums', '0003_album_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('upload', 'Upload'), ('view', 'View'), ('like', 'Like'), ('download', 'Download'), ('comment', 'Comment')], max_length=20, verbose_name='kind')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10, verbose_name='granularity')),
+                ('bucket_start', models.DateTimeField(verbose_name='bucket start')),
+                ('count', models.PositiveBigIntegerField(default=0, verbose_name='count')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('album', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to='albums.album', verbose_name='album')),
+            ],
+            options={
+                'verbose_name': 'Activity Rollup',
+                'verbose_name_plural': 'Activity Rollups',
+                'db_table': 'activity_rollups',
+                'ordering': ['bucket_start'],
+                'unique_together': {('album', 'kind', 'granularity', 'bucket_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('upload', 'Upload'), ('view', 'View'), ('like', 'Like'), ('download', 'Download'), ('comment', 'Comment')], max_length=20, verbose_name='kind')),
+                ('minute', models.DateTimeField(verbose_name='minute')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='count')),
+                ('rolled_up', models.BooleanField(default=False, verbose_name='rolled up')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('album', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to='albums.album', verbose_name='album')),
+            ],
+            options={
+                'verbose_name': 'Activity Event',
+                'verbose_name_plural': 'Activity Events',
+                'db_table': 'activity_events',
+                'indexes': [models.Index(fields=['rolled_up', 'minute'], name='activity_rollup_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from apps.albums.models import Album
+
+
+class ActivityEvent(models.Model):
+    """
+    Append-only activity log, one row per album, kind and minute
+    """
+    KIND_CHOICES = [
+        ('upload', _('Upload')),
+        ('view', _('View')),
+        ('like', _('Like')),
+        ('download', _('Download')),
+        ('comment', _('Comment')),
+    ]
+
+    album = models.ForeignKey(
+        Album,
+        on_delete=models.CASCADE,
+        related_name='activity_events',
+        verbose_name=_('album')
+    )
+    kind = models.CharField(_('kind'), max_length=20, choices=KIND_CHOICES)
+    minute = models.DateTimeField(_('minute'))
+    count = models.PositiveIntegerField(_('count'), default=1)
+    rolled_up = models.BooleanField(_('rolled up'), default=False)
+
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        db_table = 'activity_events'
+        verbose_name = _('Activity Event')
+        verbose_name_plural = _('Activity Events')
+        indexes = [
+            models.Index(fields=['rolled_up', 'minute'], name='activity_rollup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} x{self.count} on {self.album_id} at {self.minute}"
+
+
+class ActivityRollup(models.Model):
+    """
+    Hourly and daily activity counts per album
+    """
+    GRANULARITY_CHOICES = [
+        ('hour', _('Hour')),
+        ('day', _('Day')),
+    ]
+
+    album = models.ForeignKey(
+        Album,
+        on_delete=models.CASCADE,
+        related_name='activity_rollups',
+        verbose_name=_('album')
+    )
+    kind = models.CharField(_('kind'), max_length=20, choices=ActivityEvent.KIND_CHOICES)
+    granularity = models.CharField(_('granularity'), max_length=10, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField(_('bucket start'))
+    count = models.PositiveBigIntegerField(_('count'), default=0)
+
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        db_table = 'activity_rollups'
+        unique_together = ['album', 'kind', 'granularity', 'bucket_start']
+        verbose_name = _('Activity Rollup')
+        verbose_name_plural = _('Activity Rollups')
+        ordering = ['bucket_start']
+
+    def __str__(self):
+        return f"{self.kind} per {self.granularity} on {self.album_id} at {self.bucket_start}: {self.count}"
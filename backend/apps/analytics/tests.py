@@ -0,0 +1,45 @@
+from datetime import timedelta
+from unittest import mock
+
+from apps.albums.tests import MediaTestCase, make_album, make_user
+from . import events
+from .models import ActivityEvent
+
+
+class ActivityBufferTests(MediaTestCase):
+
+    def setUp(self):
+        self.buffer = events.ActivityBuffer(flush_interval=0)
+        self.album = make_album(make_user('owner@example.com'))
+
+    def test_events_of_deleted_albums_are_dropped(self):
+        deleted = make_album(make_user('other@example.com'), slug='deleted')
+        self.buffer.add(self.album.pk, 'view')
+        self.buffer.add(deleted.pk, 'view')
+        deleted.delete()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(list(ActivityEvent.objects.values_list('album_id', 'count')), [(self.album.pk, 1)])
+
+    def test_current_minute_is_kept(self):
+        self.buffer.add(self.album.pk, 'view')
+        self.buffer.add(self.album.pk, 'view')
+        self.assertEqual(self.buffer.flush(before=events.current_minute()), 0)
+        self.assertEqual(self.buffer.flush(before=events.current_minute() + timedelta(minutes=1)), 1)
+        self.assertEqual(ActivityEvent.objects.get().count, 2)
+
+    def test_counts_are_kept_when_the_database_fails(self):
+        self.buffer.add(self.album.pk, 'like')
+        with mock.patch.object(ActivityEvent.objects, 'bulk_create', side_effect=events.DatabaseError('down')), \
+                mock.patch('builtins.print'):
+            self.assertEqual(self.buffer.flush_quietly(), 0)
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_later_minute_flushes_after_commit(self):
+        self.buffer.add(self.album.pk, 'view')
+        later = events.current_minute() + timedelta(minutes=1)
+        with mock.patch.object(events, 'current_minute', return_value=later):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.buffer.add(self.album.pk, 'view')
+                self.assertFalse(ActivityEvent.objects.exists())
+        self.assertEqual(ActivityEvent.objects.count(), 1)
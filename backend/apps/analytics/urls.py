@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('albums/<uuid:album_id>/timeseries/', views.album_timeseries, name='album_timeseries'),
+    path('cache/', views.cache_stats, name='cache_stats'),
+]
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from rest_framework import status, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.albums.models import Album
+from eventvault.cache import TieredCache, shared_metrics
+from .models import ActivityEvent, ActivityRollup
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def album_timeseries(request, album_id):
+    """Activity counts per hour or day, read from the rollup tables only"""
+    album = get_object_or_404(Album, id=album_id, owner=request.user)
+    
+    kind = request.query_params.get('kind', 'upload')
+    granularity = request.query_params.get('granularity', 'hour')
+    if kind not in dict(ActivityEvent.KIND_CHOICES):
+        return Response({'error': 'Geçersiz etkinlik türü.'}, status=status.HTTP_400_BAD_REQUEST)
+    if granularity not in dict(ActivityRollup.GRANULARITY_CHOICES):
+        return Response({'error': 'Geçersiz zaman aralığı.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    end = parse_datetime(request.query_params.get('end', '')) or timezone.now()
+    default_span = timedelta(days=2) if granularity == 'hour' else timedelta(days=30)
+    start = parse_datetime(request.query_params.get('start', '')) or end - default_span
+    
+    buckets = ActivityRollup.objects.filter(
+        album=album,
+        kind=kind,
+        granularity=granularity,
+        bucket_start__gte=start,
+        bucket_start__lte=end,
+    ).order_by('bucket_start').values_list('bucket_start', 'count')
+    
+    return Response({
+        'kind': kind,
+        'granularity': granularity,
+        'start': start,
+        'end': end,
+        'buckets': [{'bucket_start': bucket_start, 'count': count} for bucket_start, count in buckets],
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    """Hit ratios of the two-tier cache, for this process and flushed by all processes"""
+    return Response({
+        'process': {instance.namespace: instance.stats() for instance in TieredCache.instances},
+        'shared': shared_metrics(),
+    }, status=status.HTTP_200_OK)
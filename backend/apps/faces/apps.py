@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class FacesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.faces'
+    verbose_name = 'Faces'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,118 @@
+"""
+CPU face detection and embedding with OpenCV's YuNet detector and SFace
+recognizer (small ONNX models, no GPU needed).
+
+OpenCV and NumPy are imported lazily so the rest of the site runs without
+them; ``FaceEngineUnavailable`` is raised when they or the models are missing.
+"""
+import os
+import threading
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+EMBEDDING_DTYPE = '<f4'
+ORIENTATION_TAG = 0x0112
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class FaceEngineUnavailable(Exception):
+    pass
+
+
+class FaceEngine:
+    """Detects faces in an image and computes a normalized embedding for each"""
+
+    def __init__(self, detection_model, recognition_model, max_side=1280, min_score=0.8, min_size=40):
+        try:
+            import cv2
+            import numpy as np
+        except ImportError as e:
+            raise FaceEngineUnavailable(f'OpenCV and NumPy are required for face detection: {e}')
+        for path in (detection_model, recognition_model):
+            if not os.path.exists(path):
+                raise FaceEngineUnavailable(f'Face model not found: {path}')
+
+        self.np = np
+        self.max_side = max_side
+        self.min_size = min_size
+        self.detector = cv2.FaceDetectorYN.create(detection_model, '', (320, 320), min_score)
+        self.recognizer = cv2.FaceRecognizerSF.create(recognition_model, '')
+
+    def load_image(self, source):
+        """Read an image file or file object into a downscaled BGR array and its scale"""
+        with Image.open(source) as img:
+            # Full size width as stored boxes use it, before draft() shrinks the decoded size
+            original_width, original_height = img.size
+            if img.getexif().get(ORIENTATION_TAG) in TRANSPOSED_ORIENTATIONS:
+                original_width = original_height
+            # Let the JPEG decoder downscale while decoding, much cheaper than resizing after
+            img.draft('RGB', (self.max_side, self.max_side))
+            img = ImageOps.exif_transpose(img).convert('RGB')
+            img.thumbnail((self.max_side, self.max_side))
+            scale = original_width / img.width
+            pixels = self.np.asarray(img)[:, :, ::-1].copy()
+        return pixels, scale
+
+    def detect(self, source):
+        """Get a list of {'box', 'score', 'embedding'} dicts, box in original pixels"""
+        image, scale = self.load_image(source)
+        height, width = image.shape[:2]
+        self.detector.setInputSize((width, height))
+        _, detections = self.detector.detect(image)
+
+        faces = []
+        for detection in detections if detections is not None else []:
+            x, y, w, h = detection[:4]
+            if min(w, h) * scale < self.min_size:
+                continue
+            aligned = self.recognizer.alignCrop(image, detection)
+            embedding = self.recognizer.feature(aligned).astype(EMBEDDING_DTYPE).ravel()
+            embedding /= self.np.linalg.norm(embedding) or 1
+            faces.append({
+                'box': [max(0, int(round(value * scale))) for value in (x, y, w, h)],
+                'score': float(detection[-1]),
+                'embedding': embedding.tobytes(),
+            })
+        return faces
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def engine_options():
+    return {
+        'detection_model': settings.FACE_DETECTION_MODEL,
+        'recognition_model': settings.FACE_RECOGNITION_MODEL,
+        'max_side': settings.FACE_MAX_IMAGE_SIDE,
+        'min_size': settings.FACE_MIN_SIZE,
+    }
+
+
+def get_engine():
+    """Get the process wide face engine, loading the models on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = FaceEngine(**engine_options())
+    return _engine
+
+
+def init_worker(options):
+    """Process pool initializer, loads the models once per worker"""
+    global _engine
+    _engine = FaceEngine(**options)
+
+
+def detect_upload_faces(task):
+    """Process pool entry point, gets (upload_id, path) and returns (upload_id, faces, error)"""
+    upload_id, path = task
+    try:
+        return upload_id, get_engine().detect(path), ''
+    except FaceEngineUnavailable:
+        raise
+    except Exception as e:
+        return upload_id, [], str(e)[:255]
@@ -0,0 +1,97 @@
+"""
+Per-album nearest neighbour index over face embeddings.
+
+Embeddings are L2 normalized, so cosine similarity against every face in an
+album is a single matrix-vector product; 50k faces x 128 dims is ~25 MB and
+scans in a few milliseconds. Loaded indexes are kept per process and reloaded
+when the album's faces change.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .detection import EMBEDDING_DTYPE
+from .models import Face
+
+
+class AlbumFaceIndex:
+    """Embedding matrix of an album with the upload of each row"""
+
+    def __init__(self, version, upload_ids, rows, matrix):
+        self.version = version
+        self.upload_ids = upload_ids  # Distinct upload ids
+        self.rows = rows  # Position in upload_ids for each matrix row
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, album_id, version):
+        import numpy as np
+
+        upload_ids = []
+        positions = {}
+        rows = []
+        embeddings = []
+        queryset = Face.objects.filter(album_id=album_id).order_by('id').values_list('upload_id', 'embedding')
+        for upload_id, embedding in queryset.iterator(chunk_size=5000):
+            if upload_id not in positions:
+                positions[upload_id] = len(upload_ids)
+                upload_ids.append(upload_id)
+            rows.append(positions[upload_id])
+            embeddings.append(bytes(embedding))
+
+        if embeddings:
+            matrix = np.frombuffer(b''.join(embeddings), dtype=EMBEDDING_DTYPE).reshape(len(embeddings), -1)
+        else:
+            matrix = np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+        return cls(version, upload_ids, np.asarray(rows, dtype=np.int64), matrix)
+
+    def search(self, embedding, threshold, limit=200):
+        """Get [(upload_id, similarity)] for uploads with a face above the threshold, best first"""
+        import numpy as np
+
+        if not len(self.rows):
+            return []
+        query = np.frombuffer(embedding, dtype=EMBEDDING_DTYPE)
+        similarities = self.matrix @ query
+        matches = np.flatnonzero(similarities >= threshold)
+        if not len(matches):
+            return []
+
+        # Best face per upload: sort matches by similarity, keep each upload's first hit
+        matches = matches[np.argsort(-similarities[matches], kind='stable')]
+        upload_rows, first = np.unique(self.rows[matches], return_index=True)
+        order = np.argsort(first)[:limit]
+        return [
+            (self.upload_ids[upload_rows[i]], float(similarities[matches[first[i]]]))
+            for i in order
+        ]
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def index_version(album_id):
+    """Cheap fingerprint of an album's faces, changes when faces are added or removed"""
+    stats = Face.objects.filter(album_id=album_id).aggregate(count=Count('id'), last=Max('id'))
+    return stats['count'], stats['last']
+
+
+def get_album_index(album_id):
+    """Get the album's index, rebuilding it when its faces changed"""
+    version = index_version(album_id)
+    with _lock:
+        index = _indexes.get(album_id)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(album_id)
+            return index
+
+    index = AlbumFaceIndex.build(album_id, version)
+    with _lock:
+        _indexes[album_id] = index
+        _indexes.move_to_end(album_id)
+        while len(_indexes) > settings.FACE_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
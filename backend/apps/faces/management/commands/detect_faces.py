@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.faces.detection import (
+    FaceEngine, FaceEngineUnavailable, detect_upload_faces, engine_options, init_worker
+)
+from apps.faces.models import Face, FaceScan
+from apps.uploads.models import Upload
+
+
+class Command(BaseCommand):
+    help = 'Detect faces in image uploads of albums with face detection enabled'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--album', help='Only scan the album with this id')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--retry-failed', action='store_true', help='Scan uploads that failed before again')
+
+    def handle(self, *args, **options):
+        # Fail early instead of in every worker
+        try:
+            FaceEngine(**engine_options())
+        except FaceEngineUnavailable as e:
+            raise CommandError(str(e))
+
+        # Cold originals are not in media storage, they are scanned once rehydrated
+        uploads = Upload.objects.filter(
+            file_type='image',
+            storage_tier='hot',
+            album__advanced_settings__enable_face_detection=True
+        )
+        if options['album']:
+            uploads = uploads.filter(album_id=options['album'])
+        if options['retry_failed']:
+            FaceScan.objects.filter(upload__in=uploads, status='failed').delete()
+
+        # Scanned uploads get a FaceScan row, so an interrupted run picks up where it stopped
+        pending = uploads.filter(face_scan__isnull=True).order_by('created_at')
+
+        scanned = faces = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            initializer=init_worker,
+            initargs=(engine_options(),)
+        ) as executor:
+            while True:
+                batch = list(pending.values_list('id', 'album_id', 'file')[:options['batch_size']])
+                if not batch:
+                    break
+
+                albums = {upload_id: album_id for upload_id, album_id, _ in batch}
+                tasks = [(upload_id, default_storage.path(name)) for upload_id, _, name in batch]
+                results = list(executor.map(detect_upload_faces, tasks, chunksize=4))
+
+                found, failures = self.save_results(albums, results)
+                scanned += len(results)
+                faces += found
+                failed += failures
+                self.stdout.write(f'Scanned {scanned} uploads, {faces} faces found.')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Face detection complete: {scanned} uploads, {faces} faces, {failed} failed.')
+        )
+
+    def save_results(self, albums, results):
+        new_faces = []
+        scans = []
+        for upload_id, detected, error in results:
+            scans.append(FaceScan(
+                upload_id=upload_id,
+                status='failed' if error else 'done',
+                face_count=len(detected),
+                error=error
+            ))
+            new_faces.extend(
+                Face(
+                    album_id=albums[upload_id],
+                    upload_id=upload_id,
+                    x=face['box'][0],
+                    y=face['box'][1],
+                    width=face['box'][2],
+                    height=face['box'][3],
+                    score=face['score'],
+                    embedding=face['embedding']
+                )
+                for face in detected
+            )
+
+        with transaction.atomic():
+            Face.objects.filter(upload_id__in=albums).delete()
+            Face.objects.bulk_create(new_faces, batch_size=500)
+            FaceScan.objects.bulk_create(scans)
+        return len(new_faces), sum(1 for scan in scans if scan.status == 'failed')
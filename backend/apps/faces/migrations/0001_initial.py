@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('albums', '0003_album_stats'),
+        ('uploads', '0005_gps_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceScan',
+            fields=[
+                ('upload', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='face_scan', serialize=False, to='uploads.upload')),
+                ('status', models.CharField(choices=[('done', 'Done'), ('failed', 'Failed')], max_length=10, verbose_name='status')),
+                ('face_count', models.PositiveIntegerField(default=0, verbose_name='face count')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='error')),
+                ('scanned_at', models.DateTimeField(auto_now=True, verbose_name='scanned at')),
+            ],
+            options={
+                'verbose_name': 'Face Scan',
+                'verbose_name_plural': 'Face Scans',
+                'db_table': 'face_scans',
+            },
+        ),
+        migrations.CreateModel(
+            name='Face',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('x', models.PositiveIntegerField(verbose_name='x')),
+                ('y', models.PositiveIntegerField(verbose_name='y')),
+                ('width', models.PositiveIntegerField(verbose_name='width')),
+                ('height', models.PositiveIntegerField(verbose_name='height')),
+                ('score', models.FloatField(verbose_name='detection score')),
+                ('embedding', models.BinaryField(verbose_name='embedding')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('album', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='faces', to='albums.album', verbose_name='album')),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='faces', to='uploads.upload', verbose_name='upload')),
+            ],
+            options={
+                'verbose_name': 'Face',
+                'verbose_name_plural': 'Faces',
+                'db_table': 'faces',
+                'indexes': [models.Index(fields=['album', 'id'], name='face_album_idx')],
+            },
+        ),
+    ]
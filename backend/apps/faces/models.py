@@ -0,0 +1,72 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from apps.albums.models import Album
+from apps.uploads.models import Upload
+
+
+class Face(models.Model):
+    """
+    A face detected in an image upload, with its embedding packed as float32
+    """
+    album = models.ForeignKey(
+        Album,
+        on_delete=models.CASCADE,
+        related_name='faces',
+        verbose_name=_('album')
+    )
+    upload = models.ForeignKey(
+        Upload,
+        on_delete=models.CASCADE,
+        related_name='faces',
+        verbose_name=_('upload')
+    )
+    
+    # Bounding box in original image pixels
+    x = models.PositiveIntegerField(_('x'))
+    y = models.PositiveIntegerField(_('y'))
+    width = models.PositiveIntegerField(_('width'))
+    height = models.PositiveIntegerField(_('height'))
+    score = models.FloatField(_('detection score'))
+    embedding = models.BinaryField(_('embedding'))
+
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        db_table = 'faces'
+        verbose_name = _('Face')
+        verbose_name_plural = _('Faces')
+        indexes = [
+            models.Index(fields=['album', 'id'], name='face_album_idx'),
+        ]
+
+    def __str__(self):
+        return f"Face in {self.upload_id} ({self.score:.2f})"
+
+
+class FaceScan(models.Model):
+    """
+    Records that an upload went through face detection, so runs can resume
+    """
+    STATUS_CHOICES = [
+        ('done', _('Done')),
+        ('failed', _('Failed')),
+    ]
+
+    upload = models.OneToOneField(
+        Upload,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='face_scan'
+    )
+    status = models.CharField(_('status'), max_length=10, choices=STATUS_CHOICES)
+    face_count = models.PositiveIntegerField(_('face count'), default=0)
+    error = models.CharField(_('error'), max_length=255, blank=True)
+    scanned_at = models.DateTimeField(_('scanned at'), auto_now=True)
+
+    class Meta:
+        db_table = 'face_scans'
+        verbose_name = _('Face Scan')
+        verbose_name_plural = _('Face Scans')
+
+    def __str__(self):
+        return f"Face scan of {self.upload_id}: {self.status}"
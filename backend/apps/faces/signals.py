@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.albums.models import AlbumSettings
+from .models import Face, FaceScan
+
+
+@receiver(post_save, sender=AlbumSettings)
+def drop_faces_when_disabled(sender, instance, **kwargs):
+    """Face embeddings are biometric data, remove them once the owner turns detection off"""
+    if not instance.enable_face_detection:
+        Face.objects.filter(album_id=instance.album_id).delete()
+        FaceScan.objects.filter(upload__album_id=instance.album_id).delete()
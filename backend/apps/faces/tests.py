@@ -0,0 +1,88 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework.throttling import ScopedRateThrottle
+
+from apps.albums.models import AlbumSettings
+from apps.albums.tests import MediaTestCase, make_album, make_user
+from . import views
+from .detection import FaceEngine
+
+
+def jpeg(size, orientation=None):
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (120, 90, 60)).save(buffer, 'JPEG', exif=exif)
+    buffer.seek(0)
+    return buffer
+
+
+class LoadImageTests(SimpleTestCase):
+
+    def setUp(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('NumPy is not installed')
+        # load_image only needs these, the ONNX models are not required
+        self.engine = FaceEngine.__new__(FaceEngine)
+        self.engine.np = numpy
+        self.engine.max_side = 1000
+
+    def test_scale_is_relative_to_the_full_size_jpeg(self):
+        pixels, scale = self.engine.load_image(jpeg((4000, 3000)))
+        self.assertEqual(pixels.shape[1], 1000)
+        self.assertAlmostEqual(scale, 4.0)
+
+    def test_scale_follows_exif_rotation(self):
+        pixels, scale = self.engine.load_image(jpeg((4000, 3000), orientation=6))
+        self.assertEqual(pixels.shape[:2], (1000, 750))
+        self.assertAlmostEqual(scale, 4.0)
+
+
+class FaceSearchTests(MediaTestCase):
+
+    def setUp(self):
+        cache.clear()
+        album = make_album(make_user('owner@example.com'))
+        AlbumSettings.objects.update_or_create(album=album, defaults={'enable_face_detection': True})
+        self.url = f'/api/v1/faces/public/{album.access_code}/search/'
+        self.client = APIClient()
+        patcher = mock.patch.object(views, 'get_engine')
+        self.engine = patcher.start().return_value
+        self.engine.detect.return_value = []
+        self.addCleanup(patcher.stop)
+
+    def search(self, size=(400, 300)):
+        image = SimpleUploadedFile('selfie.jpg', jpeg(size).getvalue(), 'image/jpeg')
+        return self.client.post(self.url, {'image': image}, format='multipart')
+
+    def test_probe_is_decoded(self):
+        response = self.search()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Fotoğrafta yüz bulunamadı.')
+        self.engine.detect.assert_called_once()
+
+    @override_settings(FACE_SEARCH_MAX_IMAGE_MB=0)
+    def test_large_file_is_rejected(self):
+        self.assertEqual(self.search().status_code, 400)
+        self.engine.detect.assert_not_called()
+
+    @override_settings(FACE_SEARCH_MAX_PIXELS=100_000)
+    def test_large_image_is_rejected_before_decoding(self):
+        response = self.search(size=(400, 300))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Fotoğrafın çözünürlüğü çok yüksek.')
+        self.engine.detect.assert_not_called()
+
+    def test_throttled(self):
+        with mock.patch.dict(ScopedRateThrottle.THROTTLE_RATES, {'face_search': '2/minute'}):
+            statuses = [self.search().status_code for _ in range(3)]
+        self.assertEqual(statuses, [400, 400, 429])
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'faces'
+
+urlpatterns = [
+    path('public/<str:access_code>/search/', views.face_search, name='face_search'),
+]
@@ -0,0 +1,71 @@
+from rest_framework import status, permissions
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from PIL import Image
+
+from apps.albums.models import Album
+from apps.uploads.models import Upload
+from apps.uploads.serializers import UploadListSerializer
+from .detection import FaceEngineUnavailable, get_engine
+from .index import get_album_index
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([ScopedRateThrottle])
+def face_search(request, access_code):
+    """Find the album photos a guest appears in from a selfie"""
+    album = get_object_or_404(
+        Album,
+        access_code=access_code,
+        is_active=True,
+        advanced_settings__enable_face_detection=True
+    )
+    
+    selfie = request.FILES.get('image')
+    if not selfie:
+        return Response({'error': 'Bir fotoğraf yüklemelisiniz.'}, status=status.HTTP_400_BAD_REQUEST)
+    if selfie.size > settings.FACE_SEARCH_MAX_IMAGE_MB * 1024 * 1024:
+        return Response(
+            {'error': f'Fotoğraf en fazla {settings.FACE_SEARCH_MAX_IMAGE_MB} MB olabilir.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        # Only the header is read, the pixels are decoded by the engine
+        with Image.open(selfie) as img:
+            width, height = img.size
+        selfie.seek(0)
+    except Exception:
+        return Response({'error': 'Geçersiz görsel dosyası.'}, status=status.HTTP_400_BAD_REQUEST)
+    if width * height > settings.FACE_SEARCH_MAX_PIXELS:
+        return Response({'error': 'Fotoğrafın çözünürlüğü çok yüksek.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        faces = get_engine().detect(selfie)
+    except FaceEngineUnavailable:
+        return Response({'error': 'Yüz arama şu anda kullanılamıyor.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception:
+        return Response({'error': 'Geçersiz görsel dosyası.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not faces:
+        return Response({'error': 'Fotoğrafta yüz bulunamadı.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # The guest's own face is the largest one in a selfie
+    face = max(faces, key=lambda face: face['box'][2] * face['box'][3])
+    matches = get_album_index(album.id).search(face['embedding'], settings.FACE_MATCH_THRESHOLD)
+    
+    similarity = dict(matches)
+    uploads = Upload.objects.filter(id__in=similarity, status='approved')
+    uploads = sorted(uploads, key=lambda upload: -similarity[upload.id])
+    data = UploadListSerializer(uploads, many=True, context={'request': request, 'liked_upload_ids': set()}).data
+    for item, upload in zip(data, uploads):
+        item['similarity'] = round(similarity[upload.id], 4)
+    
+    return Response({'count': len(data), 'results': data}, status=status.HTTP_200_OK)
+
+
+# Function views cannot declare a throttle_scope, set it on the generated view class
+face_search.cls.throttle_scope = 'face_search'
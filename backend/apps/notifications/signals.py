@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from eventvault.cache import invalidate_tags
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_list(sender, instance, **kwargs):
+    invalidate_tags(f'notifications:{instance.recipient_id}')
@@ -6,6 +6,9 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 
+from eventvault.cache import invalidate_tags
+from eventvault.conditional import ConditionalGetMixin
+from eventvault.fieldsets import SparseFieldsetMixin
 from .models import NotificationTemplate, Notification, EmailNotification
 from .serializers import (
     NotificationTemplateSerializer,
@@ -33,16 +36,24 @@ class NotificationTemplateDetailView(generics.RetrieveUpdateDestroyAPIView):
         return NotificationTemplate.objects.all()
 
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(ConditionalGetMixin, SparseFieldsetMixin, generics.ListAPIView):
     """List user's notifications"""
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Short keys for ?compact=1, see eventvault.renderers
+    compact_keys = {
+        'recipient': 'rc', 'recipient_name': 'rn', 'notification_type': 't', 'title': 'ti',
+        'message': 'm', 'is_read': 'rd', 'album': 'a', 'upload': 'u', 'created_at': 'ca',
+    }
 
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
 
+    def get_etag_tags(self):
+        return [f'notifications:{self.request.user.pk}']
+
 
-class NotificationDetailView(generics.RetrieveUpdateAPIView):
+class NotificationDetailView(SparseFieldsetMixin, generics.RetrieveUpdateAPIView):
     """View and mark notification as read"""
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -64,6 +75,7 @@ def mark_all_notifications_read(request):
     """Mark all user notifications as read"""
     user = request.user
     Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+    invalidate_tags(f'notifications:{user.pk}')  # update() skips the signals
     return Response({'message': 'Tüm bildirimler okundu olarak işaretlendi.'}, status=status.HTTP_200_OK)
 
 
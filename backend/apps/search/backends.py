@@ -0,0 +1,184 @@
+"""
+Database specific full-text index backends.
+
+* SQLite: an FTS5 virtual table whose rowid is ``SearchDocument.id``, ranked
+  with bm25.
+* PostgreSQL: a ``tsvector`` column on ``search_documents`` with a GIN index,
+  ranked with ts_rank.
+* Anything else: a token scan over the normalized ``body`` column.
+
+Text is already normalized by ``normalizer`` before it reaches a backend, so
+the backends use plain (``unicode61`` / ``simple``) tokenization.
+"""
+from django.db import connection as default_connection
+
+FTS_TABLE = 'search_fts'
+
+SQLITE_FTS_SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(scope, body, tokenize='unicode61', prefix='2 3 4')"
+)
+
+
+class BaseSearchBackend:
+    # Whether match scores say anything about relevance
+    ranked = True
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create_schema(self):
+        pass
+
+    def drop_schema(self):
+        pass
+
+    def index(self, documents):
+        """Write (id, scope, body) tuples to the index"""
+
+    def remove(self, document_ids):
+        """Remove documents from the index"""
+
+    def match_sql(self, doc_type, tokens, scope=None, object_id_sql=None):
+        """Get (sql, params) selecting ``object_id, score`` of every match.
+
+        With ``object_id_sql`` it selects the ``score`` of that one document
+        instead, for use as a correlated subquery; its params go after the
+        returned ones.
+        """
+        raise NotImplementedError
+
+    def search(self, doc_type, tokens, scope=None, limit=1000):
+        """Get [(object_id, score)] ordered best first"""
+        sql, params = self.match_sql(doc_type, tokens, scope)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"{sql} ORDER BY score DESC LIMIT %s", params + [limit])
+            return cursor.fetchall()
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    def create_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(SQLITE_FTS_SCHEMA)
+
+    def drop_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+    def index(self, documents):
+        documents = list(documents)
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(document_id,) for document_id, scope, body in documents]
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, scope, body) VALUES (%s, %s, %s)",
+                documents
+            )
+
+    def remove(self, document_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(document_id,) for document_id in document_ids]
+            )
+
+    @staticmethod
+    def build_match(tokens, scope=None):
+        """Build an FTS5 query, the last token is matched as a prefix"""
+        terms = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+        match = f"body:({' '.join(terms)})"
+        if scope:
+            match = f'scope:"{scope}" AND {match}'
+        return match
+
+    def match_sql(self, doc_type, tokens, scope=None, object_id_sql=None):
+        # CROSS JOIN keeps SQLite from running the full-text query once per document
+        sql = (
+            f"SELECT d.object_id, -bm25({FTS_TABLE}) AS score "
+            f"FROM {FTS_TABLE} CROSS JOIN search_documents d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.doc_type = %s"
+        )
+        params = [self.build_match(tokens, scope), doc_type]
+        if object_id_sql:
+            # FTS5 reads the whole match for every row it is asked about, so rows
+            # are ranked by their place in the ids best first, a list SQLite
+            # builds once per statement
+            ranked = f"SELECT ',' || group_concat(object_id, ',') || ',' FROM ({sql} ORDER BY score DESC)"
+            sql = f"SELECT -instr(({ranked}), ',' || {object_id_sql} || ',') AS score"
+        return sql, params
+class PostgresBackend(BaseSearchBackend):
+    def create_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE search_documents ADD COLUMN IF NOT EXISTS search_vector tsvector")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS search_doc_vector_idx "
+                "ON search_documents USING GIN (search_vector)"
+            )
+
+    def drop_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DROP INDEX IF EXISTS search_doc_vector_idx")
+            cursor.execute("ALTER TABLE search_documents DROP COLUMN IF EXISTS search_vector")
+
+    def index(self, documents):
+        document_ids = [document_id for document_id, scope, body in documents]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE search_documents SET search_vector = to_tsvector('simple', body) "
+                "WHERE id = ANY(%s)",
+                [document_ids]
+            )
+
+    @staticmethod
+    def build_tsquery(tokens):
+        """Build a tsquery, the last token is matched as a prefix"""
+        return ' & '.join(tokens[:-1] + [f'{tokens[-1]}:*'])
+
+    def match_sql(self, doc_type, tokens, scope=None, object_id_sql=None):
+        params = [self.build_tsquery(tokens), doc_type]
+        scope_sql = ''
+        if scope:
+            scope_sql = 'AND scope = %s '
+            params.append(scope)
+        object_sql = f" AND object_id = {object_id_sql}" if object_id_sql else ''
+        return (
+            "SELECT object_id, ts_rank(search_vector, query) AS score "
+            "FROM search_documents, to_tsquery('simple', %s) query "
+            f"WHERE doc_type = %s {scope_sql}AND search_vector @@ query{object_sql}",
+            params
+        )
+
+
+class ScanBackend(BaseSearchBackend):
+    """Fallback for databases without a full-text index"""
+    ranked = False
+
+    def match_sql(self, doc_type, tokens, scope=None, object_id_sql=None):
+        from django.db.models import FloatField, Value
+        from .models import SearchDocument
+
+        documents = SearchDocument.objects.filter(doc_type=doc_type)
+        if scope:
+            documents = documents.filter(scope=scope)
+        for token in tokens:
+            documents = documents.filter(body__contains=token)
+        sql, params = (
+            documents.annotate(score=Value(1.0, output_field=FloatField()))
+            .values('object_id', 'score').order_by().query.sql_with_params()
+        )
+        if object_id_sql:
+            sql = f"SELECT * FROM ({sql}) matches WHERE matches.object_id = {object_id_sql}"
+        return sql, list(params)
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    return BACKENDS.get(connection.vendor, ScanBackend)(connection)
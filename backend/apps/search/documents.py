@@ -0,0 +1,92 @@
+"""
+Indexed document types and index maintenance.
+"""
+from django.apps import apps
+from django.db import transaction
+
+from .backends import get_backend
+from .models import SearchDocument
+from .normalizer import normalize
+
+# doc_type: (model label, text fields, scope field)
+SEARCH_DOCUMENTS = {
+    'upload': ('uploads.Upload', ['original_filename', 'caption', 'message', 'uploader_name'], 'album_id'),
+    'album': ('albums.Album', ['title', 'description', 'event_location'], 'owner_id'),
+}
+
+
+def get_model(doc_type):
+    return apps.get_model(SEARCH_DOCUMENTS[doc_type][0])
+
+
+def doc_type_for_model(model):
+    for doc_type, (label, fields, scope_field) in SEARCH_DOCUMENTS.items():
+        if model._meta.label_lower == label.lower():
+            return doc_type
+    return None
+
+
+def format_scope(value):
+    """Scopes are stored as single tokens (UUIDs without dashes)"""
+    return str(value).replace('-', '') if value is not None else ''
+
+
+def index_objects(doc_type, objects):
+    """Add or refresh objects in the index, skipping unchanged text"""
+    label, fields, scope_field = SEARCH_DOCUMENTS[doc_type]
+    wanted = {
+        str(obj.pk): (
+            format_scope(getattr(obj, scope_field)),
+            normalize(' '.join(str(getattr(obj, field) or '') for field in fields)),
+        )
+        for obj in objects
+    }
+    if not wanted:
+        return 0
+
+    with transaction.atomic():
+        existing = {
+            document.object_id: document
+            for document in SearchDocument.objects.filter(doc_type=doc_type, object_id__in=wanted.keys())
+        }
+        changed, created = [], []
+        for object_id, (scope, body) in wanted.items():
+            document = existing.get(object_id)
+            if document is None:
+                created.append(SearchDocument(doc_type=doc_type, object_id=object_id, scope=scope, body=body))
+            elif (document.scope, document.body) != (scope, body):
+                document.scope, document.body = scope, body
+                changed.append(document)
+
+        if changed:
+            SearchDocument.objects.bulk_update(changed, ['scope', 'body'])
+        if created:
+            created = SearchDocument.objects.bulk_create(created)
+            if any(document.pk is None for document in created):
+                # Backends that cannot return ids from bulk inserts
+                ids = dict(
+                    SearchDocument.objects.filter(doc_type=doc_type, object_id__in=[d.object_id for d in created])
+                    .values_list('object_id', 'id')
+                )
+                for document in created:
+                    document.pk = ids[document.object_id]
+
+        documents = changed + created
+        get_backend().index([(document.pk, document.scope, document.body) for document in documents])
+    return len(documents)
+
+
+def unindex_objects(doc_type, object_ids):
+    """Remove objects from the index"""
+    object_ids = [str(object_id) for object_id in object_ids]
+    with transaction.atomic():
+        documents = SearchDocument.objects.filter(doc_type=doc_type, object_id__in=object_ids)
+        get_backend().remove(list(documents.values_list('id', flat=True)))
+        documents.delete()
+
+
+def search(doc_type, tokens, scope=None, limit=1000):
+    """Search the index, returns [(object_id, score)] best first"""
+    if not tokens:
+        return []
+    return get_backend().search(doc_type, tokens, scope=format_scope(scope) if scope else None, limit=limit)
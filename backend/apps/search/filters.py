@@ -0,0 +1,94 @@
+from django.db.models import CharField, Expression, F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Concat, Substr
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .backends import get_backend
+from .documents import doc_type_for_model, format_scope
+from .normalizer import tokenize
+
+# str(uuid) groups of a UUID stored as 32 hex digits
+UUID_GROUPS = ((1, 8), (9, 4), (13, 4), (17, 4), (21, 12))
+
+
+class ObjectId(Expression):
+    """A row's pk the way ``SearchDocument.object_id`` stores it, ``str(pk)``"""
+    output_field = CharField()
+
+    def __init__(self, expression):
+        super().__init__()
+        self.expression = expression
+
+    def get_source_expressions(self):
+        return [self.expression]
+
+    def set_source_expressions(self, exprs):
+        self.expression, = exprs
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        clone = self.copy()
+        clone.expression = self.expression.resolve_expression(query, allow_joins, reuse, summarize, for_save)
+        return clone
+
+    def as_sql(self, compiler, connection):
+        expression = self.expression
+        if (expression.output_field.get_internal_type() == 'UUIDField'
+                and not connection.features.has_native_uuid_field):
+            parts = []
+            for start, length in UUID_GROUPS:
+                parts += [Value('-'), Substr(expression, start, length)]
+            text = Concat(*parts[1:], output_field=CharField())
+        else:
+            text = Cast(expression, CharField())
+        return compiler.compile(text.resolve_expression(compiler.query))
+
+
+class SearchScore(ObjectId):
+    """Relevance of a row from a correlated index lookup, NULL when it does not match"""
+    output_field = FloatField()
+
+    def __init__(self, expression, doc_type, tokens, scope):
+        super().__init__(expression)
+        self.match = (doc_type, tokens, scope)
+
+    def as_sql(self, compiler, connection):
+        object_id_sql, object_id_params = super().as_sql(compiler, connection)
+        sql, params = get_backend(connection).match_sql(*self.match, object_id_sql=object_id_sql)
+        return f"(SELECT matches.score FROM ({sql}) matches)", params + list(object_id_params)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for DRF's SearchFilter backed by the search index.
+
+    Views can narrow the index lookup with ``get_search_scope()`` (e.g. the
+    album id). Matches are filtered with a subquery on the index, so every
+    one of them is kept, and ordered by relevance in SQL unless
+    ``?ordering=`` is given, so list this backend after OrderingFilter.
+    """
+    search_param = api_settings.SEARCH_PARAM
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def get_search_terms(self, request):
+        return tokenize(request.query_params.get(self.search_param, ''))
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = self.get_search_terms(request)
+        doc_type = doc_type_for_model(queryset.model)
+        if not tokens or not doc_type:
+            return queryset
+
+        scope = view.get_search_scope() if hasattr(view, 'get_search_scope') else None
+        scope = format_scope(scope) if scope else None
+        backend = get_backend()
+        sql, params = backend.match_sql(doc_type, tokens, scope)
+        queryset = queryset.alias(search_object_id=ObjectId(F('pk'))).filter(
+            search_object_id__in=RawSQL(f"SELECT matches.object_id FROM ({sql}) matches", params)
+        )
+        if backend.ranked and self.ordering_param not in request.query_params:
+            # Only rows that passed the filter above are scored
+            queryset = queryset.alias(
+                search_score=SearchScore(F('pk'), doc_type, tokens, scope)
+            ).order_by(F('search_score').desc(), 'pk')
+        return queryset
@@ -0,0 +1,89 @@
+import random
+import sqlite3
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from apps.search.backends import FTS_TABLE, SQLITE_FTS_SCHEMA, SQLiteFTSBackend
+from apps.search.normalizer import normalize, tokenize
+
+WORDS = [
+    'Düğün', 'İstanbul', 'nişan', 'gelin', 'damat', 'pasta', 'dans', 'çiçek', 'ışık',
+    'Ayşe', 'Ahmet', 'Mehmet', 'Şule', 'Görkem', 'Çağla', 'Ilgaz', 'deniz', 'sahil',
+    'mezuniyet', 'kep', 'aile', 'arkadaşlar', 'gülümse', 'kutlama', 'konser', 'gece',
+]
+QUERIES = ['istanbul', 'DÜĞÜN', 'dugun pas', 'ayse', 'ILGAZ', 'şu', 'cicek gel', 'mezun', 'img 4242']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the SQLite FTS5 index against a LIKE scan on synthetic uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--albums', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--scan-repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        random.seed(42)
+        albums = [uuid.uuid4().hex for _ in range(options['albums'])]
+        
+        # Scratch in-memory database with the same schema as the real index
+        db = sqlite3.connect(':memory:')
+        db.execute('CREATE TABLE search_documents (id INTEGER PRIMARY KEY, doc_type TEXT, object_id TEXT, scope TEXT, body TEXT)')
+        db.execute(SQLITE_FTS_SCHEMA)
+        
+        self.stdout.write(f'Indexing {rows} synthetic uploads...')
+        started = time.perf_counter()
+        batch = []
+        for row_id in range(1, rows + 1):
+            text = f"IMG_{row_id}.jpg {' '.join(random.choices(WORDS, k=8))}"
+            batch.append((row_id, 'upload', uuid.uuid4().hex, random.choice(albums), normalize(text)))
+            if len(batch) == 10000 or row_id == rows:
+                db.executemany('INSERT INTO search_documents VALUES (?, ?, ?, ?, ?)', batch)
+                db.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, scope, body) VALUES (?, ?, ?)',
+                    [(row[0], row[3], row[4]) for row in batch]
+                )
+                batch = []
+        db.commit()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Indexed in {elapsed:.1f}s ({rows / elapsed:,.0f} docs/s)')
+        
+        fts_sql = (
+            f"SELECT d.object_id, -bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+            f"JOIN search_documents d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH ? AND d.doc_type = 'upload' ORDER BY score DESC LIMIT 50"
+        )
+        # What a paginated icontains search pays: a full scan to count matches
+        scan_sql = "SELECT COUNT(*) FROM search_documents WHERE body LIKE ? AND doc_type = 'upload'"
+        
+        self.stdout.write(f"{'query':<12} {'fts p50':>10} {'fts p95':>10} {'album p50':>10} {'LIKE p50':>10}")
+        for query in QUERIES:
+            tokens = tokenize(query)
+            scope = random.choice(albums)
+            fts = self.time_query(db, fts_sql, [SQLiteFTSBackend.build_match(tokens)], options['repeat'])
+            scoped = self.time_query(db, fts_sql, [SQLiteFTSBackend.build_match(tokens, scope)], options['repeat'])
+            scan = self.time_query(db, scan_sql, [f"%{' '.join(tokens)}%"], options['scan_repeat'])
+            self.stdout.write(
+                f'{query:<12} {self.ms(fts, 50):>10} {self.ms(fts, 95):>10} '
+                f'{self.ms(scoped, 50):>10} {self.ms(scan, 50):>10}'
+            )
+        
+        self.stdout.write(self.style.SUCCESS('Benchmark complete!'))
+
+    def time_query(self, db, sql, params, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            db.execute(sql, params).fetchall()
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def ms(self, timings, percentile):
+        if len(timings) == 1:
+            return f'{timings[0] * 1000:.2f}ms'
+        value = statistics.quantiles(timings, n=100)[percentile - 1]
+        return f'{value * 1000:.2f}ms'
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from apps.search.backends import get_backend
+from apps.search.documents import SEARCH_DOCUMENTS, get_model, index_objects
+from apps.search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        backend = get_backend()
+        
+        # Start from an empty index
+        backend.drop_schema()
+        SearchDocument.objects.all().delete()
+        backend.create_schema()
+        
+        for doc_type in SEARCH_DOCUMENTS:
+            batch = []
+            count = 0
+            for obj in get_model(doc_type).objects.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    count += index_objects(doc_type, batch)
+                    batch = []
+            if batch:
+                count += index_objects(doc_type, batch)
+            self.stdout.write(f'Indexed {count} {doc_type} documents.')
+        
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt!'))
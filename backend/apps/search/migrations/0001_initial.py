@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+def create_index_schema(apps, schema_editor):
+    from apps.search.backends import get_backend
+    get_backend(schema_editor.connection).create_schema()
+
+
+def drop_index_schema(apps, schema_editor):
+    from apps.search.backends import get_backend
+    get_backend(schema_editor.connection).drop_schema()
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(max_length=50, verbose_name='document type')),
+                ('object_id', models.CharField(max_length=64, verbose_name='object id')),
+                ('scope', models.CharField(blank=True, max_length=64, verbose_name='scope')),
+                ('body', models.TextField(blank=True, verbose_name='body')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'db_table': 'search_documents',
+                'indexes': [models.Index(fields=['doc_type', 'scope'], name='search_doc_scope_idx')],
+                'unique_together': {('doc_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_index_schema, drop_index_schema),
+    ]
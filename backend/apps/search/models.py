@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """
+    Normalized searchable text for an indexed object.
+
+    The full-text index itself lives next to this table and depends on the
+    database: an FTS5 virtual table keyed by this row's id on SQLite, or a
+    ``tsvector`` column with a GIN index on PostgreSQL (see ``backends``).
+    """
+    doc_type = models.CharField(_('document type'), max_length=50)
+    object_id = models.CharField(_('object id'), max_length=64)
+    scope = models.CharField(_('scope'), max_length=64, blank=True)
+    body = models.TextField(_('body'), blank=True)
+
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        db_table = 'search_documents'
+        unique_together = ['doc_type', 'object_id']
+        verbose_name = _('Search Document')
+        verbose_name_plural = _('Search Documents')
+        indexes = [
+            models.Index(fields=['doc_type', 'scope'], name='search_doc_scope_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.doc_type}:{self.object_id}"
@@ -0,0 +1,36 @@
+"""
+Turkish-aware text normalization for the search index.
+
+Python's ``str.lower()`` maps ``I`` to ``i`` and ``İ`` to ``i̇`` (with a
+combining dot), which breaks matching for Turkish text. We apply the Turkish
+case rules first and then fold Turkish letters to ASCII so queries typed
+without a Turkish keyboard still match (``istanbul`` finds ``İSTANBUL``).
+"""
+import re
+import unicodedata
+
+TURKISH_CASE_MAP = str.maketrans({'I': 'ı', 'İ': 'i'})
+TURKISH_FOLD_MAP = str.maketrans({
+    'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u',
+    'â': 'a', 'î': 'i', 'û': 'u',
+})
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """Normalize text to space separated, case and accent folded tokens"""
+    return ' '.join(tokenize(text))
+
+
+def tokenize(text):
+    """Split text into normalized tokens"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFC', str(text))
+    text = text.translate(TURKISH_CASE_MAP).lower().translate(TURKISH_FOLD_MAP)
+    # Drop any remaining accents (é -> e)
+    text = ''.join(
+        char for char in unicodedata.normalize('NFKD', text)
+        if not unicodedata.combining(char)
+    )
+    return TOKEN_RE.findall(text)
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+
+from .documents import SEARCH_DOCUMENTS, get_model, index_objects, unindex_objects
+
+
+def connect_search_signals():
+    """Keep the search index in sync when indexed models change"""
+    for doc_type in SEARCH_DOCUMENTS:
+        model = get_model(doc_type)
+
+        def update_index(sender, instance, doc_type=doc_type, **kwargs):
+            index_objects(doc_type, [instance])
+
+        def remove_from_index(sender, instance, doc_type=doc_type, **kwargs):
+            unindex_objects(doc_type, [instance.pk])
+
+        post_save.connect(update_index, sender=model, weak=False, dispatch_uid=f'search_index_{doc_type}')
+        post_delete.connect(remove_from_index, sender=model, weak=False, dispatch_uid=f'search_unindex_{doc_type}')
+
+
+connect_search_signals()
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from apps.albums.tests import MediaTestCase, make_album, make_user
+from apps.uploads.models import Upload
+from .documents import index_objects
+
+
+class FullTextSearchFilterTests(MediaTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = make_user('owner@example.com')
+        self.album = make_album(self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/v1/uploads/album/{self.album.pk}/'
+
+    def make_uploads(self, captions):
+        # Without files or signals, so a large result set stays cheap
+        uploads = Upload.objects.bulk_create([
+            Upload(album=self.album, original_filename=f'{i}.jpg', file_type='image', caption=caption)
+            for i, caption in enumerate(captions)
+        ])
+        index_objects('upload', uploads)
+        return uploads
+
+    def test_every_match_is_kept(self):
+        self.make_uploads(['beach'] * 1005 + ['mountain'] * 5)
+        data = self.client.get(self.url, {'search': 'beach'}).json()
+        self.assertEqual(data['count'], 1005)
+
+    def test_ordered_by_relevance(self):
+        weak, strong = self.make_uploads([
+            'beach party with friends and family and dinner at the hotel', 'beach beach',
+        ])
+        results = self.client.get(self.url, {'search': 'beach'}).json()['results']
+        self.assertEqual([result['id'] for result in results], [str(strong.pk), str(weak.pk)])
+
+    def test_explicit_ordering_wins(self):
+        uploads = self.make_uploads(['beach beach', 'beach party with friends and family'])
+        results = self.client.get(self.url, {'search': 'beach', 'ordering': 'created_at'}).json()['results']
+        self.assertEqual({result['id'] for result in results}, {str(upload.pk) for upload in uploads})
+
+    def test_scoped_to_the_album(self):
+        self.make_uploads(['beach'])
+        other = make_album(self.owner, slug='other')
+        Upload.objects.bulk_create([Upload(album=other, original_filename='x.jpg', caption='beach')])
+        index_objects('upload', Upload.objects.filter(album=other))
+        self.assertEqual(self.client.get(self.url, {'search': 'beach'}).json()['count'], 1)
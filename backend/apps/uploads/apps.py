@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class UploadsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.uploads'
-    verbose_name = 'Uploads' 
\ No newline at end of file
+    verbose_name = 'Uploads'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,171 @@
+"""
+Audio duration and waveform peaks.
+
+Audio is decoded in chunks, never loaded whole: WAV through the stdlib
+``wave`` module, everything else through an ffmpeg pipe as 16-bit mono PCM.
+Each chunk is reduced to min/max pairs at a fixed block rate, and the blocks
+are merged down to ``WAVEFORM_PEAKS`` pairs at the end, stored as packed int8
+(2 bytes per pair).
+"""
+import subprocess
+import tempfile
+import threading
+import wave
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+WAVEFORM_PEAKS = 1000
+BLOCKS_PER_SECOND = 50
+FFMPEG_SAMPLE_RATE = 8000
+CHUNK_SECONDS = 10
+
+_SAMPLE_DTYPES = {1: 'u1', 2: '<i2', 4: '<i4'}
+
+
+class AudioAnalysisError(Exception):
+    pass
+
+
+class PeakAccumulator:
+    """Reduces streamed mono samples (floats in -1..1) to block min/max pairs"""
+
+    def __init__(self, sample_rate):
+        self.block_size = max(1, sample_rate // BLOCKS_PER_SECOND)
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.remainder = np.empty(0, dtype=np.float32)
+        self.minimums = []
+        self.maximums = []
+
+    def add(self, samples):
+        self.samples += len(samples)
+        samples = np.concatenate([self.remainder, samples])
+        usable = len(samples) - len(samples) % self.block_size
+        blocks = samples[:usable].reshape(-1, self.block_size)
+        if len(blocks):
+            self.minimums.append(blocks.min(axis=1))
+            self.maximums.append(blocks.max(axis=1))
+        self.remainder = samples[usable:]
+
+    @property
+    def duration(self):
+        return self.samples / self.sample_rate
+
+    def peaks(self, count=WAVEFORM_PEAKS):
+        """Merge the blocks into at most ``count`` min/max pairs, packed as int8"""
+        if len(self.remainder):
+            self.minimums.append(self.remainder[None, :].min(axis=1))
+            self.maximums.append(self.remainder[None, :].max(axis=1))
+            self.remainder = self.remainder[:0]
+        if not self.minimums:
+            return b''
+        minimums = np.concatenate(self.minimums)
+        maximums = np.concatenate(self.maximums)
+
+        # Split the blocks into `count` near equal groups
+        edges = np.linspace(0, len(minimums), min(count, len(minimums)) + 1).astype(np.int64)
+        pairs = np.empty((len(edges) - 1, 2), dtype=np.float32)
+        pairs[:, 0] = np.minimum.reduceat(minimums, edges[:-1])
+        pairs[:, 1] = np.maximum.reduceat(maximums, edges[:-1])
+        return np.clip(np.round(pairs * 127), -127, 127).astype(np.int8).tobytes()
+
+
+def analyze_wav(path):
+    try:
+        with wave.open(path, 'rb') as wav:
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            sample_rate = wav.getframerate()
+            if sample_width not in _SAMPLE_DTYPES:
+                raise AudioAnalysisError(f'Unsupported WAV sample width: {sample_width}')
+
+            accumulator = PeakAccumulator(sample_rate)
+            chunk_frames = sample_rate * CHUNK_SECONDS
+            scale = float(2 ** (8 * sample_width - 1))
+            while True:
+                frames = wav.readframes(chunk_frames)
+                if not frames:
+                    break
+                samples = np.frombuffer(frames, dtype=_SAMPLE_DTYPES[sample_width]).astype(np.float32)
+                if sample_width == 1:
+                    samples -= 128  # 8-bit WAV is unsigned
+                samples = samples.reshape(-1, channels).mean(axis=1) / scale
+                accumulator.add(samples)
+    except (wave.Error, EOFError) as e:
+        raise AudioAnalysisError(str(e))
+    return accumulator
+
+
+def analyze_ffmpeg(path):
+    command = [
+        getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'), '-v', 'error', '-nostdin',
+        '-i', path, '-vn', '-ac', '1', '-ar', str(FFMPEG_SAMPLE_RATE), '-f', 's16le', '-',
+    ]
+    timeout = getattr(settings, 'AUDIO_ANALYSIS_TIMEOUT', 300)
+    # stderr goes to a file: an undrained pipe fills up and stalls ffmpeg
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        except FileNotFoundError:
+            raise AudioAnalysisError('ffmpeg is not installed')
+
+        # The deadline covers the read loop too, a stalled decoder blocks it
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            process.kill()
+
+        watchdog = threading.Timer(timeout, expire)
+        watchdog.start()
+        accumulator = PeakAccumulator(FFMPEG_SAMPLE_RATE)
+        chunk_bytes = FFMPEG_SAMPLE_RATE * CHUNK_SECONDS * 2
+        leftover = b''
+        try:
+            while True:
+                data = process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                data = leftover + data
+                usable = len(data) - len(data) % 2
+                leftover = data[usable:]
+                accumulator.add(np.frombuffer(data[:usable], dtype='<i2').astype(np.float32) / 32768)
+            process.wait()
+        finally:
+            watchdog.cancel()
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if process.returncode != 0:
+            if timed_out.is_set():
+                raise AudioAnalysisError('ffmpeg timed out')
+            stderr.seek(0)
+            errors = stderr.read(1000).decode('utf-8', errors='ignore').strip()
+            raise AudioAnalysisError(errors[:200] or 'ffmpeg failed')
+    return accumulator
+
+
+def analyze(path):
+    """Get {'duration', 'waveform'} for an audio file"""
+    if np is None:
+        raise AudioAnalysisError('NumPy is required for audio analysis')
+
+    if path.lower().endswith('.wav'):
+        try:
+            accumulator = analyze_wav(path)
+        except AudioAnalysisError:
+            # Compressed or float WAV variants the wave module cannot read
+            accumulator = analyze_ffmpeg(path)
+    else:
+        accumulator = analyze_ffmpeg(path)
+    return {
+        'duration': round(accumulator.duration, 3),
+        'waveform': accumulator.peaks(),
+    }
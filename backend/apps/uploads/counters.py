@@ -0,0 +1,237 @@
+"""
+Write-behind counters for hot stat columns (views, likes, downloads).
+
+Increments are collected in a buffer (process-local or shared in Redis) and
+flushed to the database in batches with ``F()`` expressions, so popular rows
+are not locked and re-saved on every request. A flush runs when an increment
+finds the buffer full or the interval passed, and from a background timer so
+a process that goes quiet does not hold its counts.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.dispatch import Signal
+from django.utils.functional import SimpleLazyObject
+
+# Sent after a flush with ``sender`` = model and ``deltas`` = {pk: {field: amount}}
+counters_flushed = Signal()
+
+
+def _make_key(model, pk, field):
+    return f"{model._meta.label_lower}:{pk}:{field}"
+
+
+def _split_key(key):
+    label, pk, field = key.rsplit(':', 2)
+    return apps.get_model(label), pk, field
+
+
+class LocalCounterBuffer:
+    """Process-local buffer of pending increments"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+
+    def add(self, key, amount):
+        with self._lock:
+            self._pending[key] += amount
+            return len(self._pending)
+
+    def get_many(self, keys):
+        with self._lock:
+            return {key: self._pending[key] for key in keys if key in self._pending}
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = dict(self._pending), defaultdict(int)
+        return pending
+
+
+class RedisCounterBuffer:
+    """Buffer shared by all processes, stored in a Redis hash"""
+    HASH_KEY = 'eventvault:counters'
+    # Hashes renamed aside by older versions to be drained
+    DRAINING_PATTERN = f'{HASH_KEY}:draining:*'
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._recovered = False
+
+    def add(self, key, amount):
+        pipe = self._client.pipeline()
+        pipe.hincrby(self.HASH_KEY, key, amount)
+        pipe.hlen(self.HASH_KEY)
+        return pipe.execute()[1]
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.hmget(self.HASH_KEY, keys)
+        return {key: int(value) for key, value in zip(keys, values) if value is not None}
+
+    def _take(self, key):
+        """Read and delete a hash in one MULTI/EXEC, increments land before or after it"""
+        pipe = self._client.pipeline(transaction=True)
+        pipe.hgetall(key)
+        pipe.delete(key)
+        return pipe.execute()[0]
+
+    def drain(self):
+        keys = [self.HASH_KEY]
+        if not self._recovered:
+            # Left behind by a process that died in the middle of a drain
+            keys.extend(self._client.scan_iter(match=self.DRAINING_PATTERN))
+            self._recovered = True
+        pending = defaultdict(int)
+        for key in keys:
+            for field, value in self._take(key).items():
+                pending[field] += int(value)
+        return dict(pending)
+
+
+class CounterService:
+    """Collects counter increments and flushes them in batches"""
+
+    def __init__(self, buffer, flush_interval=5, flush_threshold=1000, batch_size=500):
+        self.buffer = buffer
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.batch_size = batch_size
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._timer = None
+
+    def incr(self, instance, field, amount=1):
+        """Buffer an increment of ``field`` on ``instance``"""
+        pending_keys = self.buffer.add(_make_key(type(instance), instance.pk, field), amount)
+        if self._timer is None and self.flush_interval:
+            self._start_timer()
+        if (pending_keys >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def _start_timer(self):
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(target=self._flush_periodically, name='counter-flush', daemon=True)
+        self._timer.start()
+
+    def _flush_periodically(self):
+        """Flush counts of a process that gets no further increments"""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush_quietly()
+            finally:
+                connection.close()
+
+    def pending(self, instances, fields):
+        """Get pending deltas as {(pk, field): delta} for the given instances"""
+        keys = {
+            _make_key(type(instance), instance.pk, field): (instance.pk, field)
+            for instance in instances for field in fields
+        }
+        found = self.buffer.get_many(keys)
+        return {keys[key]: delta for key, delta in found.items()}
+
+    def merge_pending(self, instances, fields):
+        """Add pending deltas to in-memory instances so reads stay fresh.
+
+        Only use this on read paths; saving a merged instance would write the
+        delta twice.
+        """
+        by_pk = {instance.pk: instance for instance in instances if instance is not None}
+        for (pk, field), delta in self.pending(by_pk.values(), fields).items():
+            instance = by_pk[pk]
+            setattr(instance, field, max(0, getattr(instance, field) + delta))
+        return list(by_pk.values())
+
+    def flush(self):
+        """Write all buffered increments to the database, returns rows updated"""
+        if not self._flush_lock.acquire(blocking=False):
+            return 0  # Another thread is already flushing
+        try:
+            self._last_flush = time.monotonic()
+            pending = self.buffer.drain()
+            if not pending:
+                return 0
+            try:
+                return self._write(pending)
+            except Exception:
+                # Put the deltas back so they are retried on the next flush
+                for key, amount in pending.items():
+                    self.buffer.add(key, amount)
+                raise
+        finally:
+            self._flush_lock.release()
+
+    def flush_quietly(self):
+        """flush() for timers and shutdown, where nobody can handle the error"""
+        try:
+            return self.flush()
+        except DatabaseError as e:
+            print(f"Error flushing counters: {e}")
+            return 0
+
+    def _write(self, pending):
+        # Group rows by model and identical delta sets, so e.g. every upload
+        # viewed once since the last flush is updated by a single query
+        rows = defaultdict(dict)
+        for key, amount in pending.items():
+            if amount:
+                model, pk, field = _split_key(key)
+                rows[(model, pk)][field] = amount
+
+        batches = defaultdict(list)
+        for (model, pk), deltas in rows.items():
+            batches[(model, tuple(sorted(deltas.items())))].append(pk)
+
+        updated = 0
+        with transaction.atomic():
+            for (model, deltas), pks in batches.items():
+                expressions = {
+                    field: F(field) + amount if amount > 0 else Greatest(F(field) + amount, Value(0))
+                    for field, amount in deltas
+                }
+                for start in range(0, len(pks), self.batch_size):
+                    chunk = pks[start:start + self.batch_size]
+                    updated += model._default_manager.filter(pk__in=chunk).update(**expressions)
+
+            by_model = defaultdict(dict)
+            for (model, pk), deltas in rows.items():
+                by_model[model][pk] = deltas
+            for model, deltas in by_model.items():
+                counters_flushed.send(sender=model, deltas=deltas)
+        return updated
+
+
+def _build_service():
+    if getattr(settings, 'COUNTER_BUFFER_BACKEND', 'local') == 'redis':
+        buffer = RedisCounterBuffer(settings.REDIS_URL)
+    else:
+        buffer = LocalCounterBuffer()
+    service = CounterService(
+        buffer,
+        flush_interval=getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5),
+        flush_threshold=getattr(settings, 'COUNTER_FLUSH_THRESHOLD', 1000),
+    )
+    if isinstance(buffer, LocalCounterBuffer):
+        # Do not lose a process-local buffer on a clean shutdown
+        atexit.register(service.flush_quietly)
+    return service
+
+
+# Built on first use so settings are loaded
+counters = SimpleLazyObject(_build_service)
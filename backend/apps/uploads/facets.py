@@ -0,0 +1,155 @@
+"""
+Faceted filtering of an album's uploads.
+
+All facet counts come from a single GROUP BY over every facet dimension of
+the album. That "combination table" is small (one row per distinct
+combination), cached per album and invalidated when uploads change, so
+counts for any filter selection are computed in Python without touching the
+database again. Each facet's counts ignore the facet's own selection, so the
+other values stay visible while filtering. When the results are narrowed
+further (search, quality) the table is built from the narrowed queryset
+instead, uncached, so the counts describe the same uploads as the results.
+"""
+from collections import Counter
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import CharField, Count, F, Value, When, Case
+from django.db.models.functions import Cast, Concat, TruncDate
+from rest_framework.exceptions import ValidationError
+
+FACETS = ('file_type', 'status', 'uploader', 'day', 'camera')
+CACHE_TIMEOUT = 60 * 60
+
+
+def facet_annotations():
+    """Expressions producing each facet's value for an upload"""
+    return {
+        'facet_file_type': F('file_type'),
+        'facet_status': F('status'),
+        'facet_uploader': Case(
+            When(
+                uploader_user__isnull=False,
+                then=Concat(Value('user:'), Cast('uploader_user_id', CharField()))
+            ),
+            default=F('uploader_name'),
+            output_field=CharField(),
+        ),
+        'facet_day': TruncDate('taken_at'),
+        'facet_camera': F('camera_model'),
+    }
+
+
+def _cache_key(album_id):
+    return f'upload_facets:{album_id}'
+
+
+def invalidate_facets(album_id):
+    cache.delete(_cache_key(album_id))
+
+
+def parse_selection(query_params):
+    """Read ?file_type=image,video&day=2024-06-15 style filters"""
+    selection = {}
+    for facet in FACETS:
+        raw = query_params.get(facet)
+        if raw:
+            selection[facet] = {value.strip() for value in raw.split(',') if value.strip()}
+    if 'day' in selection:
+        try:
+            selection['day'] = {date.fromisoformat(value).isoformat() for value in selection['day']}
+        except ValueError:
+            raise ValidationError({'day': 'Geçersiz tarih, YYYY-AA-GG biçiminde olmalı.'})
+    return selection
+
+
+class UploadFacets:
+    """Filter an album's uploads and count facet values"""
+
+    def __init__(self, album_id, selection):
+        self.album_id = album_id
+        self.selection = selection
+
+    def filter(self, queryset):
+        """Apply the selected facet values to a queryset of the album's uploads"""
+        if not self.selection:
+            return queryset
+        annotations = facet_annotations()
+        queryset = queryset.annotate(**{
+            f'facet_{facet}': annotations[f'facet_{facet}'] for facet in self.selection
+        })
+        for facet, values in self.selection.items():
+            queryset = queryset.filter(**{f'facet_{facet}__in': values})
+        return queryset
+
+    def combinations(self, queryset=None):
+        """Get [(facet values tuple, count)] for the album (cached) or for a narrowed queryset"""
+        if queryset is not None:
+            return self._combinations(queryset)
+        key = _cache_key(self.album_id)
+        combinations = cache.get(key)
+        if combinations is None:
+            from .models import Upload
+
+            combinations = self._combinations(Upload.objects.filter(album_id=self.album_id))
+            cache.set(key, combinations, CACHE_TIMEOUT)
+        return combinations
+
+    def _combinations(self, queryset):
+        fields = [f'facet_{facet}' for facet in FACETS]
+        rows = (
+            queryset.order_by()
+            .annotate(**facet_annotations())
+            .values(*fields)
+            .annotate(count=Count('id'))
+        )
+        return [
+            (tuple(self._format(row[field]) for field in fields), row['count'])
+            for row in rows
+        ]
+
+    @staticmethod
+    def _format(value):
+        if value is None:
+            return ''
+        return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+    def counts(self, queryset=None):
+        """Get {facet: [{'value', 'count'}]} for the current selection, within queryset if given"""
+        combinations = self.combinations(queryset)
+        counters = {facet: Counter() for facet in FACETS}
+        for values, count in combinations:
+            matches = {
+                facet: facet not in self.selection or values[index] in self.selection[facet]
+                for index, facet in enumerate(FACETS)
+            }
+            for index, facet in enumerate(FACETS):
+                # Ignore the facet's own selection
+                if all(matched for other, matched in matches.items() if other != facet):
+                    counters[facet][values[index]] += count
+        counts = {
+            facet: [
+                {'value': value, 'count': count}
+                for value, count in counters[facet].most_common()
+                if count
+            ]
+            for facet in FACETS
+        }
+        self._label_uploaders(counts['uploader'])
+        return counts
+
+    @staticmethod
+    def _label_uploaders(entries):
+        """Show registered uploaders by name (one query for the whole facet)"""
+        from django.contrib.auth import get_user_model
+
+        user_ids = [entry['value'][5:] for entry in entries if entry['value'].startswith('user:')]
+        names = {}
+        if user_ids:
+            User = get_user_model()
+            names = {
+                f'user:{user.pk}': user.full_name
+                for user in User.objects.filter(pk__in=user_ids).only('id', 'first_name', 'last_name')
+            }
+        for entry in entries:
+            entry['label'] = names.get(entry['value'], entry['value'] or 'Anonymous')
@@ -0,0 +1,55 @@
+"""
+Media file layout.
+
+The ``sharded`` layout fans files out over two levels of hashed directories
+(``uploads/ab/cd/<uuid>.jpg``) so no directory grows past a few hundred
+entries. ``flat`` is the original layout, one directory per album for
+originals and a single ``thumbnails/`` directory.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+
+SHARD_WIDTH = 2
+
+
+def shard_depth():
+    return getattr(settings, 'MEDIA_SHARD_DEPTH', 2)
+
+
+def is_sharded():
+    return getattr(settings, 'MEDIA_LAYOUT', 'sharded') == 'sharded'
+
+
+def shard(filename):
+    """Get the hashed directory prefix for a file name, e.g. 'ab/cd'"""
+    digest = hashlib.md5(filename.encode('utf-8')).hexdigest()
+    return '/'.join(digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(shard_depth()))
+
+
+def sharded_name(root, filename):
+    return f"{root}/{shard(filename)}/{filename}"
+
+
+def sharded_pattern(root):
+    """Regex matching names already in the sharded layout under ``root``"""
+    directories = '/'.join([f'[0-9a-f]{{{SHARD_WIDTH}}}'] * shard_depth())
+    return rf'^{re.escape(root)}/{directories}/[^/]+$'
+
+
+def original_name(access_code, filename):
+    if is_sharded():
+        return sharded_name('uploads', filename)
+    return f"uploads/{access_code}/{filename}"
+
+
+def thumbnail_name(filename):
+    if is_sharded():
+        return sharded_name('thumbnails', filename)
+    return f"thumbnails/{filename}"
+
+
+def target_name(name, root):
+    """Where an existing file belongs in the sharded layout"""
+    return sharded_name(root, name.rsplit('/', 1)[-1])
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.albums import manifests
+from apps.uploads.tiers import cold_candidates, move_upload
+
+
+class Command(BaseCommand):
+    help = 'Move originals of archived, expired or long-inactive albums to cold storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--limit', type=int, help='Stop after moving this many files')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the files that would move')
+
+    def handle(self, *args, **options):
+        candidates = cold_candidates().only('id', 'album', 'file', 'storage_tier').order_by('pk')
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} originals would move to cold storage.')
+            return
+
+        moved = skipped = 0
+        albums = set()
+        last_pk = None
+        while options['limit'] is None or moved < options['limit']:
+            batch = candidates if last_pk is None else candidates.filter(pk__gt=last_pk)
+            batch = list(batch[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            for upload in batch:
+                if move_upload(upload, 'cold'):
+                    moved += 1
+                    albums.add(upload.album_id)
+                else:
+                    skipped += 1
+            self.stdout.write(f'Moved {moved} originals to cold storage...')
+            time.sleep(options['sleep'])
+
+        # Published manifests link the originals that just left hot storage
+        for album_id in albums:
+            manifests.sync(album_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Storage policy applied: {moved} moved, {skipped} skipped.')
+        )
@@ -0,0 +1,89 @@
+import io
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.uploads.views import UploadListView
+from eventvault.parsers import ORJSONParser, orjson
+from eventvault.renderers import ORJSONRenderer
+
+
+def sample_page(count):
+    """A gallery page shaped like UploadListSerializer output"""
+    now = timezone.now()
+    results = []
+    for i in range(count):
+        image = i % 5 != 0
+        results.append({
+            'id': str(uuid.uuid4()),
+            'original_filename': f'IMG_{i:05d}.jpg' if image else f'voice_{i:05d}.m4a',
+            'file_type': 'image' if image else 'audio',
+            'file_size_mb': round(1.5 + i % 7 * 0.37, 2),
+            'uploader_display_name': f'Misafir {i % 40}',
+            'caption': 'Harika bir gece! 🎉' if i % 3 == 0 else '',
+            'thumbnail_url': f'https://eventvault.com/media/thumbnails/{i % 256:02x}/thumb_{i}.jpg' if image else None,
+            'placeholder': 'data:image/jpeg;base64,' + 'A' * 120 if image else '',
+            'dominant_color': '#a1b2c3' if image else '',
+            'width': 4032 if image else None,
+            'height': 3024 if image else None,
+            'view_count': i * 3,
+            'like_count': i % 17,
+            'is_liked_by_user': i % 4 == 0,
+            'status': 'approved',
+            'created_at': (now - timedelta(minutes=i)).isoformat(),
+        })
+    return {'count': count, 'next': None, 'previous': None, 'results': results}
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON rendering and parsing speed of the stdlib and orjson on an upload list page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500, help='Uploads on the page')
+        parser.add_argument('--rounds', type=int, default=200, help='Renders per variant')
+
+    def handle(self, *args, **options):
+        page = sample_page(options['items'])
+        factory = RequestFactory()
+        full = {'view': UploadListView, 'request': Request(factory.get('/'))}
+        compact = {'view': UploadListView, 'request': Request(factory.get('/?compact=1'))}
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed, ORJSONRenderer falls back to json.'))
+
+        variants = [
+            ('json', JSONRenderer(), full),
+            ('orjson', ORJSONRenderer(), full),
+            ('orjson compact', ORJSONRenderer(), compact),
+        ]
+        baseline = None
+        for name, renderer, context in variants:
+            elapsed, body = self.measure(lambda: renderer.render(page, 'application/json', context), options['rounds'])
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f'render {name:<15} {elapsed * 1000:8.3f} ms  {len(body):>8} bytes  {baseline / elapsed:5.1f}x'
+            )
+
+        body = JSONRenderer().render(page)
+        baseline = None
+        for name, parser in (('json', JSONParser()), ('orjson', ORJSONParser())):
+            elapsed, _ = self.measure(lambda: parser.parse(io.BytesIO(body)), options['rounds'])
+            baseline = baseline or elapsed
+            self.stdout.write(f'parse  {name:<15} {elapsed * 1000:8.3f} ms  {baseline / elapsed:5.1f}x')
+
+    def measure(self, call, rounds):
+        """Best time of a call over several rounds, with its last result"""
+        best = None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            result = call()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from apps.albums.models import Album
+from apps.uploads.models import Upload
+from apps.uploads.moments import cluster_album
+
+
+class Command(BaseCommand):
+    help = 'Rebuild capture time moments for albums'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--album', help='Only cluster the album with this id')
+
+    def handle(self, *args, **options):
+        albums = Album.objects.all()
+        if options['album']:
+            albums = albums.filter(id=options['album'])
+        
+        # Uploads without a capture time fall back to upload time
+        Upload.objects.filter(album__in=albums, taken_at__isnull=True).update(taken_at=F('created_at'))
+        
+        total = 0
+        for album_id in albums.values_list('id', flat=True).iterator():
+            total += cluster_album(album_id)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Built {total} moments.')
+        )
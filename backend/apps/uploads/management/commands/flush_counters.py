@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.uploads.counters import counters
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered view/like/download counters to the database'
+
+    def handle(self, *args, **options):
+        if getattr(settings, 'COUNTER_BUFFER_BACKEND', 'local') != 'redis':
+            raise CommandError(
+                'COUNTER_BUFFER_BACKEND is not "redis": each process flushes its own buffer, '
+                'there is nothing to flush from here.'
+            )
+        updated = counters.flush()
+        self.stdout.write(
+            self.style.SUCCESS(f'Flushed counters, {updated} rows updated.')
+        )
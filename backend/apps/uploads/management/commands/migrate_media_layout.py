@@ -0,0 +1,122 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.albums import manifests
+from apps.uploads import layout
+from apps.uploads.models import Upload
+
+# (FileField name, directory root)
+MEDIA_FIELDS = [('file', 'uploads'), ('thumbnail', 'thumbnails')]
+
+
+class Command(BaseCommand):
+    help = 'Move existing media files into the sharded directory layout while the site is live'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--sleep', type=float, default=0.5, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only show what would be moved')
+
+    def handle(self, *args, **options):
+        if not layout.is_sharded():
+            raise CommandError('MEDIA_LAYOUT is not "sharded", nothing to migrate to.')
+
+        self.albums = set()
+        for field, root in MEDIA_FIELDS:
+            moved, missing = self.migrate_field(field, root, options)
+            self.stdout.write(f'{field}: moved {moved} files, {missing} missing on disk.')
+
+        # Published manifests link the old file names
+        for album_id in self.albums:
+            manifests.sync(album_id)
+
+        self.stdout.write(self.style.SUCCESS('Media layout migration complete!'))
+
+    def migrate_field(self, field, root, options):
+        # Rows already in the sharded layout drop out of this query, so the command can be
+        # stopped at any point and run again
+        pending = (
+            Upload.objects.exclude(**{f'{field}__regex': layout.sharded_pattern(root)})
+            .exclude(**{field: ''})
+            .exclude(**{f'{field}__isnull': True})
+            .order_by('pk')
+        )
+
+        moved = missing = 0
+        last_pk = None
+        while True:
+            batch = pending if last_pk is None else pending.filter(pk__gt=last_pk)
+            batch = list(batch.values_list('pk', field, 'album_id')[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            moves = []
+            albums = {pk: album_id for pk, _, album_id in batch}
+            for pk, name, _ in batch:
+                new_name = layout.target_name(name, root)
+                if options['dry_run']:
+                    self.stdout.write(f'{name} -> {new_name}')
+                elif self.copy(name, new_name):
+                    moves.append((pk, name, new_name))
+                else:
+                    missing += 1
+            if options['dry_run']:
+                continue
+
+            with transaction.atomic():
+                updated = [
+                    (pk, name, new_name) for pk, name, new_name in moves
+                    # Only rewrite rows that still point at the old file
+                    if Upload.objects.filter(pk=pk, **{field: name}).update(
+                        updated_at=timezone.now(), **{field: new_name}
+                    )
+                ]
+
+            # Old files are removed once no committed row points at them
+            updated_pks = {pk for pk, _, _ in updated}
+            self.albums.update(albums[pk] for pk in updated_pks)
+            for pk, name, new_name in moves:
+                default_storage.delete(name if pk in updated_pks else new_name)
+            moved += len(updated)
+
+            self.stdout.write(f'{field}: {moved} moved so far...')
+            time.sleep(options['sleep'])
+
+        return moved, missing
+
+    def copy(self, name, new_name):
+        """Copy a stored file to its new name, hard linking on local disk"""
+        try:
+            source, target = default_storage.path(name), default_storage.path(new_name)
+        except NotImplementedError:
+            source = target = None
+
+        if default_storage.exists(new_name):
+            self.touch(target)
+            return True  # Copied by an interrupted run
+        if not default_storage.exists(name):
+            return False
+
+        if source:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.link(source, target)
+            except OSError:
+                pass  # Different filesystem or no hard link support, copy instead
+            else:
+                self.touch(target)
+                return True
+
+        with default_storage.open(name, 'rb') as content:
+            return default_storage.save(new_name, content) == new_name
+
+    def touch(self, path):
+        """A link keeps the old mtime, scrub_media would take the unreferenced new name for an old orphan"""
+        if path:
+            os.utime(path)
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.uploads.models import Upload
+from apps.uploads.ranking import update_rank_scores
+from eventvault.cache import invalidate_tags
+
+
+class Command(BaseCommand):
+    help = 'Recompute ranking scores for uploads, needed after RANKING_WEIGHTS or RANKING_DECAY_SECONDS change'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--album', help='Only refresh uploads of this album')
+        parser.add_argument('--days', type=int, help='Only refresh uploads created in the last N days')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        uploads = Upload.objects.all()
+        if options['album']:
+            uploads = uploads.filter(album_id=options['album'])
+        if options['days']:
+            uploads = uploads.filter(created_at__gte=timezone.now() - timedelta(days=options['days']))
+        
+        updated = update_rank_scores(uploads, batch_size=options['batch_size'])
+        
+        # Rank ordered galleries changed
+        album_ids = uploads.order_by().values_list('album_id', flat=True).distinct()
+        invalidate_tags(*[f'album:{album_id}' for album_id in album_ids])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed ranking scores for {updated} uploads.')
+        )
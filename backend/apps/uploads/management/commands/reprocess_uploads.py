@@ -0,0 +1,237 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.albums import manifests
+from apps.albums.models import AlbumSettings
+from apps.uploads import processing, ranking
+from apps.uploads.facets import invalidate_facets
+from apps.uploads.models import Upload
+from apps.uploads.moments import cluster_album
+from eventvault.cache import invalidate_tags
+
+# Columns each step writes back
+STEP_FIELDS = {
+    'metadata': [
+        'width', 'height', 'exif_data', 'camera_model', 'taken_at',
+        'location_data', 'latitude', 'longitude', 'geohash',
+    ],
+    'thumbnail': [
+        'thumbnail', 'sharpness', 'brightness', 'contrast', 'quality_score', 'quality_issue',
+        'placeholder', 'dominant_color',
+    ],
+    'audio': ['duration', 'waveform'],
+}
+# Uploads a step has not run for yet, for --missing (metadata leaves no marker)
+STEP_MISSING = {
+    'thumbnail': Q(file_type='image') & (Q(thumbnail='') | Q(thumbnail__isnull=True)),
+    'audio': Q(file_type='audio', duration__isnull=True),
+}
+MAX_REPORTED_FAILURES = 1000
+
+
+def timestamp(value):
+    """Parse an ISO date or datetime argument into an aware datetime"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date: {value}')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class Command(BaseCommand):
+    help = 'Regenerate thumbnails, image metadata and audio analysis for existing uploads in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--album', help='Only reprocess uploads of the album with this id')
+        parser.add_argument('--since', type=timestamp, help='Only uploads created at or after this date')
+        parser.add_argument('--until', type=timestamp, help='Only uploads created before this date')
+        parser.add_argument('--file-type', choices=['image', 'audio'])
+        parser.add_argument(
+            '--steps', default=','.join(processing.STEPS),
+            help=f'Comma separated steps to run ({", ".join(processing.STEPS)})'
+        )
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Only uploads the steps have not run for, e.g. audio saved since the last run'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--batch-size', type=int, default=200, help='Uploads written back per transaction')
+        parser.add_argument(
+            '--checkpoint', default=os.path.join(tempfile.gettempdir(), 'eventvault_reprocess.json'),
+            help='File recording progress, a run with the same selection resumes from it'
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def handle(self, *args, **options):
+        steps = [step.strip() for step in options['steps'].split(',') if step.strip()]
+        unknown = set(steps) - set(processing.STEPS)
+        if unknown or not steps:
+            raise CommandError(f'Unknown steps: {", ".join(sorted(unknown)) or options["steps"]}')
+        if options['missing'] and 'metadata' in steps:
+            raise CommandError('--missing cannot tell which uploads lack metadata, leave out that step')
+        self.steps = steps
+        # updated_at keys the cached gallery fragments
+        self.fields = [field for step in steps for field in STEP_FIELDS[step]] + ['updated_at']
+
+        selection = {
+            'album': options['album'],
+            'since': options['since'] and options['since'].isoformat(),
+            'until': options['until'] and options['until'].isoformat(),
+            'file_type': options['file_type'],
+            'missing': options['missing'],
+            'steps': sorted(steps),
+        }
+        state = self.load_checkpoint(options['checkpoint'], selection, options['restart'])
+        if state['last_pk']:
+            self.stdout.write(f'Resuming after {state["last_pk"]} ({state["processed"]} already done).')
+
+        pending = self.get_queryset(options, steps)
+        self.geolocation = {}
+        started = time.monotonic()
+        processed_now = 0
+
+        # Workers only read files, they must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=processing.init_worker) as executor:
+            while True:
+                batch = pending if not state['last_pk'] else pending.filter(pk__gt=state['last_pk'])
+                batch = list(batch.values_list('pk', 'album_id', 'file', 'file_type')[:options['batch_size']])
+                if not batch:
+                    break
+
+                tasks = [
+                    (pk, Upload.file.field.storage.path(name), file_type, steps)
+                    for pk, _, name, file_type in batch
+                ]
+                chunksize = max(1, len(tasks) // (options['workers'] * 4))
+                results = list(executor.map(processing.process_upload, tasks, chunksize=chunksize))
+
+                self.save_results(results, state)
+                state['albums'] = sorted(set(state['albums']) | {str(album_id) for _, album_id, _, _ in batch})
+                state['last_pk'] = str(batch[-1][0])
+                processed_now += len(batch)
+                self.save_checkpoint(options['checkpoint'], state)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{state["processed"]} processed, {state["failed"]} failed, '
+                    f'{processed_now / elapsed:.1f} uploads/s'
+                )
+
+        self.finish_albums(state['albums'])
+        elapsed = time.monotonic() - started
+        for pk, error in state['failures']:
+            self.stderr.write(f'Failed {pk}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Reprocessed {state["processed"]} uploads ({processed_now} in this run, '
+            f'{processed_now / elapsed if elapsed else 0:.1f} uploads/s), {state["failed"]} failed.'
+        ))
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+
+    def get_queryset(self, options, steps):
+        uploads = Upload.objects.filter(
+            album__deleted_at__isnull=True,
+            # Cold originals would all be rehydrated, move them back first
+            storage_tier='hot',
+        ).exclude(file='').order_by('pk')
+
+        file_types = []
+        if 'metadata' in steps or 'thumbnail' in steps:
+            file_types.append('image')
+        if 'audio' in steps:
+            file_types.append('audio')
+        if options['file_type']:
+            file_types = [t for t in file_types if t == options['file_type']]
+        uploads = uploads.filter(file_type__in=file_types)
+        if options['missing']:
+            missing = Q()
+            for step in steps:
+                missing |= STEP_MISSING[step]
+            uploads = uploads.filter(missing)
+
+        if options['album']:
+            uploads = uploads.filter(album_id=options['album'])
+        if options['since']:
+            uploads = uploads.filter(created_at__gte=options['since'])
+        if options['until']:
+            uploads = uploads.filter(created_at__lt=options['until'])
+        return uploads
+
+    def save_results(self, results, state):
+        by_pk = {result['pk']: result for result in results}
+        now = timezone.now()
+        uploads = list(Upload.objects.filter(pk__in=list(by_pk)))
+        changed = []
+        for upload in uploads:
+            result = by_pk[upload.pk]
+            if result['error']:
+                state['failed'] += 1
+                if len(state['failures']) < MAX_REPORTED_FAILURES:
+                    state['failures'].append([str(upload.pk), result['error']])
+                continue
+
+            fields = dict(result['fields'])
+            if 'metadata' in self.steps and upload.file_type == 'image':
+                metadata_fields = {field: fields.pop(field) for field in STEP_FIELDS['metadata'] if field in fields}
+                upload.apply_image_metadata(
+                    metadata_fields, result['location'], self.geolocation_enabled(upload.album_id)
+                )
+            for field, value in fields.items():
+                setattr(upload, field, value)
+            if result['thumbnail']:
+                upload.store_thumbnail(result['thumbnail'])
+            upload.updated_at = now
+            changed.append(upload)
+
+        with transaction.atomic():
+            Upload.objects.bulk_update(changed, self.fields)
+        if 'thumbnail' in self.steps and changed:
+            # The quality score is part of the rank
+            ranking.update_rank_scores_for(upload.pk for upload in changed)
+        state['processed'] += len(results)
+
+    def geolocation_enabled(self, album_id):
+        if album_id not in self.geolocation:
+            self.geolocation[album_id] = bool(AlbumSettings.objects.filter(album_id=album_id).values_list(
+                'enable_geolocation', flat=True
+            ).first())
+        return self.geolocation[album_id]
+
+    def finish_albums(self, album_ids):
+        """Rebuild what depends on capture metadata once every batch is written"""
+        for album_id in album_ids:
+            invalidate_facets(album_id)
+            if 'metadata' in self.steps:
+                cluster_album(album_id)
+        invalidate_tags(*[f'album:{album_id}' for album_id in album_ids])
+        for album_id in album_ids:
+            manifests.sync(album_id)  # Thumbnails and dimensions are in the manifest
+
+    def load_checkpoint(self, path, selection, restart):
+        state = None
+        if not restart and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('selection') != selection:
+                self.stdout.write(self.style.WARNING('Checkpoint is for a different selection, starting over.'))
+                state = None
+        return state or {
+            'selection': selection, 'last_pk': None, 'processed': 0, 'failed': 0, 'failures': [], 'albums': [],
+        }
+
+    def save_checkpoint(self, path, state):
+        # Write and rename so an interrupted run never leaves a torn checkpoint
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,120 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from apps.uploads.models import Upload
+from apps.uploads.scrubber import RateLimiter, media_files, media_references, merge
+
+
+class Command(BaseCommand):
+    help = 'Delete orphaned media files, report missing or truncated ones and regenerate thumbnails'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=settings.MEDIA_SCRUB_GRACE_HOURS,
+            help='Only delete orphans older than this, uploads in flight are not orphans yet'
+        )
+        parser.add_argument('--rate', type=float, default=20, help='Max deletions and regenerations per second (0 for no limit)')
+        parser.add_argument('--workers', type=int, default=4, help='Threads regenerating thumbnails')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--skip-thumbnails', action='store_true', help='Only report missing thumbnails')
+        parser.add_argument('--dry-run', action='store_true', help='Report only, change nothing')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.limiter = RateLimiter(options['rate'])
+        self.executor = ThreadPoolExecutor(max_workers=options['workers'])
+        self.counts = dict.fromkeys(
+            ['files', 'orphans', 'deleted', 'recent', 'missing', 'truncated', 'regenerated', 'failed'], 0
+        )
+        media_root = str(settings.MEDIA_ROOT)
+        cutoff = time.time() - options['grace_hours'] * 3600
+        pending = []
+
+        try:
+            for media_file, references in merge(media_files(media_root), media_references()):
+                if media_file:
+                    self.counts['files'] += 1
+
+                if not references:
+                    self.orphan(media_root, media_file, cutoff)
+                    continue
+
+                for reference in references:
+                    if media_file is None:
+                        if os.path.exists(os.path.join(media_root, reference.name)):
+                            continue  # Stored outside the scrubbed directories
+                        self.counts['missing'] += 1
+                        self.report(f'Missing {reference.kind} of {reference.pk}: {reference.name}')
+                    elif media_file.size == 0 or (reference.expected_size and media_file.size < reference.expected_size):
+                        self.counts['truncated'] += 1
+                        self.report(
+                            f'Truncated {reference.kind} of {reference.pk}: {reference.name} '
+                            f'({media_file.size} of {reference.expected_size or "?"} bytes)'
+                        )
+                    else:
+                        continue
+                    if reference.kind == 'thumbnail':
+                        pending.append(reference.pk)
+
+                if len(pending) >= options['batch_size']:
+                    self.regenerate(pending)
+                    pending = []
+
+            # Images that never got a thumbnail at all
+            unthumbnailed = Upload.objects.filter(
+                Q(thumbnail='') | Q(thumbnail__isnull=True), file_type='image', storage_tier='hot'
+            ).exclude(file='').values_list('pk', flat=True)
+            for pk in unthumbnailed.iterator():
+                self.counts['missing'] += 1
+                pending.append(pk)
+                if len(pending) >= options['batch_size']:
+                    self.regenerate(pending)
+                    pending = []
+            self.regenerate(pending)
+        finally:
+            self.executor.shutdown()
+
+        self.stdout.write(', '.join(f'{key}: {value}' for key, value in self.counts.items()))
+        self.stdout.write(self.style.SUCCESS('Media scrub complete!'))
+
+    def report(self, message):
+        if self.options['verbosity'] > 1 or self.options['dry_run']:
+            self.stdout.write(message)
+
+    def orphan(self, media_root, media_file, cutoff):
+        self.counts['orphans'] += 1
+        if media_file.mtime > cutoff:
+            self.counts['recent'] += 1
+            return
+        self.report(f'Orphan: {media_file.name} ({media_file.size} bytes)')
+        if self.options['dry_run']:
+            return
+        self.limiter.wait()
+        try:
+            os.remove(os.path.join(media_root, media_file.name))
+            self.counts['deleted'] += 1
+        except FileNotFoundError:
+            pass
+
+    def regenerate(self, pks):
+        if not pks or self.options['dry_run'] or self.options['skip_thumbnails']:
+            return
+        for regenerated in self.executor.map(self.regenerate_thumbnail, pks):
+            self.counts['regenerated' if regenerated else 'failed'] += 1
+
+    def regenerate_thumbnail(self, pk):
+        self.limiter.wait()
+        try:
+            upload = Upload.objects.filter(pk=pk).first()
+            if upload is None or not upload.file:
+                return False
+            upload.thumbnail = None
+            return upload.process_file()
+        finally:
+            connection.close()
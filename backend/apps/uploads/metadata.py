@@ -0,0 +1,167 @@
+"""
+Helpers for reading EXIF metadata from images
+"""
+from datetime import datetime
+
+from django.utils import timezone
+from PIL import TiffImagePlugin
+
+EXIF_MAKE = 271
+EXIF_MODEL = 272
+EXIF_DATETIME = 306
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_OFFSET_TIME_ORIGINAL = 36881
+
+
+def sanitize_exif(exif):
+    """Convert EXIF values to JSON serializable types, keyed by tag id"""
+    clean = {}
+    for tag, value in exif.items():
+        value = _sanitize_value(value)
+        if value is not None:
+            clean[str(tag)] = value
+    return clean
+
+
+def _sanitize_value(value):
+    if isinstance(value, TiffImagePlugin.IFDRational):
+        return float(value) if value.denominator else None
+    if isinstance(value, bytes):
+        # Text stored as bytes is kept, binary blobs (MakerNote etc.) are dropped
+        try:
+            return value.decode('ascii').strip('\x00').strip()
+        except UnicodeDecodeError:
+            return None
+    if isinstance(value, str):
+        return value.strip('\x00').strip()
+    if isinstance(value, (tuple, list)):
+        return [_sanitize_value(item) for item in value]
+    if isinstance(value, dict):
+        return sanitize_exif(value)
+    if isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def _text(exif, tag):
+    value = exif.get(tag) or exif.get(str(tag)) or ''
+    if isinstance(value, bytes):
+        value = value.decode('ascii', errors='ignore')
+    return str(value).strip('\x00').strip()
+
+
+def camera_model(exif):
+    """Get a display name for the camera, e.g. 'Apple iPhone 14 Pro'"""
+    make = _text(exif, EXIF_MAKE)
+    model = _text(exif, EXIF_MODEL)
+    if make and model and not model.lower().startswith(make.lower()):
+        return f"{make} {model}"[:100]
+    return (model or make)[:100]
+
+
+def taken_at(exif):
+    """Get the capture time from DateTimeOriginal (or DateTime), or None.
+
+    EXIF times are local to the camera; OffsetTimeOriginal is used when the
+    camera wrote it, otherwise the project time zone is assumed.
+    """
+    raw = _text(exif, EXIF_DATETIME_ORIGINAL) or _text(exif, EXIF_DATETIME)
+    if not raw:
+        return None
+    try:
+        value = datetime.strptime(raw[:19], '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        return None
+    offset = _text(exif, EXIF_OFFSET_TIME_ORIGINAL)
+    if offset:
+        try:
+            return datetime.strptime(f"{raw[:19]}{offset.replace(':', '')}", '%Y:%m:%d %H:%M:%S%z')
+        except ValueError:
+            pass
+    return timezone.make_aware(value)
+
+
+EXIF_GPS_INFO = 34853
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+GPS_ALTITUDE_REF = 5
+GPS_ALTITUDE = 6
+
+GEOHASH_PRECISION = 12
+_GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def _rational(value):
+    if isinstance(value, (tuple, list)) and len(value) == 2:
+        # Old style (numerator, denominator) pairs
+        return value[0] / value[1] if value[1] else None
+    try:
+        return float(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _degrees(value, ref):
+    if not isinstance(value, (tuple, list)) or len(value) != 3:
+        return None
+    parts = [_rational(part) for part in value]
+    if None in parts:
+        return None
+    degrees = parts[0] + parts[1] / 60 + parts[2] / 3600
+    return -degrees if _text({0: ref}, 0).upper() in ('S', 'W') else degrees
+
+
+def gps_location(exif):
+    """Get {'latitude', 'longitude', 'altitude'} from the GPS IFD, or None"""
+    gps = exif.get(EXIF_GPS_INFO) or exif.get(str(EXIF_GPS_INFO))
+    if not isinstance(gps, dict):
+        return None
+    gps = {int(tag): value for tag, value in gps.items()}
+    latitude = _degrees(gps.get(GPS_LATITUDE), gps.get(GPS_LATITUDE_REF))
+    longitude = _degrees(gps.get(GPS_LONGITUDE), gps.get(GPS_LONGITUDE_REF))
+    if latitude is None or longitude is None:
+        return None
+    # 0,0 is what many cameras write when they had no fix
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude == 0 and longitude == 0):
+        return None
+    
+    location = {'latitude': round(latitude, 7), 'longitude': round(longitude, 7)}
+    altitude = _rational(gps.get(GPS_ALTITUDE)) if gps.get(GPS_ALTITUDE) is not None else None
+    if altitude is not None:
+        below_sea_level = gps.get(GPS_ALTITUDE_REF) in (1, b'\x01')
+        location['altitude'] = round(-altitude if below_sea_level else altitude, 2)
+    return location
+
+
+def geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash, each prefix is an enclosing grid cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            rng[0] = middle
+        else:
+            rng[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def strip_gps(exif_data):
+    """Drop the GPS IFD from sanitized EXIF data"""
+    exif_data.pop(str(EXIF_GPS_INFO), None)
+    return exif_data
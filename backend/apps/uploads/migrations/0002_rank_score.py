@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='rank_score',
+            field=models.FloatField(default=0, verbose_name='rank score'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['album', '-rank_score'], name='upload_album_rank_idx'),
+        ),
+    ]
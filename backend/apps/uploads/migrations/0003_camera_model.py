@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0002_rank_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='camera_model',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='camera model'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_taken_at(apps, schema_editor):
+    Upload = apps.get_model('uploads', 'Upload')
+    Upload.objects.filter(taken_at__isnull=True).update(taken_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('albums', '0003_album_stats'),
+        ('uploads', '0003_camera_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Moment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_at', models.DateTimeField(verbose_name='start at')),
+                ('end_at', models.DateTimeField(verbose_name='end at')),
+                ('upload_count', models.PositiveIntegerField(default=0, verbose_name='upload count')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'Moment',
+                'verbose_name_plural': 'Moments',
+                'db_table': 'upload_moments',
+                'ordering': ['start_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='taken_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='taken at'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['album', 'taken_at'], name='upload_album_taken_idx'),
+        ),
+        migrations.AddField(
+            model_name='moment',
+            name='album',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moments', to='albums.album', verbose_name='album'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='moment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='uploads.moment', verbose_name='moment'),
+        ),
+        migrations.AddIndex(
+            model_name='moment',
+            index=models.Index(fields=['album', 'start_at'], name='moment_album_start_idx'),
+        ),
+        migrations.RunPython(backfill_taken_at, migrations.RunPython.noop),
+    ]
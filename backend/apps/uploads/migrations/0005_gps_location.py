@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+from apps.uploads import metadata
+
+
+def backfill_locations(apps, schema_editor):
+    Upload = apps.get_model('uploads', 'Upload')
+    uploads = Upload.objects.filter(
+        album__advanced_settings__enable_geolocation=True,
+        exif_data__has_key=str(metadata.EXIF_GPS_INFO),
+    )
+    batch = []
+    for upload in uploads.iterator():
+        location = metadata.gps_location(upload.exif_data)
+        if not location:
+            continue
+        upload.location_data = location
+        upload.latitude = location['latitude']
+        upload.longitude = location['longitude']
+        upload.geohash = metadata.geohash(upload.latitude, upload.longitude)
+        batch.append(upload)
+        if len(batch) >= 500:
+            Upload.objects.bulk_update(batch, ['location_data', 'latitude', 'longitude', 'geohash'])
+            batch = []
+    Upload.objects.bulk_update(batch, ['location_data', 'latitude', 'longitude', 'geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0004_taken_at_moments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, verbose_name='geohash'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='latitude'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='longitude'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['album', 'latitude', 'longitude'], name='upload_album_latlon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['album', 'geohash'], name='upload_album_geohash_idx'),
+        ),
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
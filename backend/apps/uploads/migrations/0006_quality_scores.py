@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0005_gps_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='brightness',
+            field=models.FloatField(blank=True, null=True, verbose_name='brightness'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='contrast',
+            field=models.FloatField(blank=True, null=True, verbose_name='contrast'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='quality_issue',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('uniform', 'Uniform frame'), ('dark', 'Underexposed'), ('overexposed', 'Overexposed'), ('blurry', 'Blurry')], max_length=20, verbose_name='quality issue'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='quality_score',
+            field=models.FloatField(blank=True, null=True, verbose_name='quality score'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='sharpness',
+            field=models.FloatField(blank=True, null=True, verbose_name='sharpness'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['album', 'quality_issue'], name='upload_album_quality_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['album', '-quality_score'], name='upload_album_qscore_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0006_quality_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='dominant_color',
+            field=models.CharField(blank=True, max_length=7, verbose_name='dominant color'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='placeholder',
+            field=models.TextField(blank=True, verbose_name='placeholder'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0007_placeholders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='waveform',
+            field=models.BinaryField(blank=True, default=bytes, verbose_name='waveform peaks'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:14
+
+import apps.uploads.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0008_audio_waveform'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='upload',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to=apps.uploads.models.thumbnail_path, verbose_name='thumbnail'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0009_media_layout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='storage_tier',
+            field=models.CharField(choices=[('hot', 'Hot'), ('cold', 'Cold')], db_index=True, default='hot', max_length=10, verbose_name='storage tier'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='tier_changed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='tier changed at'),
+        ),
+    ]
@@ -1,11 +1,16 @@
 import uuid
 import os
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
-from PIL import Image
+from django.core.files.base import ContentFile
+from django.utils import timezone
 from apps.albums.models import Album
+from eventvault.cache import invalidate_tags
+from . import layout, metadata, processing, ranking, tiers
 
 User = get_user_model()
 
@@ -16,8 +21,13 @@ def upload_path(instance, filename):
     ext = filename.split('.')[-1].lower()
     # Generate new filename with UUID
     new_filename = f"{uuid.uuid4()}.{ext}"
-    # Create path: uploads/album_access_code/new_filename
-    return f"uploads/{instance.album.access_code}/{new_filename}"
+    # Create path: uploads/ab/cd/new_filename (or uploads/album_access_code/ in the flat layout)
+    return layout.original_name(instance.album.access_code, new_filename)
+
+
+def thumbnail_path(instance, filename):
+    """Generate path for thumbnails"""
+    return layout.thumbnail_name(filename)
 
 
 class Upload(models.Model):
@@ -39,6 +49,19 @@ class Upload(models.Model):
         ('processing', _('Processing')),
     ]
 
+    QUALITY_ISSUES = [
+        ('', _('None')),
+        ('uniform', _('Uniform frame')),
+        ('dark', _('Underexposed')),
+        ('overexposed', _('Overexposed')),
+        ('blurry', _('Blurry')),
+    ]
+
+    STORAGE_TIERS = [
+        ('hot', _('Hot')),
+        ('cold', _('Cold')),
+    ]
+
     # Basic Information
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     album = models.ForeignKey(
@@ -56,10 +79,13 @@ class Upload(models.Model):
     mime_type = models.CharField(_('MIME type'), max_length=100, blank=True)
     
     # Media-specific Information
-    thumbnail = models.ImageField(_('thumbnail'), upload_to='thumbnails/', blank=True, null=True)
+    storage_tier = models.CharField(_('storage tier'), max_length=10, choices=STORAGE_TIERS, default='hot', db_index=True)
+    tier_changed_at = models.DateTimeField(_('tier changed at'), null=True, blank=True)
+    thumbnail = models.ImageField(_('thumbnail'), upload_to=thumbnail_path, blank=True, null=True)
     width = models.PositiveIntegerField(_('width'), null=True, blank=True)
     height = models.PositiveIntegerField(_('height'), null=True, blank=True)
     duration = models.FloatField(_('duration (seconds)'), null=True, blank=True)
+    waveform = models.BinaryField(_('waveform peaks'), blank=True, default=bytes)
     
     # Upload Information
     uploader_name = models.CharField(_('uploader name'), max_length=100, blank=True)
@@ -81,6 +107,30 @@ class Upload(models.Model):
     # Metadata
     exif_data = models.JSONField(_('EXIF data'), default=dict, blank=True)
     location_data = models.JSONField(_('location data'), default=dict, blank=True)
+    latitude = models.FloatField(_('latitude'), null=True, blank=True)
+    longitude = models.FloatField(_('longitude'), null=True, blank=True)
+    geohash = models.CharField(_('geohash'), max_length=12, blank=True)
+    camera_model = models.CharField(_('camera model'), max_length=100, blank=True, db_index=True)
+    taken_at = models.DateTimeField(_('taken at'), null=True, blank=True)
+    moment = models.ForeignKey(
+        'Moment',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='uploads',
+        verbose_name=_('moment')
+    )
+    
+    # Image quality, measured on the thumbnail
+    sharpness = models.FloatField(_('sharpness'), null=True, blank=True)
+    brightness = models.FloatField(_('brightness'), null=True, blank=True)
+    contrast = models.FloatField(_('contrast'), null=True, blank=True)
+    quality_score = models.FloatField(_('quality score'), null=True, blank=True)
+    quality_issue = models.CharField(_('quality issue'), max_length=20, choices=QUALITY_ISSUES, blank=True)
+    
+    # Inline preview shown until the thumbnail loads
+    placeholder = models.TextField(_('placeholder'), blank=True)
+    dominant_color = models.CharField(_('dominant color'), max_length=7, blank=True)
     
     # Moderation
     status = models.CharField(_('status'), max_length=20, choices=STATUS_CHOICES, default='approved')
@@ -99,6 +149,7 @@ class Upload(models.Model):
     view_count = models.PositiveIntegerField(_('view count'), default=0)
     like_count = models.PositiveIntegerField(_('like count'), default=0)
     download_count = models.PositiveIntegerField(_('download count'), default=0)
+    rank_score = models.FloatField(_('rank score'), default=0)
     
     # Timestamps
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
@@ -109,11 +160,37 @@ class Upload(models.Model):
         verbose_name = _('Upload')
         verbose_name_plural = _('Uploads')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['album', '-rank_score'], name='upload_album_rank_idx'),
+            models.Index(fields=['album', 'taken_at'], name='upload_album_taken_idx'),
+            models.Index(fields=['album', 'latitude', 'longitude'], name='upload_album_latlon_idx'),
+            models.Index(fields=['album', 'geohash'], name='upload_album_geohash_idx'),
+            models.Index(fields=['album', 'quality_issue'], name='upload_album_quality_idx'),
+            models.Index(fields=['album', '-quality_score'], name='upload_album_qscore_idx'),
+        ]
 
     def __str__(self):
         uploader = self.uploader_name or self.uploader_user.full_name if self.uploader_user else 'Anonymous'
         return f"{self.original_filename} by {uploader}"
 
+    # Fields filled in by thumbnail processing after the row is created
+    PROCESSED_FIELDS = (
+        'thumbnail', 'sharpness', 'brightness', 'contrast', 'quality_score', 'quality_issue',
+        'placeholder', 'dominant_color',
+    )
+
+    # Fields whose previous values are tracked so stats can be updated incrementally
+    TRACKED_FIELDS = ('status', 'file_type', 'file_size')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            field: getattr(instance, field)
+            for field in cls.TRACKED_FIELDS if field in field_names
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         if self.file:
             # Set file size if not set
@@ -126,12 +203,42 @@ class Upload(models.Model):
             
             # Determine file type and process accordingly
             self.determine_file_type()
+        
+        # Fall back to upload time when there is no capture time
+        if not self.taken_at:
+            self.taken_at = timezone.now()
             
         super().save(*args, **kwargs)
         
-        # Generate thumbnail after saving
-        if self.file and not self.thumbnail:
+        # Process the stored file after saving
+        if self.file:
+            self.process_file()
+
+    def process_file(self, force=False):
+        """Generate the thumbnail, returns True when it was stored.
+
+        Audio is decoded outside the request: duration and waveform stay null
+        until ``reprocess_uploads --missing`` analyzes it.
+        """
+        processed = False
+        if force or not self.thumbnail:
             self.generate_thumbnail()
+            processed = bool(self.thumbnail)
+        
+        if processed:
+            # Persist the processing results without running save() again
+            self.updated_at = timezone.now()  # Cached gallery fragments are keyed on it
+            type(self).objects.filter(pk=self.pk).update(
+                updated_at=self.updated_at,
+                **{field: getattr(self, field) for field in self.PROCESSED_FIELDS}
+            )
+            album_id = self.album_id
+            transaction.on_commit(lambda: invalidate_tags(f'album:{album_id}'))
+            if self.quality_score is not None:
+                # The rank computed on create did not know the quality yet
+                pk = self.pk
+                transaction.on_commit(lambda: ranking.update_rank_scores_for([pk]))
+        return processed
 
     def determine_file_type(self):
         """Determine file type based on file extension and MIME type"""
@@ -164,17 +271,44 @@ class Upload(models.Model):
     def extract_image_metadata(self):
         """Extract metadata from image files"""
         try:
-            with Image.open(self.file.path) as img:
-                self.width, self.height = img.size
-                
-                # Extract EXIF data
-                if hasattr(img, '_getexif'):
-                    exif = img._getexif()
-                    if exif:
-                        self.exif_data = dict(exif)
+            # Read from the file object, new uploads are not on disk yet
+            fields, location = processing.read_image_metadata(self.file)
+            self.apply_image_metadata(fields, location)
+            self.file.seek(0)
         except Exception as e:
             print(f"Error extracting image metadata: {e}")
 
+    def apply_image_metadata(self, fields, location, geolocation_enabled=None):
+        """Set fields read by processing.read_image_metadata"""
+        fields = dict(fields)
+        self.taken_at = fields.pop('taken_at', None) or self.taken_at
+        for field, value in fields.items():
+            setattr(self, field, value)
+        if 'exif_data' in fields:
+            self.set_location(location, geolocation_enabled)
+
+    def geolocation_enabled(self):
+        """Check whether the album owner allows storing upload locations"""
+        from apps.albums.models import AlbumSettings
+        return bool(AlbumSettings.objects.filter(album_id=self.album_id).values_list(
+            'enable_geolocation', flat=True
+        ).first())
+
+    def set_location(self, location, enabled=None):
+        """Store GPS coordinates, or drop them when geolocation is disabled"""
+        if enabled is None:
+            enabled = self.geolocation_enabled()
+        if not location or not enabled:
+            metadata.strip_gps(self.exif_data)
+            self.location_data = {}
+            self.latitude = self.longitude = None
+            self.geohash = ''
+            return
+        self.location_data = location
+        self.latitude = location['latitude']
+        self.longitude = location['longitude']
+        self.geohash = metadata.geohash(self.latitude, self.longitude)
+
     def generate_thumbnail(self):
         """Generate thumbnail for images and videos"""
         if self.file_type == 'image':
@@ -185,34 +319,21 @@ class Upload(models.Model):
     def generate_image_thumbnail(self):
         """Generate thumbnail for image files"""
         try:
-            with Image.open(self.file.path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Create thumbnail
-                img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-                
-                # Save thumbnail
-                thumb_name = f"thumb_{self.id}.jpg"
-                thumb_path = f"thumbnails/{thumb_name}"
-                
-                from django.core.files.base import ContentFile
-                from io import BytesIO
-                
-                thumb_io = BytesIO()
-                img.save(thumb_io, format='JPEG', quality=85)
-                thumb_io.seek(0)
-                
-                self.thumbnail.save(
-                    thumb_name,
-                    ContentFile(thumb_io.read()),
-                    save=False
-                )
-                
+            tiers.ensure_hot(self)
+            content, fields = processing.render_thumbnail(self.file.path)
+            for field, value in fields.items():
+                setattr(self, field, value)
+            self.store_thumbnail(content)
         except Exception as e:
             print(f"Error generating thumbnail: {e}")
 
+    def store_thumbnail(self, content):
+        """Save JPEG bytes as the thumbnail, without saving the row"""
+        if self.thumbnail:
+            # Replace the old thumbnail instead of piling up renamed copies
+            self.thumbnail.delete(save=False)
+        self.thumbnail.save(f"thumb_{self.id}.jpg", ContentFile(content), save=False)
+
     def generate_video_thumbnail(self):
         """Generate thumbnail for video files (placeholder for now)"""
         # TODO: Implement video thumbnail generation using ffmpeg
@@ -250,6 +371,36 @@ class Upload(models.Model):
                     raise ValidationError(f"File type '{ext}' is not allowed for this album")
 
 
+class Moment(models.Model):
+    """
+    Uploads of an album grouped by gaps in capture time
+    """
+    album = models.ForeignKey(
+        Album,
+        on_delete=models.CASCADE,
+        related_name='moments',
+        verbose_name=_('album')
+    )
+    start_at = models.DateTimeField(_('start at'))
+    end_at = models.DateTimeField(_('end at'))
+    upload_count = models.PositiveIntegerField(_('upload count'), default=0)
+    
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        db_table = 'upload_moments'
+        verbose_name = _('Moment')
+        verbose_name_plural = _('Moments')
+        ordering = ['start_at']
+        indexes = [
+            models.Index(fields=['album', 'start_at'], name='moment_album_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.upload_count} uploads from {self.start_at} to {self.end_at}"
+
+
 class UploadComment(models.Model):
     """
     Comments on uploads
@@ -318,6 +469,36 @@ class UploadLike(models.Model):
     def __str__(self):
         return f"{self.user.full_name} likes {self.upload.original_filename}"
 
+    @classmethod
+    def toggle(cls, upload, user):
+        """Atomically like or unlike an upload, returns True if it is now liked"""
+        with transaction.atomic():
+            deleted, _ = cls.objects.filter(upload=upload, user=user).delete()
+            if deleted:
+                delta = -1
+            else:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(upload=upload, user=user)
+                except IntegrityError:
+                    # A concurrent request already liked it
+                    return True
+                delta = 1
+            Upload.objects.filter(pk=upload.pk).update(
+                like_count=Greatest(F('like_count') + delta, Value(0))
+            )
+        return delta > 0
+
+    @classmethod
+    def liked_upload_ids(cls, user, uploads):
+        """Get the ids of the given uploads liked by user in one query"""
+        if not user.is_authenticated:
+            return set()
+        upload_ids = [upload.pk for upload in uploads]
+        return set(
+            cls.objects.filter(user=user, upload_id__in=upload_ids).values_list('upload_id', flat=True)
+        )
+
 
 class UploadReport(models.Model):
     """
@@ -0,0 +1,91 @@
+"""
+Grouping of uploads into "moments" by capture time.
+
+Uploads whose ``taken_at`` lie within ``MOMENT_GAP_MINUTES`` of each other
+belong to the same moment. New uploads extend, create or merge moments
+incrementally; ``cluster_moments`` rebuilds an album from scratch.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+
+def moment_gap():
+    return timedelta(minutes=getattr(settings, 'MOMENT_GAP_MINUTES', 90))
+
+
+def assign_moment(upload):
+    """Put an upload into the moment it belongs to, merging moments it bridges"""
+    from .models import Moment, Upload
+
+    gap = moment_gap()
+    taken_at = upload.taken_at
+    with transaction.atomic():
+        nearby = list(
+            Moment.objects.select_for_update()
+            .filter(album_id=upload.album_id, start_at__lte=taken_at + gap, end_at__gte=taken_at - gap)
+            .order_by('start_at')
+        )
+        if not nearby:
+            moment = Moment.objects.create(
+                album_id=upload.album_id, start_at=taken_at, end_at=taken_at, upload_count=1
+            )
+        else:
+            moment, merged = nearby[0], nearby[1:]
+            moment.start_at = min([taken_at, moment.start_at] + [m.start_at for m in merged])
+            moment.end_at = max([taken_at, moment.end_at] + [m.end_at for m in merged])
+            moment.upload_count += 1 + sum(m.upload_count for m in merged)
+            if merged:
+                Upload.objects.filter(moment__in=merged).update(moment=moment)
+                Moment.objects.filter(pk__in=[m.pk for m in merged]).delete()
+            moment.save(update_fields=['start_at', 'end_at', 'upload_count', 'updated_at'])
+        Upload.objects.filter(pk=upload.pk).update(moment=moment)
+        upload.moment = moment
+    return moment
+
+
+def release_moment(moment_id):
+    """Account for an upload leaving a moment, dropping the moment when empty"""
+    from .models import Moment
+
+    if not moment_id:
+        return
+    Moment.objects.filter(pk=moment_id).update(upload_count=F('upload_count') - 1)
+    Moment.objects.filter(pk=moment_id, upload_count__lte=0).delete()
+
+
+def cluster_album(album_id):
+    """Recompute all moments of an album in one pass over its uploads"""
+    from .models import Moment, Upload
+
+    gap = moment_gap()
+    clusters = []
+    for pk, taken_at in (
+        Upload.objects.filter(album_id=album_id, taken_at__isnull=False)
+        .order_by('taken_at').values_list('pk', 'taken_at').iterator()
+    ):
+        if clusters and taken_at - clusters[-1]['end_at'] <= gap:
+            clusters[-1]['end_at'] = taken_at
+            clusters[-1]['uploads'].append(pk)
+        else:
+            clusters.append({'start_at': taken_at, 'end_at': taken_at, 'uploads': [pk]})
+
+    with transaction.atomic():
+        Upload.objects.filter(album_id=album_id).update(moment=None)
+        Moment.objects.filter(album_id=album_id).delete()
+        moments = Moment.objects.bulk_create([
+            Moment(
+                album_id=album_id,
+                start_at=cluster['start_at'],
+                end_at=cluster['end_at'],
+                upload_count=len(cluster['uploads']),
+            )
+            for cluster in clusters
+        ])
+        for moment, cluster in zip(moments, clusters):
+            upload_ids = cluster['uploads']
+            for start in range(0, len(upload_ids), 500):
+                Upload.objects.filter(pk__in=upload_ids[start:start + 500]).update(moment=moment)
+    return len(moments)
@@ -0,0 +1,45 @@
+"""
+Tiny inline previews so galleries can paint before thumbnails load.
+
+Both are computed from the thumbnail during processing: a ~16px WebP encoded
+as a data URI (LQIP, usually 100-300 bytes) and the dominant color.
+"""
+import base64
+import io
+
+from PIL import Image, features
+
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 30
+
+
+def lqip(img):
+    """Get a base64 data URI of a tiny blurred-on-upscale copy of the image"""
+    small = img.copy()
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BOX)
+    buffer = io.BytesIO()
+    if features.check('webp'):
+        small.save(buffer, format='WEBP', quality=PLACEHOLDER_QUALITY, method=6)
+        mime_type = 'image/webp'
+    else:
+        small.save(buffer, format='PNG', optimize=True)
+        mime_type = 'image/png'
+    return f"data:{mime_type};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+
+
+def dominant_color(img):
+    """Get the most common color of a reduced palette as '#rrggbb'"""
+    small = img.copy()
+    small.thumbnail((64, 64), Image.Resampling.BOX)
+    palette_image = small.convert('RGB').quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    count, index = max(palette_image.getcolors())
+    red, green, blue = palette_image.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def generate(img):
+    """Get the placeholder fields for an RGB image"""
+    return {
+        'placeholder': lqip(img),
+        'dominant_color': dominant_color(img),
+    }
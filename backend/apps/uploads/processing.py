@@ -0,0 +1,78 @@
+"""
+File processing steps shared by ingest and bulk reprocessing.
+
+The functions here only read files and return field values, they never touch
+the database, so ``reprocess_uploads`` can run them in worker processes and
+write the results back in batches.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+
+from . import audio, metadata, placeholders, quality
+
+STEPS = ('metadata', 'thumbnail', 'audio')
+
+
+def read_image_metadata(source):
+    """Get dimensions and EXIF derived fields, plus the raw GPS location or None"""
+    location = None
+    with Image.open(source) as img:
+        fields = {'width': img.width, 'height': img.height}
+        exif = img._getexif() if hasattr(img, '_getexif') else None
+        if exif:
+            fields['exif_data'] = metadata.sanitize_exif(exif)
+            fields['camera_model'] = metadata.camera_model(exif)
+            fields['taken_at'] = metadata.taken_at(exif)
+            location = metadata.gps_location(exif)
+    return fields, location
+
+
+def render_thumbnail(source):
+    """Get the JPEG thumbnail and the quality and placeholder fields measured on it"""
+    size = getattr(settings, 'THUMBNAIL_SIZE', 300)
+    with Image.open(source) as img:
+        # Convert to RGB if necessary
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        # Score quality on the small buffer, no second decode
+        fields = quality.measure(img) or {}
+        fields.update(placeholders.generate(img))
+
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG', quality=getattr(settings, 'THUMBNAIL_QUALITY', 85))
+    return buffer.getvalue(), fields
+
+
+def init_worker():
+    """Process pool initializer, workers started with spawn need Django set up"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def process_upload(task):
+    """Worker entry point for one upload.
+
+    Gets (pk, path, file_type, steps) and returns a dict with the pk, the new
+    field values, thumbnail bytes, GPS location and an error message.
+    """
+    pk, path, file_type, steps = task
+    result = {'pk': pk, 'fields': {}, 'thumbnail': None, 'location': None, 'error': ''}
+    try:
+        if file_type == 'image':
+            if 'metadata' in steps:
+                fields, result['location'] = read_image_metadata(path)
+                result['fields'].update(fields)
+            if 'thumbnail' in steps:
+                result['thumbnail'], fields = render_thumbnail(path)
+                result['fields'].update(fields)
+        elif file_type == 'audio' and 'audio' in steps:
+            result['fields'].update(audio.analyze(path))
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'[:500]
+    return result
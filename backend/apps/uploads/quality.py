@@ -0,0 +1,75 @@
+"""
+Image quality scoring for blur, exposure and blank frames.
+
+Runs on the downscaled thumbnail that is generated anyway, so it costs no
+extra decode. NumPy is imported lazily; without it uploads are simply left
+unscored.
+"""
+from django.conf import settings
+
+# Histogram ends counted as clipped (0-255 luma)
+SHADOW_LEVEL = 16
+HIGHLIGHT_LEVEL = 240
+
+# Sharpness (Laplacian variance) at which the sharpness term saturates
+SHARPNESS_SCALE = 1000.0
+
+
+def _threshold(name, default):
+    return getattr(settings, name, default)
+
+
+def measure(img):
+    """Get sharpness, exposure stats and a quality issue for a PIL image.
+
+    Returns None when NumPy is not available.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    gray = np.asarray(img.convert('L'))
+    pixels = gray.size
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    levels = np.arange(256)
+    brightness = float(histogram @ levels) / pixels
+    contrast = float(np.sqrt(max(0.0, histogram @ (levels - brightness) ** 2 / pixels)))
+    shadows = float(histogram[:SHADOW_LEVEL].sum()) / pixels
+    highlights = float(histogram[HIGHLIGHT_LEVEL:].sum()) / pixels
+
+    # 4-neighbour Laplacian with array slicing, no convolution library needed
+    gray = gray.astype(np.float32)
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+        - 4 * gray[1:-1, 1:-1]
+    )
+    sharpness = float(laplacian.var()) if laplacian.size else 0.0
+
+    return {
+        'sharpness': round(sharpness, 2),
+        'brightness': round(brightness, 2),
+        'contrast': round(contrast, 2),
+        'quality_issue': _issue(sharpness, brightness, contrast, shadows, highlights),
+        'quality_score': round(_score(sharpness, brightness, contrast, shadows, highlights), 4),
+    }
+
+
+def _issue(sharpness, brightness, contrast, shadows, highlights):
+    if contrast < _threshold('QUALITY_UNIFORM_CONTRAST', 5.0):
+        return 'uniform'  # Black frames, pocket shots, lens covered
+    if brightness < _threshold('QUALITY_DARK_BRIGHTNESS', 40.0) or shadows > 0.6:
+        return 'dark'
+    if brightness > _threshold('QUALITY_BRIGHT_BRIGHTNESS', 220.0) or highlights > 0.6:
+        return 'overexposed'
+    if sharpness < _threshold('QUALITY_BLUR_SHARPNESS', 60.0):
+        return 'blurry'
+    return ''
+
+
+def _score(sharpness, brightness, contrast, shadows, highlights):
+    """Combine the measurements into 0..1, higher is better"""
+    sharp = min(1.0, sharpness / SHARPNESS_SCALE) ** 0.5
+    exposure = max(0.0, 1 - abs(brightness - 128) / 128 - shadows - highlights)
+    spread = min(1.0, contrast / 64)
+    return 0.5 * sharp + 0.3 * exposure + 0.2 * spread
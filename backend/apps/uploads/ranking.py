@@ -0,0 +1,67 @@
+"""
+"Best of" ranking for uploads.
+
+Each upload gets an engagement score (likes, views, comments and an optional
+quality factor) stored in the indexed ``rank_score`` column so the highlights
+ordering is an index scan. The score is the log of the engagement plus the
+creation time in units of RANKING_DECAY_SECONDS, so newer uploads rank higher
+without the score depending on when it was computed: an upload recomputed
+on a like stays comparable to rows that were not touched, and nothing has to
+be refreshed as time passes. ``refresh_rankings`` only rebuilds scores after
+the weights change.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Count
+
+DEFAULT_WEIGHTS = {
+    'like': 3.0,
+    'view': 0.2,
+    'comment': 2.0,
+}
+
+
+def compute_score(likes, views, comments, created_at, quality=None):
+    """Log engagement plus creation time ("hot" ranking), independent of the current time"""
+    weights = {**DEFAULT_WEIGHTS, **getattr(settings, 'RANKING_WEIGHTS', {})}
+    decay_seconds = getattr(settings, 'RANKING_DECAY_SECONDS', 45000)
+
+    engagement = 1 + weights['like'] * likes + weights['view'] * views + weights['comment'] * comments
+    if quality is not None:
+        # quality is 0..1, scale between half and one and a half times
+        engagement *= 0.5 + quality
+    # Ten times the engagement is worth RANKING_DECAY_SECONDS of age
+    return math.log10(max(engagement, 1)) + created_at.timestamp() / decay_seconds
+
+
+def update_rank_scores(queryset, batch_size=1000):
+    """Recompute rank_score for every upload in the queryset, returns rows updated"""
+    from .models import Upload
+
+    updated = 0
+    uploads = (
+        queryset.order_by('pk')
+        .annotate(num_comments=Count('comments'))
+        .only('id', 'like_count', 'view_count', 'created_at', 'quality_score', 'rank_score')
+    )
+    batch = []
+    for upload in uploads.iterator(chunk_size=batch_size):
+        upload.rank_score = compute_score(
+            upload.like_count, upload.view_count, upload.num_comments, upload.created_at,
+            quality=upload.quality_score
+        )
+        batch.append(upload)
+        if len(batch) >= batch_size:
+            updated += Upload.objects.bulk_update(batch, ['rank_score'])
+            batch = []
+    if batch:
+        updated += Upload.objects.bulk_update(batch, ['rank_score'])
+    return updated
+
+
+def update_rank_scores_for(upload_ids):
+    """Recompute scores for specific uploads"""
+    from .models import Upload
+
+    return update_rank_scores(Upload.objects.filter(pk__in=list(upload_ids)))
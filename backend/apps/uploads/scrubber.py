@@ -0,0 +1,116 @@
+"""
+Media integrity scrubbing.
+
+The media tree and every database reference to it are read as two streams
+sorted by path and merged, so memory stays flat no matter how many files
+there are: a file without a reference is an orphan, a reference without a
+file is missing.
+"""
+import heapq
+import os
+import threading
+import time
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models.functions import Collate
+
+# Media directories owned by the app, everything else under MEDIA_ROOT is left alone
+MEDIA_ROOTS = ('album_covers', 'qr_codes', 'thumbnails', 'uploads')
+
+MediaFile = namedtuple('MediaFile', 'name size mtime')
+Reference = namedtuple('Reference', 'name kind pk expected_size')
+
+
+def walk_sorted(root, prefix=''):
+    """Yield MediaFile for every file under ``root`` in path order"""
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+    # A directory sorts as 'name/' so the output is ordered by full path
+    entries.sort(key=lambda entry: entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name)
+    for entry in entries:
+        name = f'{prefix}{entry.name}'
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk_sorted(entry.path, f'{name}/')
+        elif entry.is_file(follow_symlinks=False):
+            stat = entry.stat(follow_symlinks=False)
+            yield MediaFile(name, stat.st_size, stat.st_mtime)
+
+
+def media_files(media_root):
+    for root in MEDIA_ROOTS:
+        yield from walk_sorted(os.path.join(media_root, root), f'{root}/')
+
+
+def _ordered(queryset, field):
+    if connection.vendor == 'postgresql':
+        # Byte order, the locale collation would not match the file walk
+        return queryset.order_by(Collate(field, 'C'))
+    return queryset.order_by(field)
+
+
+def _references(queryset, field, kind, size_field=None, chunk_size=2000):
+    columns = ['pk', field] + ([size_field] if size_field else [])
+    rows = _ordered(queryset.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}), field)
+    for row in rows.values_list(*columns).iterator(chunk_size=chunk_size):
+        yield Reference(row[1], kind, row[0], row[2] if size_field else None)
+
+
+def media_references():
+    """Yield Reference for every hot media file the database points at, in path order"""
+    from apps.albums.models import Album, AlbumSettings
+    from .models import Upload
+
+    return heapq.merge(
+        _references(Upload.objects.filter(storage_tier='hot'), 'file', 'file', 'file_size'),
+        _references(Upload.objects.all(), 'thumbnail', 'thumbnail'),
+        _references(Album.all_objects.all(), 'qr_code', 'qr_code'),
+        _references(AlbumSettings.objects.all(), 'cover_image', 'cover_image'),
+        key=lambda reference: reference.name,
+    )
+
+
+def merge(files, references):
+    """Yield (file, references) pairs by path; either side is None/empty when unmatched"""
+    files = iter(files)
+    references = iter(references)
+    current_file = next(files, None)
+    current_reference = next(references, None)
+    while current_file is not None or current_reference is not None:
+        if current_reference is None or (current_file is not None and current_file.name < current_reference.name):
+            yield current_file, []
+            current_file = next(files, None)
+            continue
+
+        # Several rows can point at the same file
+        name = current_reference.name
+        matched = []
+        while current_reference is not None and current_reference.name == name:
+            matched.append(current_reference)
+            current_reference = next(references, None)
+        if current_file is not None and current_file.name == name:
+            yield current_file, matched
+            current_file = next(files, None)
+        else:
+            yield None, matched
+
+
+class RateLimiter:
+    """Spaces out operations to at most ``rate`` per second across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
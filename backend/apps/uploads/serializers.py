@@ -1,7 +1,25 @@
+import array
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
 from rest_framework import serializers
+from .counters import counters
 from .models import Upload, UploadComment, UploadLike, UploadReport
 
 
+def is_liked_by_user(serializer, obj):
+    """Use the page-wide liked ids from the view when available"""
+    liked_upload_ids = serializer.context.get('liked_upload_ids')
+    if liked_upload_ids is not None:
+        return obj.pk in liked_upload_ids
+    request = serializer.context.get('request')
+    if request and request.user.is_authenticated:
+        return obj.likes.filter(user=request.user).exists()
+    return False
+
+
 class UploadSerializer(serializers.ModelSerializer):
     """Serializer for Upload model"""
     uploader_display_name = serializers.ReadOnlyField()
@@ -25,25 +43,101 @@ class UploadSerializer(serializers.ModelSerializer):
         )
 
 
+class FragmentListSerializer(serializers.ListSerializer):
+    """Builds list items from cached per-upload fragments, serializing only the misses.
+
+    A fragment is the child's representation without its ``volatile_fields``,
+    cached under the upload's id and updated_at, so it is shared by every
+    viewer. Volatile fields (counters, status, per-viewer flags) are taken
+    from the loaded rows on every request.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        child = self.child
+        request = self.context.get('request')
+        # Representations contain absolute URLs
+        host = request.build_absolute_uri('/') if request else ''
+        keys = {obj.pk: child.fragment_key(obj, host) for obj in items}
+        found = cache.get_many(list(keys.values()))
+
+        # A ?fields= subset can be cut from full fragments but must not be stored as one
+        sparse = getattr(child, 'sparse_fieldset', None) is not None
+        missing = {}
+        result = []
+        for obj in items:
+            key = keys[obj.pk]
+            fragment = found.get(key)
+            if fragment is None:
+                representation = child.to_representation(obj)
+                fragment = {
+                    name: value for name, value in representation.items()
+                    if name not in child.volatile_fields
+                }
+                if not sparse:
+                    missing[key] = fragment
+            result.append(child.overlay(obj, fragment))
+
+        if missing:
+            cache.set_many(missing, settings.UPLOAD_FRAGMENT_TIMEOUT)
+        return result
+
+
 class UploadListSerializer(serializers.ModelSerializer):
     """Serializer for upload list view"""
     uploader_display_name = serializers.ReadOnlyField()
     file_size_mb = serializers.ReadOnlyField()
     thumbnail_url = serializers.SerializerMethodField()
+    is_liked_by_user = serializers.SerializerMethodField()
+    
+    # Bump when the representation changes so cached fragments are not reused
+    fragment_version = 1
+    # Changed without touching updated_at (counters, bulk moderation) or per viewer
+    volatile_fields = ('view_count', 'like_count', 'status', 'is_liked_by_user')
+    # Columns read by fields that are not model fields, for ?fields= (see eventvault.fieldsets)
+    sparse_columns = {
+        'file_size_mb': ('file_size',),
+        'uploader_display_name': ('uploader_user', 'uploader_name'),
+        'thumbnail_url': ('thumbnail',),
+        'is_liked_by_user': (),
+    }
     
     class Meta:
         model = Upload
+        list_serializer_class = FragmentListSerializer
         fields = (
             'id', 'original_filename', 'file_type', 'file_size_mb',
-            'uploader_display_name', 'caption', 'thumbnail_url',
-            'view_count', 'like_count', 'status', 'created_at'
+            'uploader_display_name', 'caption', 'thumbnail_url', 'placeholder',
+            'dominant_color', 'width', 'height', 'view_count', 'like_count',
+            'is_liked_by_user', 'status', 'created_at'
+        )
+        read_only_fields = (
+            'id', 'file_size_mb', 'uploader_display_name', 'placeholder', 'dominant_color',
+            'width', 'height', 'view_count', 'like_count', 'is_liked_by_user', 'status', 'created_at'
         )
-        read_only_fields = ('id', 'file_size_mb', 'uploader_display_name', 'view_count', 'like_count', 'status', 'created_at')
     
     def get_thumbnail_url(self, obj):
         if obj.thumbnail:
             return self.context['request'].build_absolute_uri(obj.thumbnail.url)
         return None
+    
+    def get_is_liked_by_user(self, obj):
+        return is_liked_by_user(self, obj)
+    
+    def fragment_key(self, obj, host):
+        digest = hashlib.sha1(host.encode()).hexdigest()[:12]
+        return f'upload_fragment:v{self.fragment_version}:{obj.pk}:{obj.updated_at.timestamp()}:{digest}'
+    
+    def overlay(self, obj, fragment):
+        """Add the volatile fields of ``obj`` to a cached fragment, in field order"""
+        volatile = {}
+        for name in self.volatile_fields:
+            field = self.fields.get(name)
+            if field is None:
+                continue  # Left out by ?fields=
+            attribute = field.get_attribute(obj)
+            volatile[name] = None if attribute is None else field.to_representation(attribute)
+        return {name: fragment[name] if name in fragment else volatile[name] for name in self.fields}
 
 
 class UploadDetailSerializer(serializers.ModelSerializer):
@@ -53,23 +147,35 @@ class UploadDetailSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
     is_liked_by_user = serializers.SerializerMethodField()
+    waveform = serializers.SerializerMethodField()
+    
+    # Columns read by fields that are not model fields, for ?fields= (see eventvault.fieldsets)
+    sparse_columns = {
+        'file_size_mb': ('file_size',),
+        'uploader_display_name': ('uploader_user', 'uploader_name'),
+        'file_url': ('file',),
+        'thumbnail_url': ('thumbnail',),
+        'waveform': ('waveform',),
+        'is_liked_by_user': (),
+    }
     
     class Meta:
         model = Upload
         fields = (
             'id', 'album', 'file', 'file_url', 'original_filename', 'file_type',
             'file_size', 'file_size_mb', 'mime_type', 'thumbnail', 'thumbnail_url',
-            'width', 'height', 'duration', 'uploader_name', 'uploader_email',
+            'width', 'height', 'duration', 'waveform', 'uploader_name', 'uploader_email',
             'uploader_phone', 'uploader_user', 'uploader_display_name', 'caption',
             'message', 'exif_data', 'location_data', 'status', 'moderation_note',
             'view_count', 'like_count', 'download_count', 'is_liked_by_user',
-            'created_at', 'updated_at'
+            'quality_score', 'quality_issue', 'created_at', 'updated_at'
         )
         read_only_fields = (
             'id', 'album', 'file_size', 'file_size_mb', 'mime_type', 'thumbnail',
             'width', 'height', 'duration', 'exif_data', 'location_data',
             'status', 'moderation_note', 'view_count', 'like_count',
-            'download_count', 'is_liked_by_user', 'created_at', 'updated_at'
+            'download_count', 'is_liked_by_user', 'quality_score', 'quality_issue',
+            'created_at', 'updated_at'
         )
     
     def get_file_url(self, obj):
@@ -77,16 +183,19 @@ class UploadDetailSerializer(serializers.ModelSerializer):
             return self.context['request'].build_absolute_uri(obj.file.url)
         return None
     
+    def get_waveform(self, obj):
+        """Peaks as a flat [min, max, min, max, ...] list scaled to -127..127"""
+        if not obj.waveform:
+            return None
+        return list(array.array('b', bytes(obj.waveform)))
+    
     def get_thumbnail_url(self, obj):
         if obj.thumbnail:
             return self.context['request'].build_absolute_uri(obj.thumbnail.url)
         return None
     
     def get_is_liked_by_user(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return obj.likes.filter(user=user).exists()
-        return False
+        return is_liked_by_user(self, obj)
 
 
 class UploadCreateSerializer(serializers.ModelSerializer):
@@ -100,6 +209,7 @@ class UploadCreateSerializer(serializers.ModelSerializer):
         )
     
     def validate(self, attrs):
+        # An AlbumSnapshot, validation needs no database access
         album = self.context.get('album')
         if not album:
             raise serializers.ValidationError("Albüm bulunamadı.")
@@ -125,11 +235,10 @@ class UploadCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         album = self.context['album']
-        upload = Upload.objects.create(album=album, **validated_data)
+        upload = Upload.objects.create(album_id=album.id, **validated_data)
         
         # Increment album view count
-        album.view_count += 1
-        album.save(update_fields=['view_count'])
+        counters.incr(upload.album, 'view_count')
         
         return upload
 
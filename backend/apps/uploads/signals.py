@@ -0,0 +1,138 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.albums.manifests import sync_on_commit as sync_manifest_on_commit
+from apps.albums.models import Album, AlbumStats
+from apps.analytics.events import record_activity
+from eventvault.cache import invalidate_tags
+from .counters import counters_flushed
+from .facets import invalidate_facets
+from .moments import assign_moment, release_moment
+from .models import Upload, UploadComment, UploadLike
+from .ranking import update_rank_scores_for
+
+
+def refresh_rank_on_commit(upload_ids):
+    """Recompute ranks once the triggering transaction has committed"""
+    upload_ids = list(upload_ids)
+    transaction.on_commit(lambda: update_rank_scores_for(upload_ids))
+
+
+def touch_album_on_commit(album_id, owner_id=None):
+    """New album stamp once the change is visible, so ETags and cached responses move on.
+
+    Pass ``owner_id`` when the owner's album totals change too.
+    """
+    tags = [f'album:{album_id}']
+    if owner_id is not None:
+        tags.append(f'user_albums:{owner_id}')
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def album_owner_id(upload):
+    """Owner of the upload's album, None once the album row is gone"""
+    if Upload.album.is_cached(upload):
+        return upload.album.owner_id
+    return Album.all_objects.filter(pk=upload.album_id).values_list('owner_id', flat=True).first()
+
+
+@receiver(post_save, sender=Upload)
+def update_stats_on_upload_save(sender, instance, created, **kwargs):
+    """Keep album stats in sync with new uploads and status/type changes"""
+    if created:
+        deltas = {
+            'total_uploads': 1,
+            'total_bytes': instance.file_size,
+            AlbumStats.FILE_TYPE_FIELDS.get(instance.file_type, 'other_count'): 1,
+            AlbumStats.STATUS_FIELDS[instance.status]: 1,
+        }
+        AlbumStats.apply_delta(instance.album_id, last_upload_at=instance.created_at, **deltas)
+        record_activity(instance.album_id, 'upload')
+        refresh_rank_on_commit([instance.pk])
+        assign_moment(instance)
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        deltas = {}
+        if 'status' in loaded and loaded['status'] != instance.status:
+            deltas[AlbumStats.STATUS_FIELDS[loaded['status']]] = -1
+            deltas[AlbumStats.STATUS_FIELDS[instance.status]] = 1
+        if 'file_type' in loaded and loaded['file_type'] != instance.file_type:
+            deltas[AlbumStats.FILE_TYPE_FIELDS.get(loaded['file_type'], 'other_count')] = -1
+            deltas[AlbumStats.FILE_TYPE_FIELDS.get(instance.file_type, 'other_count')] = 1
+        if 'file_size' in loaded and loaded['file_size'] != instance.file_size:
+            deltas['total_bytes'] = instance.file_size - loaded['file_size']
+        AlbumStats.apply_delta(instance.album_id, **deltas)
+
+    instance._loaded_values = {field: getattr(instance, field) for field in Upload.TRACKED_FIELDS}
+    invalidate_facets(instance.album_id)
+    # The owner's upload total only moves on create and delete
+    touch_album_on_commit(instance.album_id, owner_id=album_owner_id(instance) if created else None)
+    sync_manifest_on_commit(instance.album_id)
+
+
+@receiver(post_delete, sender=Upload)
+def update_stats_on_upload_delete(sender, instance, **kwargs):
+    invalidate_facets(instance.album_id)
+    touch_album_on_commit(instance.album_id, owner_id=album_owner_id(instance))
+    sync_manifest_on_commit(instance.album_id)
+    release_moment(instance.moment_id)
+    AlbumStats.apply_delta(
+        instance.album_id,
+        total_uploads=-1,
+        total_bytes=-instance.file_size,
+        total_views=-instance.view_count,
+        # Not total_likes: the cascade already deleted each like through update_stats_on_unlike
+        total_downloads=-instance.download_count,
+        **{
+            AlbumStats.FILE_TYPE_FIELDS.get(instance.file_type, 'other_count'): -1,
+            AlbumStats.STATUS_FIELDS[instance.status]: -1,
+        }
+    )
+
+
+@receiver(post_save, sender=UploadLike)
+def update_stats_on_like(sender, instance, created, **kwargs):
+    if created:
+        AlbumStats.apply_delta(instance.upload.album_id, total_likes=1)
+        record_activity(instance.upload.album_id, 'like')
+        refresh_rank_on_commit([instance.upload_id])
+        touch_album_on_commit(instance.upload.album_id)
+
+
+@receiver(post_delete, sender=UploadLike)
+def update_stats_on_unlike(sender, instance, **kwargs):
+    album_id = Upload.objects.filter(pk=instance.upload_id).values_list('album_id', flat=True).first()
+    if album_id:
+        AlbumStats.apply_delta(album_id, total_likes=-1)
+        refresh_rank_on_commit([instance.upload_id])
+        touch_album_on_commit(album_id)
+
+
+@receiver(post_save, sender=UploadComment)
+def record_comment_activity(sender, instance, created, **kwargs):
+    if created:
+        record_activity(instance.upload.album_id, 'comment')
+        refresh_rank_on_commit([instance.upload_id])
+        touch_album_on_commit(instance.upload.album_id)
+
+
+@receiver(counters_flushed, sender=Upload)
+def update_stats_on_counters_flush(sender, deltas, **kwargs):
+    """Roll flushed view/download counters up into album stats"""
+    album_ids = dict(Upload.objects.filter(pk__in=deltas.keys()).values_list('id', 'album_id'))
+    per_album = {}
+    for pk, fields in deltas.items():
+        album_id = album_ids.get(Upload._meta.pk.to_python(pk))
+        if album_id is None:
+            continue
+        totals = per_album.setdefault(album_id, {'total_views': 0, 'total_downloads': 0})
+        totals['total_views'] += fields.get('view_count', 0)
+        totals['total_downloads'] += fields.get('download_count', 0)
+    for album_id, totals in per_album.items():
+        AlbumStats.apply_delta(album_id, **totals)
+        touch_album_on_commit(album_id)
+
+    viewed = [pk for pk, fields in deltas.items() if fields.get('view_count')]
+    if viewed:
+        refresh_rank_on_commit(viewed)
@@ -0,0 +1,452 @@
+import fnmatch
+import io
+import os
+import shutil
+import tempfile
+import time
+import wave
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.albums.tests import MediaTestCase, make_album, make_upload, make_user
+from apps.albums.models import AlbumStats
+from . import audio, layout, tiers
+from .counters import CounterService, counters, LocalCounterBuffer, RedisCounterBuffer
+from .management.commands import migrate_media_layout
+from .models import Upload
+from .serializers import UploadListSerializer
+from .ranking import compute_score
+
+
+class RankingTests(SimpleTestCase):
+
+    def test_score_does_not_depend_on_recompute_time(self):
+        created_at = datetime(2024, 6, 1, 12, tzinfo=dt_timezone.utc)
+        untouched = compute_score(0, 0, 0, created_at)
+        # Recomputed a week later after a like, still ahead of its untouched peer
+        liked = compute_score(1, 0, 0, created_at)
+        self.assertGreater(liked, untouched)
+
+    def test_newer_uploads_need_less_engagement(self):
+        created_at = datetime(2024, 6, 1, 12, tzinfo=dt_timezone.utc)
+        older = compute_score(10, 0, 0, created_at)
+        newer = compute_score(0, 0, 0, created_at + timedelta(days=2))
+        self.assertGreater(newer, older)
+
+
+class FFmpegTests(SimpleTestCase):
+    """audio.analyze_ffmpeg against stand-in ffmpeg scripts"""
+
+    def fake_ffmpeg(self, script):
+        fd, path = tempfile.mkstemp(suffix='.sh')
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'#!/bin/sh\n{script}\n')
+        os.chmod(path, 0o755)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_stalled_decoder_times_out(self):
+        # Fills the stderr pipe buffer, then hangs without closing stdout
+        ffmpeg = self.fake_ffmpeg('head -c 200000 /dev/zero >&2\nexec sleep 30')
+        started = time.monotonic()
+        with override_settings(FFMPEG_BINARY=ffmpeg, AUDIO_ANALYSIS_TIMEOUT=1):
+            with self.assertRaisesMessage(audio.AudioAnalysisError, 'timed out'):
+                audio.analyze_ffmpeg('song.mp3')
+        self.assertLess(time.monotonic() - started, 10)
+
+    def test_error_output_is_reported(self):
+        ffmpeg = self.fake_ffmpeg('echo "Invalid data found" >&2\nexit 1')
+        with override_settings(FFMPEG_BINARY=ffmpeg):
+            with self.assertRaisesMessage(audio.AudioAnalysisError, 'Invalid data found'):
+                audio.analyze_ffmpeg('song.mp3')
+
+    def test_decodes_stdout(self):
+        # One second of silence
+        ffmpeg = self.fake_ffmpeg(f'head -c {audio.FFMPEG_SAMPLE_RATE * 2} /dev/zero')
+        with override_settings(FFMPEG_BINARY=ffmpeg):
+            self.assertEqual(audio.analyze_ffmpeg('song.mp3').duration, 1)
+
+
+class UploadFacetTests(MediaTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = make_user('owner@example.com')
+        self.album = make_album(self.owner)
+        self.uploads = [make_upload(self.album, f'{i}.jpg') for i in range(3)]
+        self.uploads[0].caption = 'beach sunset'
+        self.uploads[0].save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/v1/uploads/album/{self.album.pk}/facets/'
+
+    def facet_total(self, data, facet):
+        return sum(entry['count'] for entry in data['facets'][facet])
+
+    def test_invalid_day_is_rejected(self):
+        for value in ('notaday', '2020-13-45', '2024-06-01,nope'):
+            response = self.client.get(self.url, {'day': value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn('day', response.json())
+
+    def test_valid_day(self):
+        response = self.client.get(self.url, {'day': '2024-06-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_counts_cover_the_whole_album(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(self.facet_total(data, 'file_type'), 3)
+
+    def test_counts_follow_search(self):
+        data = self.client.get(self.url, {'search': 'beach'}).json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(self.facet_total(data, 'file_type'), 1)
+        self.assertEqual(self.facet_total(data, 'status'), 1)
+
+
+class ColdStorageTests(MediaTestCase):
+
+    def setUp(self):
+        cold_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cold_root, ignore_errors=True)
+        patcher = mock.patch.dict(tiers.STORAGES, cold=FileSystemStorage(location=cold_root))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.upload = make_upload(make_album(make_user('owner@example.com')))
+        self.assertTrue(tiers.move_upload(self.upload, 'cold'))
+        self.assertFalse(default_storage.exists(self.upload.file.name))
+
+    def test_thumbnail_regeneration_rehydrates(self):
+        upload = Upload.objects.get(pk=self.upload.pk)
+        upload.thumbnail = None
+        self.assertTrue(upload.process_file())
+        self.assertEqual(Upload.objects.get(pk=upload.pk).storage_tier, 'hot')
+        self.assertTrue(default_storage.exists(upload.file.name))
+        self.assertTrue(default_storage.exists(upload.thumbnail.name))
+
+
+class FakeRedis:
+    """The hash commands RedisCounterBuffer uses, MULTI/EXEC runs the queue at once"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, key):
+        return int(self.hashes.pop(key, None) is not None)
+
+    def scan_iter(self, match):
+        return [key for key in list(self.hashes) if fnmatch.fnmatch(key, match)]
+
+
+class FakePipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args) for name, args in self.commands]
+
+
+class CounterTests(MediaTestCase):
+
+    def setUp(self):
+        self.upload = make_upload(make_album(make_user('owner@example.com')))
+        self.service = CounterService(LocalCounterBuffer(), flush_interval=3600, flush_threshold=100)
+        # Flushes in these tests are explicit
+        self.service._timer = mock.Mock()
+
+    def test_increments_are_buffered(self):
+        for _ in range(3):
+            self.service.incr(self.upload, 'view_count')
+        self.service.incr(self.upload, 'download_count')
+        self.assertEqual(Upload.objects.get(pk=self.upload.pk).view_count, 0)
+        merged, = self.service.merge_pending([Upload.objects.get(pk=self.upload.pk)], ['view_count'])
+        self.assertEqual(merged.view_count, 3)
+
+    def test_flush(self):
+        for _ in range(3):
+            self.service.incr(self.upload, 'view_count')
+        self.assertEqual(self.service.flush(), 1)
+        self.assertEqual(Upload.objects.get(pk=self.upload.pk).view_count, 3)
+        self.assertEqual(AlbumStats.objects.get(album_id=self.upload.album_id).total_views, 3)
+        self.assertEqual(self.service.pending([self.upload], ['view_count']), {})
+
+    def test_failed_flush_keeps_deltas(self):
+        self.service.incr(self.upload, 'view_count')
+        with mock.patch.object(self.service, '_write', side_effect=DatabaseError('down')), \
+                mock.patch('builtins.print'):
+            self.assertEqual(self.service.flush_quietly(), 0)
+        self.assertEqual(self.service.flush(), 1)
+        self.assertEqual(Upload.objects.get(pk=self.upload.pk).view_count, 1)
+
+    def test_threshold_flushes_inline(self):
+        service = CounterService(LocalCounterBuffer(), flush_interval=3600, flush_threshold=1)
+        service._timer = mock.Mock()
+        service.incr(self.upload, 'view_count')
+        self.assertEqual(Upload.objects.get(pk=self.upload.pk).view_count, 1)
+
+    def test_timer_starts_once(self):
+        service = CounterService(LocalCounterBuffer(), flush_interval=3600)
+        with mock.patch('threading.Thread.start') as start:
+            service.incr(self.upload, 'view_count')
+            service.incr(self.upload, 'view_count')
+        start.assert_called_once_with()
+        self.assertTrue(service._timer.daemon)
+
+    def test_command_needs_a_shared_buffer(self):
+        with override_settings(COUNTER_BUFFER_BACKEND='local'):
+            with self.assertRaises(CommandError):
+                call_command('flush_counters', stdout=io.StringIO())
+
+
+class RedisCounterBufferTests(SimpleTestCase):
+
+    def setUp(self):
+        self.buffer = RedisCounterBuffer.__new__(RedisCounterBuffer)
+        self.buffer._client = FakeRedis()
+        self.buffer._recovered = False
+
+    def test_drain_empties_the_hash(self):
+        self.assertEqual(self.buffer.add('uploads.upload:1:view_count', 2), 1)
+        self.assertEqual(self.buffer.add('uploads.upload:2:view_count', 1), 2)
+        self.assertEqual(self.buffer.get_many(['uploads.upload:1:view_count']), {'uploads.upload:1:view_count': 2})
+        self.assertEqual(self.buffer.drain(), {'uploads.upload:1:view_count': 2, 'uploads.upload:2:view_count': 1})
+        self.assertEqual(self.buffer._client.hashes, {})
+        self.assertEqual(self.buffer.drain(), {})
+
+    def test_drain_recovers_leftover_draining_hashes(self):
+        self.buffer._client.hashes[f'{RedisCounterBuffer.HASH_KEY}:draining:1'] = {'uploads.upload:1:view_count': '4'}
+        self.buffer.add('uploads.upload:1:view_count', 1)
+        self.assertEqual(self.buffer.drain(), {'uploads.upload:1:view_count': 5})
+        self.assertEqual(self.buffer._client.hashes, {})
+
+
+class MediaLayoutMigrationTests(MediaTestCase):
+
+    def setUp(self):
+        with override_settings(MEDIA_LAYOUT='flat'):
+            self.upload = make_upload(make_album(make_user('owner@example.com')))
+        self.old_names = [self.upload.file.name, self.upload.thumbnail.name]
+        # Files stored long before the migration
+        for name in self.old_names:
+            os.utime(default_storage.path(name), (time.time() - 7 * 86400,) * 2)
+
+    def migrate(self):
+        call_command('migrate_media_layout', sleep=0, stdout=io.StringIO())
+        return Upload.objects.get(pk=self.upload.pk)
+
+    def assertMigrated(self, upload):
+        for field, root in migrate_media_layout.MEDIA_FIELDS:
+            name = getattr(upload, field).name
+            self.assertRegex(name, layout.sharded_pattern(root))
+            self.assertTrue(default_storage.exists(name))
+        for name in self.old_names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_moves_files(self):
+        upload = self.migrate()
+        self.assertMigrated(upload)
+        # Running again finds nothing left to move
+        self.assertEqual(self.migrate().file.name, upload.file.name)
+
+    def test_dry_run_changes_nothing(self):
+        call_command('migrate_media_layout', sleep=0, dry_run=True, stdout=io.StringIO())
+        upload = Upload.objects.get(pk=self.upload.pk)
+        self.assertEqual([upload.file.name, upload.thumbnail.name], self.old_names)
+        for name in self.old_names:
+            self.assertTrue(default_storage.exists(name))
+
+    def test_new_names_survive_a_concurrent_scrub(self):
+        copy = migrate_media_layout.Command.copy
+
+        def copy_then_scrub(command, name, new_name):
+            # The row still points at the old name while the scrubber walks the tree
+            copied = copy(command, name, new_name)
+            call_command('scrub_media', rate=0, skip_thumbnails=True, stdout=io.StringIO())
+            return copied
+
+        with mock.patch.object(migrate_media_layout.Command, 'copy', copy_then_scrub):
+            upload = self.migrate()
+        self.assertMigrated(upload)
+
+
+class ScrubMediaTests(MediaTestCase):
+
+    def setUp(self):
+        self.upload = make_upload(make_album(make_user('owner@example.com')))
+        self.week_ago = time.time() - 7 * 86400
+        self.age(self.upload.file.name)
+        self.recent_orphan = default_storage.save('uploads/recent-orphan.jpg', ContentFile(b'data'))
+        self.old_orphan = self.age(default_storage.save('uploads/old-orphan.jpg', ContentFile(b'data')))
+
+    def age(self, name):
+        os.utime(default_storage.path(name), (self.week_ago, self.week_ago))
+        return name
+
+    def scrub(self, **options):
+        out = io.StringIO()
+        call_command('scrub_media', rate=0, skip_thumbnails=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_referenced_files_survive(self):
+        self.scrub()
+        self.assertTrue(default_storage.exists(self.upload.file.name))
+        self.assertTrue(default_storage.exists(self.upload.thumbnail.name))
+
+    def test_recent_orphan_survives(self):
+        self.scrub()
+        self.assertTrue(default_storage.exists(self.recent_orphan))
+
+    def test_old_orphan_is_removed(self):
+        output = self.scrub()
+        self.assertFalse(default_storage.exists(self.old_orphan))
+        self.assertIn('deleted: 1', output)
+
+    def test_dry_run_removes_nothing(self):
+        output = self.scrub(dry_run=True)
+        self.assertTrue(default_storage.exists(self.old_orphan))
+        self.assertIn(f'Orphan: {self.old_orphan}', output)
+
+    def test_missing_file_is_reported(self):
+        default_storage.delete(self.upload.file.name)
+        self.assertIn('missing: 1', self.scrub())
+
+
+class UploadFieldsetTests(MediaTestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner@example.com')
+        self.upload = make_upload(make_album(self.owner))
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/v1/uploads/album/{self.upload.album_id}/{self.upload.pk}/'
+        # retrieve() buffers a view, write it to the test database
+        self.addCleanup(counters.flush)
+
+    def test_fields_limit_output_and_columns(self):
+        with mock.patch.object(tiers, 'ensure_hot', wraps=tiers.ensure_hot) as ensure_hot:
+            response = self.client.get(self.url, {'fields': 'id,caption'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {'id', 'caption'})
+        deferred = ensure_hot.call_args.args[0].get_deferred_fields()
+        self.assertIn('exif_data', deferred)
+        # Read when a cold original is rehydrated
+        self.assertNotIn('file', deferred)
+        self.assertNotIn('storage_tier', deferred)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(self.url, {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': 'Bilinmeyen alanlar: nope'})
+
+
+class UploadFragmentTests(MediaTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.album = make_album(make_user('owner@example.com'))
+        make_upload(self.album, 'first.jpg')
+        make_upload(self.album, 'second.jpg')
+        self.context = {'request': Request(APIRequestFactory().get('/')), 'liked_upload_ids': set()}
+
+    def serialize(self):
+        """Serialized uploads and how many of them missed the fragment cache"""
+        uploads = Upload.objects.filter(album=self.album).order_by('original_filename')
+        with mock.patch.object(
+            UploadListSerializer, 'to_representation', autospec=True,
+            side_effect=UploadListSerializer.to_representation,
+        ) as to_representation:
+            data = UploadListSerializer(uploads, many=True, context=self.context).data
+        return data, to_representation.call_count
+
+    def test_cached_fragment_is_reused(self):
+        data, misses = self.serialize()
+        self.assertEqual(misses, 2)
+        Upload.objects.filter(album=self.album).update(view_count=7)
+        cached, misses = self.serialize()
+        self.assertEqual(misses, 0)
+        self.assertEqual(cached[0]['caption'], data[0]['caption'])
+        # Volatile fields come from the rows, not the fragment
+        self.assertEqual([item['view_count'] for item in cached], [7, 7])
+
+    def test_updated_at_invalidates_fragment(self):
+        self.serialize()
+        upload = Upload.objects.get(album=self.album, original_filename='first.jpg')
+        upload.caption = 'changed'
+        upload.save()
+        data, misses = self.serialize()
+        self.assertEqual(misses, 1)
+        self.assertEqual(data[0]['caption'], 'changed')
+
+
+class AudioAnalysisTests(MediaTestCase):
+
+    def setUp(self):
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(b'\x00\x10' * 8000)
+        self.upload = Upload.objects.create(
+            album=make_album(make_user('owner@example.com')), original_filename='song.wav',
+            file=SimpleUploadedFile('song.wav', buffer.getvalue(), 'audio/wav'),
+        )
+
+    def test_upload_is_not_analyzed_on_save(self):
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.file_type, 'audio')
+        self.assertIsNone(self.upload.duration)
+
+    def test_missing_analysis_is_run_by_reprocess(self):
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+        options = {'steps': 'audio', 'missing': True, 'workers': 1, 'checkpoint': checkpoint, 'stdout': io.StringIO()}
+        call_command('reprocess_uploads', **options)
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.duration, 1)
+        self.assertEqual(len(bytes(self.upload.waveform)), 100)
+
+        # Analyzed uploads are not selected again
+        out = io.StringIO()
+        call_command('reprocess_uploads', **{**options, 'stdout': out})
+        self.assertIn('Reprocessed 0 uploads', out.getvalue())
+
+    def test_missing_rejects_metadata_step(self):
+        with self.assertRaisesMessage(CommandError, 'metadata'):
+            call_command('reprocess_uploads', steps='metadata,audio', missing=True)
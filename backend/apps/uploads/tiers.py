@@ -0,0 +1,102 @@
+"""
+Hot/cold storage tiers for upload originals.
+
+Originals of archived or long-inactive albums are moved from the hot media
+storage to a cheaper cold storage (a local directory, or any Django storage
+class such as an S3-compatible backend). Thumbnails always stay hot. Reads go
+through ``ensure_hot``, which copies a cold original back on demand.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+
+def _build_cold_storage():
+    storage_class = import_string(getattr(
+        settings, 'COLD_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'
+    ))
+    options = dict(getattr(settings, 'COLD_STORAGE_OPTIONS', {}))
+    if storage_class.__name__ == 'FileSystemStorage':
+        options.setdefault('location', getattr(settings, 'COLD_STORAGE_ROOT', settings.BASE_DIR / 'cold_media'))
+    return storage_class(**options)
+
+
+cold_storage = SimpleLazyObject(_build_cold_storage)
+
+STORAGES = {
+    'hot': default_storage,
+    'cold': cold_storage,
+}
+
+
+def copy_file(name, source, target):
+    """Copy a stored file between storages under the same name"""
+    if target.exists(name):
+        return True  # Left behind by an interrupted move
+    if not source.exists(name):
+        return False
+    with source.open(name, 'rb') as content:
+        saved_name = target.save(name, content)
+    if saved_name != name:
+        target.delete(saved_name)
+        return False
+    return True
+
+
+def move_upload(upload, tier):
+    """Move an upload's original to ``tier``, returns True when moved"""
+    from .models import Upload
+
+    current = upload.storage_tier
+    if current == tier or not upload.file:
+        return False
+    name = upload.file.name
+    if not copy_file(name, STORAGES[current], STORAGES[tier]):
+        return False
+
+    now = timezone.now()
+    # Conditional so concurrent moves of the same upload cannot both win
+    moved = Upload.objects.filter(pk=upload.pk, storage_tier=current, file=name).update(
+        storage_tier=tier, tier_changed_at=now
+    )
+    if moved:
+        STORAGES[current].delete(name)
+        upload.storage_tier = tier
+        upload.tier_changed_at = now
+    return bool(moved)
+
+
+def ensure_hot(upload):
+    """Rehydrate a cold original before it is read or linked to"""
+    if upload.storage_tier == 'cold':
+        move_upload(upload, 'hot')
+    return upload
+
+
+def cold_candidates(now=None):
+    """Hot uploads whose originals the policy moves to cold storage"""
+    from .models import Upload
+
+    now = now or timezone.now()
+    inactive_since = now - timedelta(days=getattr(settings, 'COLD_STORAGE_INACTIVE_DAYS', 90))
+    expired_before = now - timedelta(days=getattr(settings, 'COLD_STORAGE_EXPIRED_DAYS', 30))
+    rehydrated_since = now - timedelta(days=getattr(settings, 'COLD_STORAGE_MIN_HOT_DAYS', 7))
+
+    album_policy = (
+        Q(album__status='archived')
+        | Q(album__expires_at__lt=expired_before)
+        | (Q(album__updated_at__lt=inactive_since) & (
+            Q(album__stats__last_upload_at__lt=inactive_since) | Q(album__stats__last_upload_at__isnull=True)
+        ))
+    )
+    return (
+        Upload.objects.filter(album_policy, storage_tier='hot')
+        .exclude(file='')
+        # Recently rehydrated files are in use again, leave them hot for a while
+        .exclude(tier_changed_at__gte=rehydrated_since)
+    )
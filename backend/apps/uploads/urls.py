@@ -11,12 +11,16 @@ urlpatterns = [
     path('album/<uuid:album_id>/', views.UploadListView.as_view(), name='album_uploads'),
     path('album/<uuid:album_id>/<uuid:id>/', views.UploadDetailView.as_view(), name='upload_detail'),
     path('album/<uuid:album_id>/stats/', views.upload_stats, name='upload_stats'),
+    path('album/<uuid:album_id>/facets/', views.UploadFacetView.as_view(), name='upload_facets'),
+    path('album/<uuid:album_id>/timeline/', views.upload_timeline, name='upload_timeline'),
+    path('album/<uuid:album_id>/map/', views.upload_map, name='upload_map'),
     path('album/<uuid:album_id>/bulk-moderate/', views.bulk_upload_moderation, name='bulk_moderation'),
     
     # Upload interactions
     path('album/<uuid:album_id>/<uuid:upload_id>/comments/', views.UploadCommentView.as_view(), name='upload_comments'),
     path('album/<uuid:album_id>/<uuid:upload_id>/like/', views.UploadLikeView.as_view(), name='upload_like'),
     path('album/<uuid:album_id>/<uuid:upload_id>/report/', views.UploadReportView.as_view(), name='upload_report'),
+    path('album/<uuid:album_id>/<uuid:upload_id>/download/', views.upload_download, name='upload_download'),
     
     # Moderation
     path('moderate/<uuid:id>/', views.UploadModerationView.as_view(), name='upload_moderation'),
@@ -1,12 +1,26 @@
 from rest_framework import status, generics, permissions, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Q, Count, Min, Max, Avg
+from django.db.models.functions import TruncDate, Substr
 from django.db import models
 
-from apps.albums.models import Album
+from apps.albums.manifests import sync_on_commit as sync_manifest_on_commit
+from apps.albums.models import Album, AlbumSettings, AlbumStats
+from apps.albums.snapshots import get_album_snapshot
+from apps.analytics.events import record_activity
+from apps.search.filters import FullTextSearchFilter
+from eventvault.cache import TieredCache, invalidate_tags
+from eventvault.conditional import ConditionalGetMixin
+from eventvault.fieldsets import SparseFieldsetMixin
+from . import tiers
+from .counters import counters
+from .facets import UploadFacets, invalidate_facets, parse_selection
 from .models import Upload, UploadComment, UploadLike, UploadReport
 from .serializers import (
     UploadSerializer, UploadListSerializer, UploadDetailSerializer,
@@ -14,47 +28,136 @@ from .serializers import (
     UploadReportSerializer, UploadModerationSerializer
 )
 
+upload_stats_cache = TieredCache('upload_stats')
 
-class UploadListView(generics.ListAPIView):
+
+class UploadListView(ConditionalGetMixin, SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = UploadListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['original_filename', 'caption', 'message', 'uploader_name']
-    ordering_fields = ['created_at', 'view_count', 'like_count']
-    ordering = ['-created_at']
+    filter_backends = [filters.OrderingFilter, FullTextSearchFilter]
+    ordering_fields = ['created_at', 'taken_at', 'view_count', 'like_count', 'rank_score', 'quality_score']
+    # Fragment keys and pending view counts
+    sparse_required_columns = ('updated_at', 'view_count')
+    # Short keys for ?compact=1, see eventvault.renderers
+    compact_keys = {
+        'original_filename': 'fn', 'file_type': 'ft', 'file_size_mb': 'sz', 'uploader_display_name': 'by',
+        'caption': 'c', 'thumbnail_url': 'th', 'placeholder': 'ph', 'dominant_color': 'dc', 'width': 'w',
+        'height': 'h', 'view_count': 'vc', 'like_count': 'lc', 'is_liked_by_user': 'lk', 'status': 'st',
+        'created_at': 'ca',
+    }
+
+    @property
+    def ordering(self):
+        """Order by capture time when the album is auto organized by date"""
+        auto_organize = AlbumSettings.objects.filter(
+            album_id=self.kwargs.get('album_id')
+        ).values_list('auto_organize_by_date', flat=True).first()
+        return ['taken_at'] if auto_organize else ['-created_at']
 
     def get_queryset(self):
         album_id = self.kwargs.get('album_id')
-        return Upload.objects.filter(album_id=album_id, album__owner=self.request.user)
+        queryset = Upload.objects.filter(
+            album_id=album_id, album__owner=self.request.user, album__deleted_at__isnull=True
+        )
+        
+        # Moderation shortcut: ?quality=bad lists likely blurry, dark or blank shots
+        quality = self.request.query_params.get('quality')
+        if quality == 'bad':
+            queryset = queryset.exclude(quality_issue='')
+        elif quality == 'good':
+            queryset = queryset.filter(quality_issue='')
+        elif quality and quality in dict(Upload.QUALITY_ISSUES):
+            queryset = queryset.filter(quality_issue=quality)
+        return queryset
+
+    def get_search_scope(self):
+        return self.kwargs.get('album_id')
+
+    def get_etag_tags(self):
+        return [f'album:{self.kwargs.get("album_id")}']
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            counters.merge_pending(page, ['view_count'])
+            self.liked_upload_ids = UploadLike.liked_upload_ids(self.request.user, page)
+        return page
 
-class UploadDetailView(generics.RetrieveUpdateDestroyAPIView):
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if hasattr(self, 'liked_upload_ids'):
+            context['liked_upload_ids'] = self.liked_upload_ids
+        return context
+
+
+class UploadFacetView(UploadListView):
+    """Album uploads filtered by facets, with counts for every facet value"""
+
+    def get_facets(self):
+        if not hasattr(self, '_facets'):
+            album = get_object_or_404(Album, id=self.kwargs.get('album_id'), owner=self.request.user)
+            self._facets = UploadFacets(album.id, parse_selection(self.request.query_params))
+        return self._facets
+
+    def get_queryset(self):
+        return self.get_facets().filter(super().get_queryset())
+
+    def get_count_queryset(self):
+        """Uploads the facet counts cover, None for the whole album"""
+        params = self.request.query_params
+        if not params.get('quality') and not params.get(api_settings.SEARCH_PARAM):
+            return None
+        # Search and quality narrow the results, the counts must match them
+        return self.filter_queryset(super().get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['facets'] = self.get_facets().counts(self.get_count_queryset())
+        return response
+
+
+class UploadDetailView(SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UploadDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'id'
+    # Read by retrieve() for counters, activity and rehydration
+    sparse_required_columns = ('album', 'file', 'storage_tier', 'view_count', 'download_count')
 
     def get_queryset(self):
         album_id = self.kwargs.get('album_id')
-        return Upload.objects.filter(album_id=album_id, album__owner=self.request.user)
+        return Upload.objects.filter(
+            album_id=album_id, album__owner=self.request.user, album__deleted_at__isnull=True
+        )
 
     def retrieve(self, request, *args, **kwargs):
         upload = self.get_object()
-        upload.view_count += 1
-        upload.save(update_fields=['view_count'])
-        return super().retrieve(request, *args, **kwargs)
+        counters.incr(upload, 'view_count')
+        record_activity(upload.album_id, 'view')
+        counters.merge_pending([upload], ['view_count', 'download_count'])
+        tiers.ensure_hot(upload)
+        serializer = self.get_serializer(upload)
+        return Response(serializer.data)
 
 
 class AnonymousUploadView(generics.CreateAPIView):
     serializer_class = UploadCreateSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['album'] = self.album
+        return context
+
     def create(self, request, *args, **kwargs):
-        access_code = self.kwargs.get('access_code')
-        album = get_object_or_404(Album, access_code=access_code, is_active=True)
+        # Cached snapshot, rejected uploads never touch the database
+        self.album = get_album_snapshot(self.kwargs.get('access_code'))
+        if self.album is None:
+            raise Http404
         
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            upload = serializer.save(album=album)
+            upload = serializer.save()
+            album = upload.album
             
             # Send notification to album owner
             try:
@@ -89,7 +192,7 @@ class UploadCommentView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         upload_id = self.kwargs.get('upload_id')
         upload = get_object_or_404(Upload, id=upload_id)
-        serializer.save(upload=upload, user=self.request.user)
+        serializer.save(upload=upload, author=self.request.user)
 
 
 class UploadLikeView(generics.CreateAPIView):
@@ -100,19 +203,9 @@ class UploadLikeView(generics.CreateAPIView):
         upload_id = self.kwargs.get('upload_id')
         upload = get_object_or_404(Upload, id=upload_id)
         
-        # Check if user already liked
-        existing_like = UploadLike.objects.filter(upload=upload, user=request.user).first()
-        if existing_like:
-            existing_like.delete()
-            upload.like_count = max(0, upload.like_count - 1)
-            upload.save()
+        if not UploadLike.toggle(upload, request.user):
             return Response({'message': 'Beğeni kaldırıldı.'}, status=status.HTTP_200_OK)
         
-        # Create new like
-        UploadLike.objects.create(upload=upload, user=request.user)
-        upload.like_count += 1
-        upload.save()
-        
         return Response({'message': 'Beğenildi!'}, status=status.HTTP_201_CREATED)
 
 
@@ -135,20 +228,141 @@ class UploadModerationView(generics.UpdateAPIView):
         return Upload.objects.all()
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_download(request, album_id, upload_id):
+    upload = get_object_or_404(
+        Upload, id=upload_id, album_id=album_id, album__owner=request.user, album__deleted_at__isnull=True
+    )
+    counters.incr(upload, 'download_count')
+    record_activity(upload.album_id, 'download')
+    tiers.ensure_hot(upload)
+    return Response({
+        'file_url': request.build_absolute_uri(upload.file.url)
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def upload_stats(request, album_id):
+    def compute():
+        album = get_object_or_404(Album.objects.select_related('stats'), id=album_id, owner=request.user)
+        album_stats = album.get_stats()
+        return {
+            'total_uploads': album_stats.total_uploads,
+            'total_views': album_stats.total_views,
+            'total_likes': album_stats.total_likes,
+            'total_downloads': album_stats.total_downloads,
+            'total_size_mb': album_stats.total_size_mb,
+            'last_upload_at': album_stats.last_upload_at,
+            'file_type_breakdown': album_stats.file_type_breakdown,
+        }
+    
+    # Per user, only owners ever get an entry
+    stats = upload_stats_cache.get_or_set(
+        f'{request.user.pk}:{album_id}', compute,
+        timeout=settings.CACHE_STATS_TIMEOUT, tags=[f'album:{album_id}']
+    )
+    return Response(stats, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_timeline(request, album_id):
+    """Bucket headers with counts and offsets into the taken_at ordered gallery"""
     album = get_object_or_404(Album, id=album_id, owner=request.user)
-    uploads = Upload.objects.filter(album=album)
+    group = request.query_params.get('group', 'moment')
     
-    stats = {
-        'total_uploads': uploads.count(),
-        'total_views': uploads.aggregate(total=models.Sum('view_count'))['total'] or 0,
-        'total_likes': uploads.aggregate(total=models.Sum('like_count'))['total'] or 0,
-        'file_type_breakdown': uploads.values('file_type').annotate(count=models.Count('id')),
-    }
+    if group == 'day':
+        rows = (
+            Upload.objects.filter(album=album)
+            .annotate(day=TruncDate('taken_at'))
+            .values('day')
+            .annotate(count=Count('id'), start_at=Min('taken_at'), end_at=Max('taken_at'))
+            .order_by('day')
+        )
+        buckets = [
+            {'key': row['day'].isoformat(), 'start_at': row['start_at'], 'end_at': row['end_at'], 'count': row['count']}
+            for row in rows
+        ]
+    elif group == 'moment':
+        buckets = [
+            {'key': moment.id, 'start_at': moment.start_at, 'end_at': moment.end_at, 'count': moment.upload_count}
+            for moment in album.moments.order_by('start_at')
+        ]
+    else:
+        return Response({'error': 'Geçersiz gruplama.'}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(stats, status=status.HTTP_200_OK)
+    offset = 0
+    for bucket in buckets:
+        bucket['offset'] = offset
+        offset += bucket['count']
+    
+    return Response({'group': group, 'total': offset, 'buckets': buckets}, status=status.HTTP_200_OK)
+
+
+# Geohash length used for clusters at each map zoom level (0-20)
+MAP_ZOOM_PRECISION = [1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 7, 7, 8, 8, 9]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_map(request, album_id):
+    """Cluster geotagged uploads inside a bounding box by geohash cell"""
+    album = get_object_or_404(Album, id=album_id, owner=request.user)
+    
+    try:
+        zoom = min(max(int(request.query_params.get('zoom', 0)), 0), len(MAP_ZOOM_PRECISION) - 1)
+        bbox = request.query_params.get('bbox')
+        min_lon, min_lat, max_lon, max_lat = (
+            [float(value) for value in bbox.split(',')] if bbox else (-180, -90, 180, 90)
+        )
+    except ValueError:
+        return Response(
+            {'error': 'bbox "min_lon,min_lat,max_lon,max_lat" ve zoom sayısal olmalıdır.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    queryset = Upload.objects.filter(album=album, latitude__gte=min_lat, latitude__lte=max_lat)
+    if min_lon <= max_lon:
+        queryset = queryset.filter(longitude__gte=min_lon, longitude__lte=max_lon)
+    else:
+        # The box crosses the antimeridian
+        queryset = queryset.filter(Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon))
+    
+    precision = MAP_ZOOM_PRECISION[zoom]
+    clusters = (
+        queryset.annotate(cell=Substr('geohash', 1, precision))
+        .values('cell')
+        .annotate(
+            count=Count('id'),
+            center_latitude=Avg('latitude'),
+            center_longitude=Avg('longitude'),
+            min_latitude=Min('latitude'),
+            min_longitude=Min('longitude'),
+            max_latitude=Max('latitude'),
+            max_longitude=Max('longitude'),
+        )
+        .order_by('-count')
+    )
+    
+    return Response({
+        'zoom': zoom,
+        'precision': precision,
+        'clusters': [
+            {
+                'cell': cluster['cell'],
+                'count': cluster['count'],
+                'latitude': cluster['center_latitude'],
+                'longitude': cluster['center_longitude'],
+                'bounds': [
+                    cluster['min_longitude'], cluster['min_latitude'],
+                    cluster['max_longitude'], cluster['max_latitude'],
+                ],
+            }
+            for cluster in clusters
+        ],
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -169,4 +383,11 @@ def bulk_upload_moderation(request, album_id):
     elif action == 'delete':
         uploads.delete()
     
+    # Bulk updates bypass the stats and facet signals
+    if action != 'delete':
+        AlbumStats.rebuild(album_id)
+        invalidate_facets(album_id)
+        invalidate_tags(f'album:{album_id}')
+        sync_manifest_on_commit(album_id)
+    
     return Response({'message': f'{uploads.count()} dosya {action} edildi.'}, status=status.HTTP_200_OK) 
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+Two-tier cache for computed responses.
+
+L1 is a small per-process LRU whose entries live for a few seconds, L2 is the
+shared Django cache (Redis in production). Every entry records the version
+stamps of its tags when it was computed; ``invalidate_tags`` gives a tag a new
+stamp, after which L2 entries written under the old one are ignored. Other
+processes notice when their L1 entries run out, which bounds staleness to
+CACHE_LOCAL_TIMEOUT. That only holds when every process uses the same L2:
+with a per-process backend (CACHE_SHARED off) an invalidation cannot reach the
+other processes, so entries are kept for CACHE_LOCAL_TIMEOUT at most.
+
+Stampedes are avoided in three ways: entries are recomputed a little before
+they expire with a probability that grows towards expiry (XFetch), only one
+thread per process and one process overall recompute a key at a time, and
+while that happens the others keep serving the previous value.
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+# value, tag stamps, logical expiry (epoch seconds), seconds it took to compute
+Entry = namedtuple('Entry', 'value tags expires_at delta')
+
+METRICS = ('l1_hits', 'l2_hits', 'misses', 'stale', 'early_refreshes', 'coalesced')
+METRICS_KEY = 'tiered_cache_metrics'
+
+
+def _tag_key(tag):
+    return f'cache_tag:{tag}'
+
+
+def new_stamp():
+    """Random tag stamp, prefixed with the time so it can double as a modification date"""
+    return f'{time.time():.6f}-{uuid.uuid4().hex[:12]}'
+
+
+def stamp_time(stamp):
+    """Epoch seconds a stamp was created at, or None"""
+    try:
+        return float(stamp.split('-', 1)[0])
+    except (AttributeError, ValueError):
+        return None
+
+
+def tag_stamps(tags):
+    """Current stamps of the tags, giving tags without one a fresh stamp"""
+    keys = [_tag_key(tag) for tag in tags]
+    found = shared_cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            shared_cache.add(key, new_stamp(), timeout=None)
+        found.update(shared_cache.get_many(missing))
+    return [found.get(key) for key in keys]
+
+
+def request_key(request):
+    """Cache key part for a GET request, absolute because responses contain absolute links"""
+    return hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+
+
+def invalidate_tags(*tags):
+    """Drop every entry cached under any of these tags, in this process and in L2"""
+    tags = [tag for tag in tags if tag]
+    if not tags:
+        return
+    for instance in list(TieredCache.instances):
+        instance.forget_tags(tags)
+    # Stamps never expire, a lost stamp could make an old entry current again
+    shared_cache.set_many(
+        {_tag_key(tag): new_stamp() for tag in tags}, timeout=None
+    )
+
+
+class TieredCache:
+    """Per-process LRU in front of the shared cache, for one namespace of keys.
+
+    ``version`` is part of every key, bump it when the cached payload changes
+    shape so old entries are not read back after a deploy.
+    """
+    instances = []
+
+    def __init__(self, namespace, timeout=None, version=1, beta=1.0, local_size=None):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.local_size = local_size
+        self.version = version
+        self.beta = beta
+        self._local = OrderedDict()  # key -> (entry, local deadline, tags)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._metrics = defaultdict(int)
+        self._unflushed = defaultdict(int)
+        self._metrics_flushed_at = time.monotonic()
+        TieredCache.instances.append(self)
+
+    def make_key(self, key):
+        return f'{self.namespace}:v{self.version}:{key}'
+
+    def get_or_set(self, key, producer, timeout=None, tags=()):
+        """Get the cached value for ``key``, calling ``producer()`` to compute it when needed"""
+        key = self.make_key(key)
+        timeout = timeout or self.timeout or settings.CACHE_DEFAULT_TIMEOUT
+        if not settings.CACHE_SHARED:
+            # Invalidations stay in this process, bound what the others can serve
+            timeout = min(timeout, settings.CACHE_LOCAL_TIMEOUT)
+        tags = tuple(tags)
+
+        entry = self._local_get(key)
+        if entry is not None:
+            self._count('l1_hits')
+            return entry.value
+
+        # Entry and tag stamps in one round trip
+        tag_keys = [_tag_key(tag) for tag in tags]
+        found = shared_cache.get_many([key] + tag_keys)
+        stamps = tuple(found.get(tag_key) for tag_key in tag_keys)
+        if None in stamps:
+            # Never store under a missing stamp: if the stamp were evicted later,
+            # entries invalidated since would match None again
+            stamps = tuple(tag_stamps(tags))
+        entry = found.get(key)
+        if entry is not None and entry.tags != stamps:
+            entry = None  # Written before a tag was invalidated
+
+        if entry is not None:
+            if not self._should_refresh(entry):
+                self._count('l2_hits')
+                self._local_set(key, entry, tags)
+                return entry.value
+            # Due for a refresh: one caller recomputes, the rest keep serving this value
+            if not self._acquire(key):
+                self._count('stale')
+                return entry.value
+            self._count('early_refreshes')
+            return self._compute(key, producer, timeout, tags, stamps, owns_lock=True)
+
+        self._count('misses')
+        return self._compute(key, producer, timeout, tags, stamps)
+
+    def delete(self, key):
+        key = self.make_key(key)
+        with self._lock:
+            self._local.pop(key, None)
+        shared_cache.delete(key)
+
+    def forget_tags(self, tags):
+        """Drop local entries carrying any of these tags"""
+        tags = set(tags)
+        with self._lock:
+            for key in [key for key, (_, _, entry_tags) in self._local.items() if tags.intersection(entry_tags)]:
+                del self._local[key]
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        """Counters of this process since start, with the overall hit ratio"""
+        with self._lock:
+            stats = {metric: self._metrics[metric] for metric in METRICS}
+        return dict(stats, hit_ratio=hit_ratio(stats))
+
+    def _compute(self, key, producer, timeout, tags, stamps, owns_lock=False):
+        # One thread per key in this process
+        with self._key_lock(key):
+            entry = self._local_get(key)
+            if entry is not None:
+                self._count('coalesced')
+                return entry.value
+
+            # One process per key overall, the others wait briefly for its result
+            locked = owns_lock or self._acquire(key)
+            if not locked:
+                entry = self._wait_for(key, stamps)
+                if entry is not None:
+                    self._count('coalesced')
+                    self._local_set(key, entry, tags)
+                    return entry.value
+
+            try:
+                started = time.monotonic()
+                value = producer()
+                delta = time.monotonic() - started
+                entry = Entry(value, stamps, time.time() + timeout, delta)
+                if None not in stamps:
+                    # Kept past its expiry so there is something to serve while it is recomputed
+                    shared_cache.set(key, entry, timeout + settings.CACHE_STALE_TIMEOUT)
+                    self._local_set(key, entry, tags)
+            finally:
+                if locked:
+                    shared_cache.delete(self._lock_key(key))
+                self._forget_key_lock(key)
+        return value
+
+    def _should_refresh(self, entry):
+        """XFetch: expired, or early with a probability that grows towards expiry"""
+        jitter = -entry.delta * self.beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= entry.expires_at
+
+    def _lock_key(self, key):
+        return f'{key}:lock'
+
+    def _acquire(self, key):
+        return shared_cache.add(self._lock_key(key), 1, settings.CACHE_LOCK_TIMEOUT)
+
+    def _wait_for(self, key, stamps):
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = shared_cache.get(key)
+            if entry is not None and entry.tags == stamps and entry.expires_at > time.time():
+                return entry
+            if shared_cache.get(self._lock_key(key)) is None:
+                return None  # The other process gave up
+        return None
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _forget_key_lock(self, key):
+        with self._lock:
+            self._key_locks.pop(key, None)
+
+    def _local_get(self, key):
+        with self._lock:
+            local = self._local.get(key)
+            if local is None:
+                return None
+            entry, deadline, _ = local
+            if time.monotonic() >= deadline or time.time() >= entry.expires_at:
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry
+
+    def _local_set(self, key, entry, tags):
+        with self._lock:
+            self._local[key] = (entry, time.monotonic() + settings.CACHE_LOCAL_TIMEOUT, tags)
+            self._local.move_to_end(key)
+            while len(self._local) > (self.local_size or settings.CACHE_LOCAL_SIZE):
+                self._local.popitem(last=False)
+
+    def _count(self, metric):
+        with self._lock:
+            self._metrics[metric] += 1
+            self._unflushed[metric] += 1
+            due = time.monotonic() - self._metrics_flushed_at >= settings.CACHE_METRICS_INTERVAL
+            if due:
+                pending, self._unflushed = self._unflushed, defaultdict(int)
+                self._metrics_flushed_at = time.monotonic()
+        if due:
+            self._flush_metrics(pending)
+
+    def _flush_metrics(self, pending):
+        """Add this process's counts to the totals in the shared cache"""
+        for metric, amount in pending.items():
+            if not amount:
+                continue
+            key = f'{METRICS_KEY}:{self.namespace}:{metric}'
+            try:
+                shared_cache.incr(key, amount)
+            except ValueError:
+                if not shared_cache.add(key, amount, timeout=None):
+                    shared_cache.incr(key, amount)
+
+
+def hit_ratio(stats):
+    # Coalesced lookups are counted as misses first but did not compute anything
+    hits = stats['l1_hits'] + stats['l2_hits'] + stats['stale'] + stats['coalesced']
+    total = stats['l1_hits'] + stats['l2_hits'] + stats['stale'] + stats['misses'] + stats['early_refreshes']
+    return round(hits / total, 4) if total else None
+
+
+def shared_metrics():
+    """Counters flushed by every process, per namespace"""
+    namespaces = sorted({instance.namespace for instance in TieredCache.instances})
+    keys = {
+        f'{METRICS_KEY}:{namespace}:{metric}': (namespace, metric)
+        for namespace in namespaces for metric in METRICS
+    }
+    found = shared_cache.get_many(list(keys))
+    result = {}
+    for namespace in namespaces:
+        stats = {metric: found.get(f'{METRICS_KEY}:{namespace}:{metric}', 0) for metric in METRICS}
+        result[namespace] = dict(stats, hit_ratio=hit_ratio(stats))
+    return result
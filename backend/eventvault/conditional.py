@@ -0,0 +1,64 @@
+"""
+Conditional GET for API views.
+
+ETag and Last-Modified are derived from the stamps of cache tags (see
+eventvault.cache), which are replaced whenever something the response shows
+changes. Checking If-None-Match therefore costs one cache round trip, and a
+client with a current copy gets 304 Not Modified before any query or
+serializer runs. Stamps are only trustworthy when every process reads them
+from the same cache, so nothing is done unless CACHE_SHARED is set: with a
+per-process cache a worker that missed an invalidation would keep answering
+304 for stale data.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import stamp_time, tag_stamps
+
+
+class ConditionalGetMixin:
+    """Adds ETag/Last-Modified to GET and answers matching requests with 304.
+
+    ``get_etag_tags`` lists the tags covering everything in the response, or
+    returns None to skip conditional handling for the request. Bump
+    ``etag_version`` when the representation changes shape.
+    """
+    etag_version = 1
+
+    def get_etag_tags(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        tags = self.get_etag_tags() if settings.CACHE_SHARED else None
+        if tags is None:
+            return super().get(request, *args, **kwargs)
+
+        # Stamps are read before the response is built, a change while it is
+        # built leaves the client with an ETag that no longer matches
+        stamps = tag_stamps(tags)
+        etag = self.make_etag(request, stamps)
+        times = [stamp_time(stamp) for stamp in stamps]
+        last_modified = int(max(times)) if times and None not in times else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            # Always revalidate, the response is per user
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
+
+    def make_etag(self, request, stamps):
+        user = request.user.pk if request.user.is_authenticated else ''
+        parts = [
+            type(self).__name__, str(self.etag_version), str(user), request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''), *[str(stamp) for stamp in stamps],
+        ]
+        return quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
@@ -0,0 +1,101 @@
+"""
+Sparse fieldsets for API views.
+
+``?fields=id,thumbnail_url`` keeps only the listed serializer fields,
+``?omit=exif_data`` drops fields from the full set. The query is narrowed to
+match: fields backed by a model field load that column, other fields list
+the columns they read in their serializer's ``sparse_columns``. When the
+columns of a kept field cannot be worked out every column is loaded, so a
+fieldset never costs a query per row.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+def split_names(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def field_columns(serializer, name):
+    """Model columns a serializer field reads, or None when unknown"""
+    sparse_columns = getattr(serializer, 'sparse_columns', {})
+    if name in sparse_columns:
+        return set(sparse_columns[name])
+    source = serializer.fields[name].source
+    if source == '*':
+        return None
+    try:
+        field = serializer.Meta.model._meta.get_field(source.split('.')[0])
+    except FieldDoesNotExist:
+        return None  # A property
+    # Reverse relations and many-to-many fields are read by queries of their own
+    return {field.name} if field.concrete else set()
+
+
+def columns_for(serializer, names):
+    columns = set()
+    for name in names:
+        needed = field_columns(serializer, name)
+        if needed is None:
+            return None
+        columns |= needed
+    return columns
+
+
+class SparseFieldsetMixin:
+    """Lets GET requests pick serializer fields with ?fields= and ?omit=.
+
+    ``sparse_required_columns`` are loaded whatever the fieldset, for columns
+    the view itself reads.
+    """
+    sparse_required_columns = ()
+
+    def get_fieldset(self):
+        """Names of the serializer fields to render, None for all of them"""
+        if hasattr(self, '_fieldset'):
+            return self._fieldset
+        self._fieldset = None
+        params = self.request.query_params
+        if self.request.method not in ('GET', 'HEAD') or not ('fields' in params or 'omit' in params):
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        fields = split_names(params.get('fields')) if 'fields' in params else set(available)
+        omit = split_names(params.get('omit'))
+        unknown = (fields | omit) - set(available)
+        if unknown:
+            raise ValidationError({'fields': f'Bilinmeyen alanlar: {", ".join(sorted(unknown))}'})
+        self._fieldset = [name for name in available if name in fields and name not in omit]
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in fieldset:
+                    target.fields.pop(name)
+            target.sparse_fieldset = tuple(fieldset)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+
+        serializer = self.get_serializer_class()()
+        kept = columns_for(serializer, fieldset)
+        related = queryset.query.select_related
+        if kept is None or related is True:
+            return queryset
+        # Relations joined by select_related cannot be deferred
+        kept |= set(related or ()) | set(self.sparse_required_columns)
+
+        if 'fields' in self.request.query_params:
+            return queryset.only(*kept)
+        dropped = set()
+        for name in set(serializer.fields) - set(fieldset):
+            dropped |= field_columns(serializer, name) or set()
+        return queryset.defer(*(dropped - kept)) if dropped - kept else queryset
@@ -37,6 +37,9 @@ LOCAL_APPS = [
     'apps.albums',
     'apps.uploads',
     'apps.notifications',
+    'apps.analytics',
+    'apps.search',
+    'apps.faces',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -151,12 +154,26 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson when installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'eventvault.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'eventvault.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
-        'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
+        'apps.search.filters.FullTextSearchFilter',
     ],
+    # Per client rates of the views with a throttle_scope
+    'DEFAULT_THROTTLE_RATES': {
+        'face_search': config('FACE_SEARCH_THROTTLE_RATE', default='10/minute'),
+    },
 }
 
 # CORS Settings
@@ -181,4 +198,109 @@ MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50MB
 ALLOWED_UPLOAD_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.mp4', '.mov', '.avi', '.mp3', '.wav', '.pdf', '.txt']
 
 # EventVault Settings
-MAX_ALBUM_SIZE = config('MAX_ALBUM_SIZE', default=100, cast=int) 
\ No newline at end of file
+MAX_ALBUM_SIZE = config('MAX_ALBUM_SIZE', default=100, cast=int) 
+
+# Redis
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+
+# Shared cache ('redis' uses REDIS_URL, 'locmem' is per process, for development and tests)
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('CACHE_REDIS_URL', default=REDIS_URL),
+            'KEY_PREFIX': 'eventvault',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'eventvault',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+# Whether all processes share the cache. Tag invalidation only reaches processes
+# that share it: without, cached entries live CACHE_LOCAL_TIMEOUT at most and
+# conditional GET (ETag/304) is off. Set it for a single process locmem setup.
+CACHE_SHARED = config('CACHE_SHARED', default=CACHE_BACKEND != 'locmem', cast=bool)
+
+# Two-tier cache (eventvault/cache.py), times in seconds
+CACHE_DEFAULT_TIMEOUT = config('CACHE_DEFAULT_TIMEOUT', default=300, cast=int)
+CACHE_STALE_TIMEOUT = config('CACHE_STALE_TIMEOUT', default=60, cast=int)  # served while recomputing
+CACHE_LOCK_TIMEOUT = config('CACHE_LOCK_TIMEOUT', default=10, cast=int)  # max recompute time
+CACHE_LOCAL_SIZE = config('CACHE_LOCAL_SIZE', default=1000, cast=int)  # entries per namespace and process
+CACHE_LOCAL_TIMEOUT = config('CACHE_LOCAL_TIMEOUT', default=5, cast=float)  # staleness across processes
+CACHE_METRICS_INTERVAL = config('CACHE_METRICS_INTERVAL', default=60, cast=int)
+CACHE_STATS_TIMEOUT = config('CACHE_STATS_TIMEOUT', default=30, cast=int)
+
+# Serialized gallery items, keyed by upload id and updated_at
+UPLOAD_FRAGMENT_TIMEOUT = config('UPLOAD_FRAGMENT_TIMEOUT', default=24 * 60 * 60, cast=int)
+
+# Write-behind counters ('local' buffers per process, 'redis' shares one buffer)
+COUNTER_BUFFER_BACKEND = config('COUNTER_BUFFER_BACKEND', default='local')
+COUNTER_FLUSH_INTERVAL = config('COUNTER_FLUSH_INTERVAL', default=5, cast=int)  # seconds
+COUNTER_FLUSH_THRESHOLD = config('COUNTER_FLUSH_THRESHOLD', default=1000, cast=int)  # pending keys
+
+# Activity analytics
+ACTIVITY_BUFFERING = config('ACTIVITY_BUFFERING', default=True, cast=bool)  # batch events per minute
+ACTIVITY_FLUSH_INTERVAL = config('ACTIVITY_FLUSH_INTERVAL', default=60, cast=int)  # seconds, 0 flushes on the next event only
+ACTIVITY_RAW_RETENTION_HOURS = config('ACTIVITY_RAW_RETENTION_HOURS', default=48, cast=int)
+
+# Upload ranking (log10(engagement) + created_at / decay), run refresh_rankings after changing it
+RANKING_DECAY_SECONDS = config('RANKING_DECAY_SECONDS', default=45000, cast=int)
+
+# Guest access code lookups (local entries per process, timeout in seconds)
+ALBUM_SNAPSHOT_CACHE_SIZE = config('ALBUM_SNAPSHOT_CACHE_SIZE', default=10000, cast=int)
+ALBUM_SNAPSHOT_TIMEOUT = config('ALBUM_SNAPSHOT_TIMEOUT', default=300, cast=int)
+
+# Static JSON manifests of completed public albums (uploads per shard file)
+MANIFEST_PAGE_SIZE = config('MANIFEST_PAGE_SIZE', default=100, cast=int)
+
+# Capture time moments (a new moment starts after a gap this long)
+MOMENT_GAP_MINUTES = config('MOMENT_GAP_MINUTES', default=90, cast=int)
+
+# Thumbnails (run reprocess_uploads after changing these)
+THUMBNAIL_SIZE = config('THUMBNAIL_SIZE', default=300, cast=int)
+THUMBNAIL_QUALITY = config('THUMBNAIL_QUALITY', default=85, cast=int)
+
+# Image quality flags (measured on 300px thumbnails)
+QUALITY_BLUR_SHARPNESS = config('QUALITY_BLUR_SHARPNESS', default=60.0, cast=float)  # Laplacian variance
+QUALITY_DARK_BRIGHTNESS = config('QUALITY_DARK_BRIGHTNESS', default=40.0, cast=float)  # mean luma
+QUALITY_BRIGHT_BRIGHTNESS = config('QUALITY_BRIGHT_BRIGHTNESS', default=220.0, cast=float)
+QUALITY_UNIFORM_CONTRAST = config('QUALITY_UNIFORM_CONTRAST', default=5.0, cast=float)  # luma std dev
+
+# Face search (OpenCV YuNet detector + SFace recognizer ONNX models)
+FACE_MODEL_DIR = Path(config('FACE_MODEL_DIR', default=str(BASE_DIR / 'models')))
+FACE_DETECTION_MODEL = str(FACE_MODEL_DIR / 'face_detection_yunet_2023mar.onnx')
+FACE_RECOGNITION_MODEL = str(FACE_MODEL_DIR / 'face_recognition_sface_2021dec.onnx')
+FACE_MAX_IMAGE_SIDE = config('FACE_MAX_IMAGE_SIDE', default=1280, cast=int)  # px, images are downscaled first
+FACE_MIN_SIZE = config('FACE_MIN_SIZE', default=40, cast=int)  # px, smaller faces give poor embeddings
+FACE_MATCH_THRESHOLD = config('FACE_MATCH_THRESHOLD', default=0.363, cast=float)  # cosine similarity
+FACE_INDEX_CACHE_SIZE = config('FACE_INDEX_CACHE_SIZE', default=8, cast=int)  # album indexes kept per process
+FACE_SEARCH_MAX_IMAGE_MB = config('FACE_SEARCH_MAX_IMAGE_MB', default=10, cast=int)  # selfie file size
+FACE_SEARCH_MAX_PIXELS = config('FACE_SEARCH_MAX_PIXELS', default=50_000_000, cast=int)  # checked before decoding
+
+# Media processing (audio is analyzed by a scheduled `reprocess_uploads --steps audio --missing`)
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='ffmpeg')
+AUDIO_ANALYSIS_TIMEOUT = config('AUDIO_ANALYSIS_TIMEOUT', default=300, cast=int)  # seconds
+
+# Media layout ('sharded' fans files out as uploads/ab/cd/<uuid>, 'flat' is the old per-album layout)
+MEDIA_LAYOUT = config('MEDIA_LAYOUT', default='sharded')
+MEDIA_SHARD_DEPTH = config('MEDIA_SHARD_DEPTH', default=2, cast=int)
+
+# Cold storage tier for originals of archived, expired or inactive albums
+COLD_STORAGE_BACKEND = config('COLD_STORAGE_BACKEND', default='django.core.files.storage.FileSystemStorage')
+COLD_STORAGE_ROOT = config('COLD_STORAGE_ROOT', default=str(BASE_DIR / 'cold_media'))
+COLD_STORAGE_OPTIONS = {}  # extra storage kwargs, e.g. bucket_name/endpoint_url for S3-compatible stores
+COLD_STORAGE_INACTIVE_DAYS = config('COLD_STORAGE_INACTIVE_DAYS', default=90, cast=int)
+COLD_STORAGE_EXPIRED_DAYS = config('COLD_STORAGE_EXPIRED_DAYS', default=30, cast=int)
+COLD_STORAGE_MIN_HOT_DAYS = config('COLD_STORAGE_MIN_HOT_DAYS', default=7, cast=int)  # after a rehydrate
+
+# Album lifecycle
+ALBUM_ARCHIVE_AFTER_DAYS = config('ALBUM_ARCHIVE_AFTER_DAYS', default=30, cast=int)  # after expiry
+ALBUM_PURGE_DELAY_HOURS = config('ALBUM_PURGE_DELAY_HOURS', default=24, cast=int)  # after soft delete
+
+# Media scrubbing (orphaned files younger than this are kept, they may belong to uploads in flight)
+MEDIA_SCRUB_GRACE_HOURS = config('MEDIA_SCRUB_GRACE_HOURS', default=24, cast=float)
@@ -0,0 +1,137 @@
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.cache import cache as shared_cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.albums.tests import MediaTestCase, make_album, make_upload, make_user
+from .cache import TieredCache, _tag_key, invalidate_tags
+from .renderers import ORJSONRenderer
+
+test_cache = TieredCache('tests')
+
+
+class Producer:
+    """Counts calls and returns the call number"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+@override_settings(CACHE_SHARED=True)
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        shared_cache.clear()
+        test_cache.clear_local()
+
+    def test_hit(self):
+        producer = Producer()
+        self.assertEqual(test_cache.get_or_set('key', producer, tags=['album:1']), 1)
+        self.assertEqual(test_cache.get_or_set('key', producer, tags=['album:1']), 1)
+        test_cache.clear_local()
+        self.assertEqual(test_cache.get_or_set('key', producer, tags=['album:1']), 1)
+        self.assertEqual(producer.calls, 1)
+
+    def test_invalidation(self):
+        producer = Producer()
+        test_cache.get_or_set('key', producer, tags=['album:1', 'event_types'])
+        invalidate_tags('event_types')
+        self.assertEqual(test_cache.get_or_set('key', producer, tags=['album:1', 'event_types']), 2)
+        invalidate_tags('album:2')
+        self.assertEqual(test_cache.get_or_set('key', producer, tags=['album:1', 'event_types']), 2)
+
+    def test_invalidation_survives_stamp_eviction(self):
+        producer = Producer()
+        # First use of the tag, no stamp exists yet
+        test_cache.get_or_set('key', producer, tags=['album:1'])
+        invalidate_tags('album:1')
+        shared_cache.delete(_tag_key('album:1'))
+        self.assertEqual(test_cache.get_or_set('key', producer, tags=['album:1']), 2)
+
+    def test_entries_never_have_missing_stamps(self):
+        test_cache.get_or_set('key', Producer(), tags=['album:1'])
+        entry = shared_cache.get(test_cache.make_key('key'))
+        self.assertNotIn(None, entry.tags)
+
+    @override_settings(CACHE_SHARED=False, CACHE_LOCAL_TIMEOUT=5)
+    def test_unshared_backend_bounds_entry_lifetime(self):
+        test_cache.get_or_set('key', Producer(), timeout=300, tags=['album:1'])
+        entry = shared_cache.get(test_cache.make_key('key'))
+        self.assertLessEqual(entry.expires_at, time.time() + 5)
+
+
+@override_settings(CACHE_SHARED=True)
+class ConditionalGetTests(MediaTestCase):
+
+    def setUp(self):
+        shared_cache.clear()
+        self.owner = make_user('owner@example.com')
+        self.album = make_album(self.owner)
+        self.upload = make_upload(self.album)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/api/v1/uploads/album/{self.album.pk}/'
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_change_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload.caption = 'changed'
+            self.upload.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['results'][0]['caption'], 'changed')
+
+    def test_album_detail_invalidated_by_album_save(self):
+        url = f'/api/v1/albums/{self.album.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.album.title = 'Renamed'
+        self.album.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Renamed')
+
+    @override_settings(CACHE_SHARED=False)
+    def test_disabled_without_shared_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def assertSameOutput(self, data):
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_matches_stock_renderer(self):
+        self.assertSameOutput({
+            'price': Decimal('12.50'),
+            'utc': datetime(2024, 6, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+            'offset': datetime(2024, 6, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=3))),
+            'naive': datetime(2024, 6, 1, 12, 30),
+            'day': date(2024, 6, 1),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'items': [{'caption': 'Düğün \u2028 gecesi', 'count': 3, 'missing': None}],
+        })
+
+    def test_non_string_keys(self):
+        self.assertSameOutput({1: 'one', 'two': 2})
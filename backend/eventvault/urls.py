@@ -32,6 +32,8 @@ urlpatterns = [
     path('api/v1/albums/', include('apps.albums.urls')),
     path('api/v1/uploads/', include('apps.uploads.urls')),
     path('api/v1/notifications/', include('apps.notifications.urls')),
+    path('api/v1/analytics/', include('apps.analytics.urls')),
+    path('api/v1/faces/', include('apps.faces.urls')),
 ]
 
 # Serve media files in development